@@ -0,0 +1,240 @@
+"""Benchmark suite over a synthetic model corpus.
+
+Every stage runs in a fresh process on its own copy of the corpus, so the
+peak RSS of one stage doesn't leak into the next. The results are written as
+sorted JSON in a fixed layout, to be compared between releases.
+
+    python benchmarks/bench_suite.py [--files N] [--classes M] [--binaries K]
+        [--renames R] [--missing S] [--repeat X] [--stage NAME] [--output PATH]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Callable
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS, "..", "src"))
+sys.path.insert(0, BENCHMARKS)
+
+from corpus import Corpus, CorpusSpec, generate, key_settings  # noqa: E402
+
+RESULT_FORMAT = 1
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def stage_static_discovery(corpus: Corpus) -> Callable[[], int]:
+    from discovery.static import discover_file
+
+    def run() -> int:
+        return sum(len(discover_file(f).classes) for f in corpus.files)
+
+    return run
+
+
+def stage_import_discovery(corpus: Corpus) -> Callable[[], int]:
+    from import_pool import inspect_in_process
+
+    def run() -> int:
+        return sum(len(inspect_in_process(f) or []) for f in corpus.files)
+
+    return run
+
+
+def _discovered(corpus: Corpus) -> list:
+    from discovery.static import discover_file
+
+    return [(f, c) for f in corpus.files for c in discover_file(f).classes]
+
+
+def _plans(corpus: Corpus, discovered: list) -> list:
+    from planner import Planner
+    from runtime import Runtime
+
+    return [
+        Planner(
+            Runtime(f, corpus.history_path, c.class_name, c, auto_execute=False)
+        ).plan()
+        for f, c in discovered
+    ]
+
+
+def stage_runtime(corpus: Corpus) -> Callable[[], int]:
+    from history import open_history
+
+    discovered = _discovered(corpus)
+
+    def run() -> int:
+        with open_history(corpus.history_path).transaction():
+            return len(_plans(corpus, discovered))
+
+    return run
+
+
+def stage_executor(corpus: Corpus) -> Callable[[], int]:
+    from execute.session import EditSession
+    from executor import Executor
+    from history import open_history
+
+    with open_history(corpus.history_path).transaction():
+        plans = _plans(corpus, _discovered(corpus))
+
+    def run() -> int:
+        actions = 0
+        with open_history(corpus.history_path).transaction():
+            for file_name in corpus.files:
+                with EditSession(file_name) as session:
+                    for plan in plans:
+                        if plan.file_name != file_name:
+                            continue
+                        for action in plan.actions:
+                            Executor.handle_action(action, session)
+                            actions += 1
+        return actions
+
+    return run
+
+
+def stage_templates(corpus: Corpus) -> Callable[[], int]:
+    import ast
+
+    from execute.apply.file_name import apply_file_name
+    from execute.apply.mime import apply_mime
+    from execute.apply.werkzeug import apply_werkzeug
+
+    spec = corpus.spec
+    keys = [
+        (f"blob_{i}_v2" if i < spec.renames else f"blob_{i}", key_settings(i))
+        for i in range(spec.binaries)
+    ]
+    classes: list[ast.ClassDef] = []
+    for file_name in corpus.files:
+        with open(file_name) as in_file:
+            module = ast.parse(in_file.read())
+        classes += [node for node in module.body if isinstance(node, ast.ClassDef)]
+
+    def run() -> int:
+        built = 0
+        for _class in classes:
+            for key_name, key in keys:
+                if key.get("unhandled"):
+                    continue
+                apply_mime(key, key_name, _class)
+                apply_file_name(key, key_name, _class)
+                apply_werkzeug(key, key_name, _class)
+                built += 1
+        return built
+
+    return run
+
+
+STAGES: dict[str, Callable[[Corpus], Callable[[], int]]] = {
+    "discovery_static": stage_static_discovery,
+    "discovery_import": stage_import_discovery,
+    "runtime": stage_runtime,
+    "executor": stage_executor,
+    "templates": stage_templates,
+}
+
+
+def run_stage(name: str, source: Corpus, queue: multiprocessing.Queue) -> None:
+    """Runs in a fresh process, on a copy of the corpus"""
+    from settings import SETTINGS
+
+    with tempfile.TemporaryDirectory() as root:
+        copy = os.path.join(root, "corpus")
+        shutil.copytree(source.root, copy)
+        corpus = Corpus(
+            copy,
+            source.spec,
+            [os.path.join(copy, os.path.basename(f)) for f in source.files],
+            os.path.join(copy, os.path.basename(source.history_path)),
+            os.path.join(copy, os.path.basename(source.decisions_path)),
+        )
+        SETTINGS.decisions_path = corpus.decisions_path
+        SETTINGS.mode = "flask"
+        run = STAGES[name](corpus)
+        rss_before = peak_rss_mb()
+        started = time.perf_counter()
+        units = run()
+        wall = time.perf_counter() - started
+        queue.put(
+            {
+                "wall_seconds": wall,
+                "units": units,
+                "peak_rss_mb": peak_rss_mb(),
+                "rss_growth_mb": peak_rss_mb() - rss_before,
+            }
+        )
+
+
+def measure(name: str, corpus: Corpus, repeat: int) -> dict:
+    context = multiprocessing.get_context("spawn")
+    runs = []
+    for _ in range(repeat):
+        queue = context.Queue()
+        process = context.Process(target=run_stage, args=(name, corpus, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        runs.append(result)
+    best = min(runs, key=lambda r: r["wall_seconds"])
+    return {
+        **best,
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in runs),
+        "files_per_second": len(corpus.files) / best["wall_seconds"],
+        "runs": repeat,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    for name, value in asdict(CorpusSpec()).items():
+        parser.add_argument(f"--{name}", type=int, default=value)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stage", action="append", choices=list(STAGES))
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    from settings import VERSION
+
+    spec = CorpusSpec(**{name: getattr(args, name) for name in asdict(CorpusSpec())})
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        corpus = generate(os.path.join(root, "corpus"), spec)
+        for name in args.stage or list(STAGES):
+            results[name] = measure(name, corpus, args.repeat)
+            print(
+                f"{name:<18}{results[name]['wall_seconds']:>10.3f}s"
+                f"{results[name]['files_per_second']:>12.1f} files/s"
+                f"{results[name]['peak_rss_mb']:>10.1f} MB"
+            )
+
+    report = {
+        "format": RESULT_FORMAT,
+        "version": VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": asdict(spec),
+        "stages": results,
+    }
+    with open(args.output, "w") as out_file:
+        json.dump(report, out_file, indent=1, sort_keys=True)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
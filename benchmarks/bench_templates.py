@@ -0,0 +1,106 @@
+"""Micro-benchmark of the template builders.
+
+Compares the skeleton templates of templates.py with the f-string and
+ast.parse path they replaced, and checks both build the same code.
+
+    python benchmarks/bench_templates.py [--number N]
+"""
+
+import argparse
+import ast
+import os
+import sys
+import timeit
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+)
+
+import templates  # noqa: E402
+from naming import (  # noqa: E402
+    get_column_file_name_key,
+    get_column_mime_key,
+    get_file_variable,
+    get_mime_variable_name,
+    get_static_mime_key,
+    werkzeug_get_name,
+)
+from types_source import FileFields  # noqa: E402
+
+KEY: FileFields = {"mime_type_field_name": "mime", "file_name_field_name": "name"}
+
+
+def fstring_werkzeug_getter(key_name: str, key: FileFields) -> ast.stmt:
+    mime_key = f"self.{get_mime_variable_name(key,key_name)}" or "None"
+    file_name = f"self.{get_file_variable(key,key_name)}" or "None"
+    template = f"""
+@property
+def {werkzeug_get_name(key_name)}(self)->flask.Response:
+    mime_type = {mime_key}
+    file_name = {file_name}
+    data = self.{key_name}
+    return flask.send_file(data,attachment_filename=file_name,mimetype=mime_type)
+"""
+    return ast.parse(template).body[0]
+
+
+def fstring_mime_type_column(column_name: str) -> ast.stmt:
+    template = f"{get_column_mime_key(column_name)}:Mapped[str] = String('{get_column_mime_key(column_name)}')"
+    return ast.parse(template).body[0]
+
+
+def fstring_mime_type_static(key_name: str, static_mime: str) -> ast.stmt:
+    template = (
+        f"{get_static_mime_key(key_name)}:Literal['{static_mime}'] = '{static_mime}'"
+    )
+    return ast.parse(template).body[0]
+
+
+def fstring_file_name_setter(key_name: str, column_name: str) -> ast.stmt:
+    template = f"""@{get_column_file_name_key(key_name)}.setter
+def {get_column_file_name_key(key_name)}(self,value:str)->None:
+    self.{column_name} = value
+"""
+    return ast.parse(template).body[0]
+
+
+CASES = [
+    (
+        "property_werkzeug_getter_template",
+        lambda: fstring_werkzeug_getter("blob", KEY),
+        lambda: templates.property_werkzeug_getter_template("blob", KEY),
+    ),
+    (
+        "mime_type_column_template",
+        lambda: fstring_mime_type_column("blob"),
+        lambda: templates.mime_type_column_template("blob"),
+    ),
+    (
+        "mime_type_static_template",
+        lambda: fstring_mime_type_static("blob", "application/pdf"),
+        lambda: templates.mime_type_static_template("blob", "application/pdf"),
+    ),
+    (
+        "file_name_setter_template",
+        lambda: fstring_file_name_setter("blob", "name_column"),
+        lambda: templates.file_name_setter_template("blob", "name_column"),
+    ),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'template':<36}{'f-string us':>14}{'skeleton us':>14}{'speedup':>10}")
+    for name, fstring, skeleton in CASES:
+        if ast.dump(fstring()) != ast.dump(skeleton()):
+            raise SystemExit(f"{name}: the two paths build different code")
+        before = timeit.timeit(fstring, number=args.number) / args.number * 1e6
+        after = timeit.timeit(skeleton, number=args.number) / args.number * 1e6
+        print(f"{name:<36}{before:>14.2f}{after:>14.2f}{before / after:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
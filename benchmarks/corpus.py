@@ -0,0 +1,135 @@
+"""Synthetic model corpora for the benchmarks.
+
+Writes N files of M declarative classes with K binary columns each, the
+history those classes had before a refactor and the decisions that answer
+every prompt, so the whole tool can run unattended over it:
+
+    * binary keys cycle through dynamic, static and unhandled settings
+    * the first R binary columns of a class are renames of a history key
+    * S history keys per class are missing from the class, alternately
+      dropped as they are and cleaned
+
+    python benchmarks/corpus.py ROOT [--files N] [--classes M] [--binaries K]
+"""
+
+import argparse
+import os
+from dataclasses import asdict, dataclass
+
+from yaml import dump
+
+FILE_HEADER = """from sqlalchemy import Column, Integer, LargeBinary, String
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+"""
+
+CLASS_TEMPLATE = """
+
+class {class_name}(Base):
+    __tablename__ = "{table_name}"
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String(200))
+{columns}"""
+
+
+@dataclass
+class CorpusSpec:
+    files: int = 20
+    classes: int = 5
+    binaries: int = 3
+    renames: int = 1
+    missing: int = 1
+
+
+@dataclass
+class Corpus:
+    root: str
+    spec: CorpusSpec
+    files: list[str]
+    history_path: str
+    decisions_path: str
+
+
+def class_name_of(file_index: int, class_index: int) -> str:
+    return f"Model{file_index:04d}x{class_index:02d}"
+
+
+def key_settings(index: int) -> dict:
+    match index % 3:
+        case 0:
+            return {
+                "mime_type_field_name": f"blob_{index}_mime",
+                "file_name_field_name": f"blob_{index}_name",
+            }
+        case 1:
+            return {"mime_type_fix": "application/pdf", "file_name_fix": "doc.pdf"}
+        case _:
+            return {"unhandled": True}
+
+
+def generate(root: str, spec: CorpusSpec) -> Corpus:
+    os.makedirs(root, exist_ok=True)
+    history: dict[str, dict] = {}
+    decisions: dict[str, dict] = {}
+    files = []
+    for file_index in range(spec.files):
+        source = FILE_HEADER
+        for class_index in range(spec.classes):
+            class_name = class_name_of(file_index, class_index)
+            columns = []
+            class_history: dict[str, dict] = {}
+            class_decisions: dict[str, dict] = {}
+            for index in range(spec.binaries):
+                key_name = f"blob_{index}"
+                if index < spec.renames:
+                    class_history[key_name] = key_settings(index)
+                    key_name = f"{key_name}_v2"
+                    class_decisions[key_name] = {"rename_from": f"blob_{index}"}
+                else:
+                    class_history[key_name] = key_settings(index)
+                columns += [
+                    f"    {key_name} = Column(LargeBinary)",
+                    f"    blob_{index}_mime = Column(String(100))",
+                    f"    blob_{index}_name = Column(String(255))",
+                ]
+            for index in range(spec.missing):
+                class_history[f"legacy_{index}"] = {"unhandled": True}
+                class_decisions[f"legacy_{index}"] = {
+                    "missing": "as_is" if index % 2 == 0 else "clean"
+                }
+            history[class_name] = class_history
+            decisions[class_name] = class_decisions
+            source += CLASS_TEMPLATE.format(
+                class_name=class_name,
+                table_name=class_name.lower(),
+                columns="\n".join(columns) + "\n",
+            )
+        file_name = os.path.join(root, f"models_{file_index:04d}.py")
+        with open(file_name, "w") as out_file:
+            out_file.write(source)
+        files.append(file_name)
+
+    history_path = os.path.join(root, "csfe.yaml")
+    with open(history_path, "w") as out_file:
+        dump(history, out_file)
+    decisions_path = os.path.join(root, "decisions.yaml")
+    with open(decisions_path, "w") as out_file:
+        dump(decisions, out_file)
+    return Corpus(root, spec, files, history_path, decisions_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root")
+    for name, value in asdict(CorpusSpec()).items():
+        parser.add_argument(f"--{name}", type=int, default=value)
+    args = parser.parse_args()
+    spec = CorpusSpec(**{name: getattr(args, name) for name in asdict(CorpusSpec())})
+    corpus = generate(args.root, spec)
+    print(f"{len(corpus.files)} files written to {corpus.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import re
+from dataclasses import dataclass
+from typing import Literal
+
+"""Picks the mime type and file name columns of a binary key by convention.
+
+Candidates are scored by their name, their type and how close they sit to the
+binary column. Only a clear winner is accepted, anything else is left to the
+prompts.
+"""
+
+ResolveKind = Literal["mime"] | Literal["file_name"]
+
+# Patterns over the normalized column name, {key} is the binary column name
+NAME_PATTERNS: dict[ResolveKind, list[tuple[str, int]]] = {
+    "mime": [
+        (r"{key}_(mime|mime_type|mimetype|content_type|contenttype)", 10),
+        (r"(mime|mime_type|mimetype|content_type|contenttype)_{key}", 10),
+        (r".*{key}.*(mime|content_type).*", 8),
+        (r"(mime|mime_type|mimetype|content_type|contenttype)", 6),
+        (r".*(mime|content_type).*", 5),
+        (r".*_type", 1),
+    ],
+    "file_name": [
+        (r"{key}_(filename|file_name|name)", 10),
+        (r"(filename|file_name|name)_{key}", 10),
+        (r".*{key}.*(filename|file_name|name).*", 8),
+        (r"(filename|file_name|original_name)", 6),
+        (r".*(filename|file_name).*", 5),
+        (r".*_name", 2),
+    ],
+}
+
+# Short strings are the usual holders, long texts rarely are
+TYPE_SCORES = {
+    "STRING": 1,
+    "VARCHAR": 1,
+    "NVARCHAR": 1,
+    "UNICODE": 1,
+    "NCHAR": 0,
+    "TEXT": -1,
+    "UNICODETEXT": -1,
+}
+
+CONFIDENT_SCORE = 6
+CONFIDENT_MARGIN = 3
+
+
+@dataclass
+class Candidate:
+    column: str
+    score: float
+
+
+def _normalize(name: str) -> str:
+    """contentType, Content-Type -> content_type"""
+    name = re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", name)
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def _has_part(name: str, part: str) -> bool:
+    """Whole underscore separated tokens only, file is not part of filename"""
+    return f"_{part}_" in f"_{name}_"
+
+
+def name_score(kind: ResolveKind, key_name: str, column: str) -> int:
+    key = re.escape(_normalize(key_name))
+    normalized = _normalize(column)
+    for pattern, score in NAME_PATTERNS[kind]:
+        if re.fullmatch(pattern.format(key=key), normalized):
+            return score
+    return 0
+
+
+def score_candidates(
+    kind: ResolveKind,
+    key_name: str,
+    column_types: dict[str, str | None],
+    candidates: list[str],
+    other_keys: list[str],
+) -> list[Candidate]:
+    """Candidates best first, column_types holds every column in class order"""
+    positions = {column: index for index, column in enumerate(column_types)}
+    own = positions.get(key_name)
+    scored: list[Candidate] = []
+    for column in candidates:
+        score: float = name_score(kind, key_name, column)
+        if not score:
+            scored.append(Candidate(column, 0))
+            continue
+        score += TYPE_SCORES.get(column_types.get(column) or "", 0)
+        if own is not None and column in positions:
+            score += 2 / abs(positions[column] - own)
+        # Named after another binary column, most likely that one's
+        normalized = _normalize(column)
+        if not _has_part(normalized, _normalize(key_name)) and any(
+            _has_part(normalized, _normalize(other))
+            for other in other_keys
+            if other != key_name
+        ):
+            score -= 5
+        scored.append(Candidate(column, score))
+    return sorted(scored, key=lambda c: -c.score)
+
+
+def confident_pick(scored: list[Candidate]) -> str | None:
+    if not scored or scored[0].score < CONFIDENT_SCORE:
+        return None
+    runner_up = scored[1].score if len(scored) > 1 else 0
+    if scored[0].score - runner_up < CONFIDENT_MARGIN:
+        return None
+    return scored[0].column
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+
+from logger import LOGGER
+from settings import SETTINGS, VERSION
+from types_source import FileFields
+
+"""Persistent cache of the files that need no work.
+
+A file is skipped while its content, the tool version, the settings that shape
+the generated code and the history of every class it holds are unchanged since
+the last successful run.
+"""
+
+CACHE_FORMAT = 1
+
+CODE_SETTINGS = [
+    "mode",
+    "purge",
+    "purge_on_unhandled",
+    "purge_on_unhandled_mime",
+    "purge_on_unhandled_file",
+    "purge_on_unhandled_werkzeug",
+    "purge_on_unhandled_starlette",
+    "streaming_upload",
+    "max_upload_size",
+    "defer_binary",
+    "binary_raiseload",
+    "write_mode",
+]
+
+
+def content_hash(file_name: str) -> str:
+    with open(file_name, "rb") as in_file:
+        return hashlib.sha256(in_file.read()).hexdigest()
+
+
+def history_digest(
+    history: dict[str, dict[str, FileFields]], classes: list[str]
+) -> str:
+    relevant = {c: history.get(c) for c in sorted(classes)}
+    return hashlib.sha256(
+        json.dumps(relevant, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def settings_digest() -> str:
+    relevant = {key: getattr(SETTINGS, key) for key in CODE_SETTINGS}
+    return hashlib.sha256(
+        json.dumps(relevant, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    content_hash: str
+    history_digest: str
+    classes: list[str] = field(default_factory=list)
+
+
+@dataclass
+class RunCache:
+    cache_path: str
+    entries: dict[str, CacheEntry] = field(default_factory=dict)
+    dirty: bool = False
+
+    def __post_init__(self) -> None:
+        self.tool_key = f"{VERSION}:{settings_digest()}"
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path) as in_file:
+                raw = json.load(in_file)
+        except (OSError, ValueError) as e:
+            LOGGER.warning("Cache is unreadable, starting a new one, %s", e)
+            return
+        if raw.get("format") != CACHE_FORMAT or raw.get("tool") != self.tool_key:
+            LOGGER.info("Cache was written by another version or settings, ignoring")
+            return
+        self.entries = {
+            file_name: CacheEntry(**entry)
+            for file_name, entry in raw.get("files", {}).items()
+        }
+
+    def is_fresh(
+        self, file_name: str, history: dict[str, dict[str, FileFields]]
+    ) -> bool:
+        entry = self.entries.get(file_name)
+        if not entry:
+            return False
+        try:
+            if entry.content_hash != content_hash(file_name):
+                return False
+        except OSError:
+            return False
+        return entry.history_digest == history_digest(history, entry.classes)
+
+    def record(
+        self,
+        file_name: str,
+        classes: list[str],
+        history: dict[str, dict[str, FileFields]],
+    ) -> None:
+        self.entries[file_name] = CacheEntry(
+            content_hash(file_name), history_digest(history, classes), sorted(classes)
+        )
+        self.dirty = True
+
+    def forget(self, file_name: str) -> None:
+        if self.entries.pop(file_name, None):
+            self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        with open(self.cache_path, "w") as out_file:
+            json.dump(
+                {
+                    "format": CACHE_FORMAT,
+                    "tool": self.tool_key,
+                    "files": {
+                        file_name: asdict(entry)
+                        for file_name, entry in sorted(self.entries.items())
+                    },
+                },
+                out_file,
+                indent=1,
+            )
+        self.dirty = False
+
+
+def clear_cache(cache_path: str) -> bool:
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+        return True
+    return False
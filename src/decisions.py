@@ -0,0 +1,178 @@
+import os
+from typing import Any, Literal
+
+from yaml import Loader, YAMLError, load
+
+from types_source import FileFields
+
+"""Pre answered prompts for unattended runs.
+
+A YAML (or JSON) file keyed by class and column name:
+
+    TestClass:
+      file:                      # a new key
+        mime: {static: image/png}
+        file_name: {dynamic: file_name_col}
+      image:
+        unhandled: true
+      photo:                     # renamed, keeps the old settings
+        rename_from: picture
+      thumbnail:                 # renamed, with new settings
+        rename_from: thumb
+        mime: unhandled
+        file_name: static        # the default static file name
+      legacy:                    # a key missing from the class
+        missing: clean           # re_add, clean or as_is
+      scan:
+        mime: static
+        file_name: static
+        content_metadata: true   # size and sha256 columns, or false
+
+Once a decisions file is set the prompts are never shown, a decision the file
+doesn't cover stops the run.
+"""
+
+MissingKeyDecision = Literal["re_add", "clean", "as_is"]
+
+MISSING_KEY_DECISIONS = ["re_add", "clean", "as_is"]
+
+DEFAULT_STATIC = {"mime": "application/octet-stream", "file_name": "binary.file"}
+
+FIELD_NAMES = {
+    "mime": ("mime_type_fix", "mime_type_field_name", "mime_unhandled"),
+    "file_name": ("file_name_fix", "file_name_field_name", "name_unhandled"),
+}
+
+COLUMN_KEYS = {
+    "unhandled",
+    "mime",
+    "file_name",
+    "rename_from",
+    "missing",
+    "content_metadata",
+}
+
+
+class DecisionError(Exception):
+    pass
+
+
+def _field(part: str, decision: Any, where: str) -> FileFields:
+    """mime/file_name decision -> its FileFields"""
+    fix, field_name, unhandled = FIELD_NAMES[part]
+    if decision == "unhandled":
+        return {unhandled: True}  # type: ignore
+    if decision == "static":
+        return {fix: DEFAULT_STATIC[part]}  # type: ignore
+    if isinstance(decision, dict) and len(decision) == 1:
+        kind, value = next(iter(decision.items()))
+        if kind == "static" and isinstance(value, str):
+            return {fix: value or DEFAULT_STATIC[part]}  # type: ignore
+        if kind == "dynamic" and isinstance(value, str) and value:
+            return {field_name: value}  # type: ignore
+    raise DecisionError(
+        f"{where}: {part} must be unhandled, static, {{static: value}} or"
+        f" {{dynamic: column}}, got {decision!r}"
+    )
+
+
+def _new_key(column: dict[str, Any], where: str) -> FileFields | None:
+    """The settings of a new or renamed key, None when none are given"""
+    if column.get("unhandled"):
+        return {"unhandled": True}
+    if "mime" not in column and "file_name" not in column:
+        return None
+    missing = [part for part in FIELD_NAMES if part not in column]
+    if missing:
+        raise DecisionError(f"{where}: no {' and '.join(missing)} decision")
+    new_key: FileFields = {}
+    for part in FIELD_NAMES:
+        new_key.update(_field(part, column[part], where))
+    if "content_metadata" in column:
+        new_key["content_metadata"] = column["content_metadata"]
+    return new_key
+
+
+class Decisions:
+    def __init__(self, decisions_path: str, data: Any) -> None:
+        self.decisions_path = decisions_path
+        self.data: dict[str, dict[str, dict[str, Any]]] = data or {}
+        self.validate()
+
+    def validate(self) -> None:
+        """Checks the whole file upfront, a typo fails before any file is touched"""
+        if not isinstance(self.data, dict):
+            raise DecisionError(f"{self.decisions_path}: expected classes at the top")
+        for class_name, columns in self.data.items():
+            if not isinstance(columns, dict):
+                raise DecisionError(f"{class_name}: expected columns")
+            for key_name, column in columns.items():
+                where = f"{class_name}.{key_name}"
+                if not isinstance(column, dict):
+                    raise DecisionError(f"{where}: expected a mapping")
+                unknown = set(column) - COLUMN_KEYS
+                if unknown:
+                    raise DecisionError(f"{where}: unknown entries {sorted(unknown)}")
+                if not isinstance(column.get("content_metadata", False), bool):
+                    raise DecisionError(
+                        f"{where}: content_metadata must be true or false"
+                    )
+                if "missing" in column:
+                    if column["missing"] not in MISSING_KEY_DECISIONS:
+                        raise DecisionError(
+                            f"{where}: missing must be one of {MISSING_KEY_DECISIONS}"
+                        )
+                    continue
+                new_key = _new_key(column, where)
+                if new_key is None and "rename_from" not in column:
+                    raise DecisionError(f"{where}: no decision for the new key")
+
+    def covers(self, class_name: str, key_name: str) -> bool:
+        return key_name in self.data.get(class_name, {})
+
+    def column(self, class_name: str, key_name: str) -> dict[str, Any]:
+        column = self.data.get(class_name, {}).get(key_name)
+        if column is None:
+            raise DecisionError(
+                f"No decision for '{key_name}' of {class_name} in {self.decisions_path}"
+            )
+        return column
+
+    def new_key(
+        self, class_name: str, key_name: str, missing_keys: list[str]
+    ) -> tuple[str | None, FileFields | None]:
+        """The key it is renamed from if any, and its settings if given"""
+        column = self.column(class_name, key_name)
+        where = f"{class_name}.{key_name}"
+        if "missing" in column:
+            raise DecisionError(f"{where}: is a new key, not a missing one")
+        rename_from = column.get("rename_from")
+        if rename_from is not None and rename_from not in missing_keys:
+            raise DecisionError(
+                f"{where}: renamed from '{rename_from}', which is not a missing key"
+            )
+        return rename_from, _new_key(column, where)
+
+    def missing_key(self, class_name: str, key_name: str) -> MissingKeyDecision:
+        missing = self.column(class_name, key_name).get("missing")
+        if missing is None:
+            raise DecisionError(
+                f"{class_name}.{key_name}: is a missing key, no missing decision"
+            )
+        return missing
+
+
+_LOADED: dict[str, Decisions] = {}
+
+
+def open_decisions(decisions_path: str) -> Decisions:
+    """Parsed once per run and path"""
+    key = os.path.realpath(decisions_path)
+    if key not in _LOADED:
+        try:
+            with open(decisions_path) as in_file:
+                data = load(in_file, Loader)
+        except (OSError, YAMLError) as e:
+            raise DecisionError(f"Can't read the decisions file, {e}")
+        _LOADED[key] = Decisions(decisions_path, data)
+    return _LOADED[key]
@@ -0,0 +1,44 @@
+from types import ModuleType
+
+from sqlalchemy.orm import registry
+
+"""Mapped classes of an executed module, read from their registries.
+
+Every registry the module can reach is collected: registry objects it holds,
+and the ones declarative bases keep on themselves. Their mappers list the
+mapped classes, declarative, imperative and dataclass mappings alike, and the
+module attributes holding one of those classes are the result. No attribute
+is probed with the inspection API, so nothing raises along the way.
+"""
+
+REGISTRY_ATTRIBUTES = ["registry", "_sa_registry"]
+
+
+def module_registries(module: ModuleType) -> list[registry]:
+    found: dict[int, registry] = {}
+    for value in list(vars(module).values()):
+        if isinstance(value, registry):
+            found.setdefault(id(value), value)
+        elif isinstance(value, type):
+            for klass in value.__mro__:
+                for attribute in REGISTRY_ATTRIBUTES:
+                    candidate = klass.__dict__.get(attribute)
+                    if isinstance(candidate, registry):
+                        found.setdefault(id(candidate), candidate)
+    return list(found.values())
+
+
+def mapped_classes(
+    module: ModuleType, class_names: list[str] | None = None
+) -> dict[str, type]:
+    """Attribute name -> mapped class, in attribute name order like dir()"""
+    mapped = {
+        id(mapper.class_)
+        for _registry in module_registries(module)
+        for mapper in _registry.mappers
+    }
+    return {
+        name: value
+        for name, value in sorted(vars(module).items())
+        if id(value) in mapped and (class_names is None or name in class_names)
+    }
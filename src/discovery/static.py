@@ -0,0 +1,401 @@
+import ast
+from dataclasses import dataclass, field
+
+from types_source import BINARY_FIELDS, STRING_FIELDS
+
+"""Import free discovery of declarative classes.
+
+Finds the mapped classes of a python file and their columns from the AST only,
+so the project module never has to be executed. Everything that can't be decided
+from the source alone marks the class as ambiguous, and the caller falls back to
+importing the module for those.
+"""
+
+STATIC_BINARY_FIELDS = BINARY_FIELDS + [
+    f.upper()
+    for f in [
+        "VARBINARY",
+        "BYTEA",
+        "TINYBLOB",
+        "MEDIUMBLOB",
+        "LONGBLOB",
+        "RAW",
+        "IMAGE",
+    ]
+]
+
+STATIC_STRING_FIELDS = STRING_FIELDS + [
+    f.upper() for f in ["CHAR", "CLOB", "NTEXT", "TINYTEXT", "MEDIUMTEXT", "LONGTEXT"]
+]
+
+STATIC_OTHER_FIELDS = [
+    f.upper()
+    for f in [
+        "Integer",
+        "SmallInteger",
+        "BigInteger",
+        "Float",
+        "Double",
+        "Numeric",
+        "DECIMAL",
+        "REAL",
+        "Boolean",
+        "Date",
+        "DateTime",
+        "Time",
+        "TIMESTAMP",
+        "Interval",
+        "Enum",
+        "JSON",
+        "JSONB",
+        "UUID",
+        "Uuid",
+        "ARRAY",
+        "INT",
+        "INTEGER",
+        "BIGINT",
+        "SMALLINT",
+        "BOOLEAN",
+        "DATE",
+        "DATETIME",
+        "TIME",
+        "FLOAT",
+        "NUMERIC",
+        "PickleType",
+    ]
+]
+
+ANNOTATION_TYPES = {
+    "BYTES": "LARGEBINARY",
+    "BYTEARRAY": "LARGEBINARY",
+    "STR": "STRING",
+    "INT": "INTEGER",
+    "FLOAT": "FLOAT",
+    "BOOL": "BOOLEAN",
+    "DECIMAL": "NUMERIC",
+    "DATETIME": "DATETIME",
+    "DATE": "DATE",
+    "TIME": "TIME",
+    "UUID": "UUID",
+    "DICT": "JSON",
+    "LIST": "JSON",
+}
+
+DECLARATIVE_BASE_FACTORIES = ["declarative_base", "generate_base"]
+
+DECLARATIVE_BASE_CLASSES = ["DeclarativeBase", "DeclarativeBaseNoMeta"]
+
+NON_MAPPED_BASES = ["MappedAsDataclass", "object", "Generic"]
+
+
+@dataclass
+class DiscoveredColumn:
+    key: str
+    type_name: str | None
+    nullable: bool | None
+    position: int
+
+
+@dataclass
+class DiscoveredClass:
+    class_name: str
+    columns: list[DiscoveredColumn] = field(default_factory=list)
+    ambiguous: bool = False
+
+    @property
+    def file_keys(self) -> list[str]:
+        return [c.key for c in self.columns if c.type_name in STATIC_BINARY_FIELDS]
+
+    @property
+    def string_keys(self) -> list[str]:
+        return [c.key for c in self.columns if c.type_name in STATIC_STRING_FIELDS]
+
+
+def _leaf_name(expr: ast.expr | None) -> str | None:
+    """sa.orm.LargeBinary(12) -> LargeBinary"""
+    if isinstance(expr, ast.Call):
+        return _leaf_name(expr.func)
+    if isinstance(expr, ast.Attribute):
+        return expr.attr
+    if isinstance(expr, ast.Name):
+        return expr.id
+    return None
+
+
+def _constant(expr: ast.expr | None) -> object:
+    if isinstance(expr, ast.Constant):
+        return expr.value
+    return None
+
+
+def _keyword(call: ast.Call, name: str) -> ast.expr | None:
+    return next((k.value for k in call.keywords if k.arg == name), None)
+
+
+def _known_type(type_name: str | None) -> bool:
+    return type_name is not None and (
+        type_name in STATIC_BINARY_FIELDS
+        or type_name in STATIC_STRING_FIELDS
+        or type_name in STATIC_OTHER_FIELDS
+    )
+
+
+def _unwrap_annotation(annotation: ast.expr) -> tuple[ast.expr | None, bool]:
+    """Mapped[Optional[bytes]] -> (bytes, True)"""
+    if isinstance(annotation, ast.Constant) and isinstance(annotation.value, str):
+        try:
+            annotation = ast.parse(annotation.value, mode="eval").body
+        except SyntaxError:
+            return None, False
+    if not isinstance(annotation, ast.Subscript) or _leaf_name(
+        annotation.value
+    ) not in ["Mapped", "MappedColumn"]:
+        return None, False
+
+    inner = annotation.slice
+    if isinstance(inner, ast.Subscript) and _leaf_name(inner.value) == "Optional":
+        return inner.slice, True
+    if isinstance(inner, ast.BinOp) and isinstance(inner.op, ast.BitOr):
+        for side, other in [(inner.left, inner.right), (inner.right, inner.left)]:
+            if isinstance(other, ast.Constant) and other.value is None:
+                return side, True
+        return None, True
+    return inner, False
+
+
+def _annotation_type(annotation: ast.expr | None) -> tuple[str | None, bool, bool]:
+    """Returns the sqlalchemy type name, nullability and whether it is Mapped at all"""
+    if annotation is None:
+        return None, False, False
+    inner, nullable = _unwrap_annotation(annotation)
+    if inner is None:
+        is_mapped = isinstance(annotation, ast.Subscript) and _leaf_name(
+            annotation.value
+        ) in ["Mapped", "MappedColumn"]
+        return None, nullable, is_mapped
+    name = _leaf_name(inner)
+    return ANNOTATION_TYPES.get(name.upper()) if name else None, nullable, True
+
+
+def _column_call(expr: ast.expr | None) -> ast.Call | None:
+    """Column(...), mapped_column(...), and the same wrapped in deferred(...)"""
+    if not isinstance(expr, ast.Call):
+        return None
+    name = _leaf_name(expr.func)
+    if name in ["Column", "mapped_column"]:
+        return expr
+    if name in ["deferred", "column_property"] and expr.args:
+        return _column_call(expr.args[0])
+    return None
+
+
+def _column_from_call(
+    attribute_name: str,
+    call: ast.Call,
+    annotation: ast.expr | None,
+    position: int,
+) -> tuple[DiscoveredColumn, bool]:
+    args = list(call.args)
+    key = attribute_name
+    if args and isinstance(_constant(args[0]), str):
+        key = str(_constant(args[0]))
+        args = args[1:]
+    explicit_key = _constant(_keyword(call, "key"))
+    if isinstance(explicit_key, str):
+        key = explicit_key
+
+    type_expr = next(
+        (
+            a
+            for a in args
+            if _leaf_name(a) not in ["ForeignKey", "Sequence", "Identity"]
+        ),
+        None,
+    ) or _keyword(call, "type_")
+    type_name = _leaf_name(type_expr)
+    type_name = type_name.upper() if type_name else None
+    ann_type, ann_nullable, _ = _annotation_type(annotation)
+
+    ambiguous = False
+    if type_name is None:
+        type_name = ann_type
+        ambiguous = ann_type is None
+    elif not _known_type(type_name):
+        ambiguous = True
+
+    nullable_value = _constant(_keyword(call, "nullable"))
+    if isinstance(nullable_value, bool):
+        nullable: bool | None = nullable_value
+    elif _constant(_keyword(call, "primary_key")) is True:
+        nullable = False
+    elif annotation is not None:
+        nullable = ann_nullable
+    else:
+        nullable = True
+
+    return DiscoveredColumn(key, type_name, nullable, position), ambiguous
+
+
+def _class_columns(_class: ast.ClassDef) -> tuple[list[DiscoveredColumn], bool]:
+    columns: list[DiscoveredColumn] = []
+    ambiguous = False
+    for entry in _class.body:
+        if isinstance(entry, ast.AnnAssign) and isinstance(entry.target, ast.Name):
+            name, annotation, value = entry.target.id, entry.annotation, entry.value
+        elif (
+            isinstance(entry, ast.Assign)
+            and len(entry.targets) == 1
+            and isinstance(entry.targets[0], ast.Name)
+        ):
+            name, annotation, value = entry.targets[0].id, None, entry.value
+        else:
+            continue
+        if name.startswith("__"):
+            continue
+
+        call = _column_call(value)
+        if call is not None:
+            column, column_ambiguous = _column_from_call(
+                name, call, annotation, len(columns)
+            )
+            columns.append(column)
+            ambiguous = ambiguous or column_ambiguous
+            continue
+
+        ann_type, ann_nullable, is_mapped = _annotation_type(annotation)
+        if is_mapped and value is None:
+            columns.append(DiscoveredColumn(name, ann_type, ann_nullable, len(columns)))
+            ambiguous = ambiguous or ann_type is None
+        elif is_mapped or (
+            isinstance(value, ast.Call)
+            and _leaf_name(value.func) in ["relationship", "synonym", "composite"]
+        ):
+            continue
+        elif isinstance(value, ast.Call):
+            # Anything else that is called may build a column behind a helper.
+            ambiguous = ambiguous or _leaf_name(value.func) not in [
+                "declared_attr",
+                "hybrid_property",
+                "association_proxy",
+            ]
+    return columns, ambiguous
+
+
+def _class_attribute(_class: ast.ClassDef, name: str) -> ast.expr | None:
+    for entry in _class.body:
+        if isinstance(entry, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == name for t in entry.targets
+        ):
+            return entry.value
+        if (
+            isinstance(entry, ast.AnnAssign)
+            and isinstance(entry.target, ast.Name)
+            and entry.target.id == name
+        ):
+            return entry.value
+    return None
+
+
+def _is_mapping_decorator(expr: ast.expr, registries: set[str]) -> bool:
+    if isinstance(expr, ast.Call):
+        expr = expr.func
+    return (
+        isinstance(expr, ast.Attribute)
+        and expr.attr in ["mapped", "mapped_as_dataclass"]
+        and _leaf_name(expr.value) in registries
+    )
+
+
+@dataclass
+class StaticDiscovery:
+    file_name: str
+    classes: list[DiscoveredClass]
+
+    @property
+    def ambiguous(self) -> bool:
+        return any(c.ambiguous for c in self.classes)
+
+
+def discover_module(module: ast.Module, file_name: str = "") -> StaticDiscovery:
+    base_names: set[str] = set()
+    registries: set[str] = set()
+    mapped: set[str] = set()
+    local_columns: dict[str, list[DiscoveredColumn]] = {}
+    classes: list[DiscoveredClass] = []
+
+    for entry in module.body:
+        if isinstance(entry, ast.Assign) and isinstance(entry.value, ast.Call):
+            factory = _leaf_name(entry.value.func)
+            targets = {t.id for t in entry.targets if isinstance(t, ast.Name)}
+            if factory in DECLARATIVE_BASE_FACTORIES:
+                base_names |= targets
+            if factory == "registry":
+                registries |= targets
+            continue
+
+        if not isinstance(entry, ast.ClassDef):
+            continue
+
+        bases = [name for name in (_leaf_name(b) for b in entry.bases) if name]
+        if set(bases) & set(DECLARATIVE_BASE_CLASSES):
+            base_names.add(entry.name)
+            continue
+
+        own_columns, ambiguous = _class_columns(entry)
+        columns = [
+            column for base in bases for column in local_columns.get(base, [])
+        ] + own_columns
+        columns = [
+            DiscoveredColumn(c.key, c.type_name, c.nullable, position)
+            for position, c in enumerate(columns)
+        ]
+        local_columns[entry.name] = columns
+
+        has_table = (
+            _class_attribute(entry, "__tablename__") is not None
+            or _class_attribute(entry, "__table__") is not None
+        )
+        is_abstract = _constant(_class_attribute(entry, "__abstract__")) is True
+        decorated = any(
+            _is_mapping_decorator(d, registries) for d in entry.decorator_list
+        )
+        known_parent = bool(set(bases) & (base_names | mapped))
+        unknown_bases = [
+            b
+            for b in bases
+            if b not in base_names
+            and b not in local_columns
+            and b not in NON_MAPPED_BASES
+        ]
+
+        if is_abstract:
+            if known_parent:
+                base_names.add(entry.name)
+            continue
+
+        if known_parent or decorated:
+            # Any other unknown base is a mixin that may carry columns.
+            ambiguous = ambiguous or bool(unknown_bases)
+        elif has_table and columns:
+            # The base comes from somewhere else, but only a mapped class has a table.
+            ambiguous = ambiguous or len(unknown_bases) > 1
+        elif columns and unknown_bases:
+            ambiguous = True
+        else:
+            continue
+
+        if _class_attribute(entry, "__table__") is not None:
+            ambiguous = True
+        mapped.add(entry.name)
+        classes.append(DiscoveredClass(entry.name, columns, ambiguous))
+
+    return StaticDiscovery(file_name, classes)
+
+
+def discover_source(source: str | bytes, file_name: str = "") -> StaticDiscovery:
+    return discover_module(ast.parse(source, file_name or "<unknown>"), file_name)
+
+
+def discover_file(file_name: str) -> StaticDiscovery:
+    with open(file_name, "rb") as in_file:
+        return discover_source(in_file.read(), file_name)
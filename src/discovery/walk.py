@@ -0,0 +1,211 @@
+import os
+import re
+from dataclasses import dataclass, field
+
+from profiling import PROFILER
+
+"""Pruned walk over the project tree.
+
+Directories are matched against the ignore rules before they are entered, so
+virtualenvs, build outputs and vcs folders are never listed. Python files that
+survive the rules go through a byte level prefilter, so only files that mention
+sqlalchemy at all are handed over to discovery.
+"""
+
+DEFAULT_EXCLUDES = [
+    ".git/",
+    ".hg/",
+    ".svn/",
+    ".venv/",
+    "venv/",
+    ".tox/",
+    ".nox/",
+    "site-packages/",
+    "dist-packages/",
+    "node_modules/",
+    "__pycache__/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    ".ruff_cache/",
+    "build/",
+    "dist/",
+    "*.egg-info/",
+]
+
+PREFILTER_MARKERS = [b"sqlalchemy", b"declarative_base", b"DeclarativeBase", b"Mapped"]
+
+IGNORE_FILES = [".gitignore", ".csfeignore"]
+
+
+@dataclass
+class WalkReport:
+    pruned_directories: int = 0
+    ignored_files: int = 0
+    non_python_files: int = 0
+    prefilter_rejected: int = 0
+    unreadable_files: int = 0
+    candidates: int = 0
+
+
+@dataclass
+class IgnoreRule:
+    pattern: re.Pattern
+    negate: bool
+    directory_only: bool
+    base: str
+
+    def matches(self, relative_path: str, is_dir: bool) -> bool:
+        if self.directory_only and not is_dir:
+            return False
+        if self.base:
+            if not relative_path.startswith(self.base + "/"):
+                return False
+            relative_path = relative_path[len(self.base) + 1 :]
+        return self.pattern.fullmatch(relative_path) is not None
+
+
+def _translate(pattern: str) -> str:
+    """gitignore glob -> regex, where * and ? never cross a /"""
+    index, result = 0, ""
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith("**/", index):
+            result += "(?:.*/)?"
+            index += 3
+            continue
+        if pattern.startswith("**", index):
+            result += ".*"
+            index += 2
+            continue
+        if char == "*":
+            result += "[^/]*"
+        elif char == "?":
+            result += "[^/]"
+        elif char == "[":
+            closing = pattern.find("]", index + 1)
+            if closing == -1:
+                result += re.escape(char)
+            else:
+                group = pattern[index + 1 : closing]
+                if group.startswith("!"):
+                    group = "^" + group[1:]
+                result += f"[{group}]"
+                index = closing
+        elif char == "\\" and index + 1 < len(pattern):
+            index += 1
+            result += re.escape(pattern[index])
+        else:
+            result += re.escape(char)
+        index += 1
+    return result
+
+
+def parse_ignore_line(line: str, base: str = "") -> IgnoreRule | None:
+    line = line.rstrip("\n").rstrip()
+    if not line or line.startswith("#"):
+        return None
+
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    directory_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    anchored = "/" in line
+    line = line.lstrip("/")
+    regex = _translate(line)
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+
+    return IgnoreRule(re.compile(regex), negate, directory_only, base)
+
+
+@dataclass
+class IgnoreRules:
+    rules: list[IgnoreRule] = field(default_factory=list)
+
+    @staticmethod
+    def from_lines(lines: list[str], base: str = "") -> "IgnoreRules":
+        return IgnoreRules(
+            [rule for rule in (parse_ignore_line(line, base) for line in lines) if rule]
+        )
+
+    def extend_from_file(self, file_path: str, base: str = "") -> "IgnoreRules":
+        try:
+            with open(file_path) as in_file:
+                added = IgnoreRules.from_lines(in_file.readlines(), base).rules
+        except (OSError, UnicodeDecodeError):
+            return self
+        return IgnoreRules(self.rules + added)
+
+    def is_ignored(self, relative_path: str, is_dir: bool) -> bool:
+        ignored = False
+        for rule in self.rules:
+            if rule.matches(relative_path, is_dir):
+                ignored = not rule.negate
+        return ignored
+
+
+def passes_prefilter(file_path: str, markers: list[bytes] = PREFILTER_MARKERS) -> bool:
+    with open(file_path, "rb") as in_file:
+        content = in_file.read()
+    return any(marker in content for marker in markers)
+
+
+def walk_py_files(
+    root: str = ".",
+    excludes: list[str] | None = None,
+    prefilter: bool = True,
+    report: WalkReport | None = None,
+) -> list[str]:
+    """Every candidate python file under root, relative to root"""
+    report = report if report is not None else WalkReport()
+    base_rules = IgnoreRules.from_lines(DEFAULT_EXCLUDES + (excludes or []))
+    rules_by_dir: dict[str, IgnoreRules] = {}
+    found: list[str] = []
+
+    for dir_path, dir_names, file_names in os.walk(root):
+        relative_dir = os.path.relpath(dir_path, root).replace(os.sep, "/")
+        relative_dir = "" if relative_dir == "." else relative_dir
+        rules = base_rules if not relative_dir else rules_by_dir.pop(relative_dir)
+        for ignore_file in IGNORE_FILES:
+            if ignore_file in file_names:
+                rules = rules.extend_from_file(
+                    os.path.join(dir_path, ignore_file), relative_dir
+                )
+
+        def relative(name: str) -> str:
+            return f"{relative_dir}/{name}" if relative_dir else name
+
+        kept_dirs = []
+        for dir_name in sorted(dir_names):
+            if rules.is_ignored(relative(dir_name), True):
+                report.pruned_directories += 1
+                continue
+            kept_dirs.append(dir_name)
+            rules_by_dir[relative(dir_name)] = rules
+        dir_names[:] = kept_dirs
+
+        for file_name in sorted(file_names):
+            if not file_name.lower().endswith(".py"):
+                report.non_python_files += 1
+                continue
+            if rules.is_ignored(relative(file_name), False):
+                report.ignored_files += 1
+                continue
+            if prefilter:
+                try:
+                    with PROFILER.phase("prefilter", relative(file_name)):
+                        passes = passes_prefilter(os.path.join(dir_path, file_name))
+                    if not passes:
+                        report.prefilter_rejected += 1
+                        continue
+                except OSError:
+                    report.unreadable_files += 1
+                    continue
+            report.candidates += 1
+            found.append(relative(file_name))
+
+    return found
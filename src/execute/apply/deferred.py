@@ -0,0 +1,15 @@
+import ast
+
+from template.deferred.column import DeferredColumn
+from types_source import FileFields
+
+
+def apply_deferred(
+    key: FileFields, key_name: str, _class: ast.ClassDef, defer: bool, raiseload: bool
+) -> None:
+    column = DeferredColumn(key_name, key, _class, raiseload)
+    if not defer:
+        # The getters no longer load a column an earlier run deferred
+        column.purge()
+        return
+    column.build()
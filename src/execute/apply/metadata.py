@@ -0,0 +1,13 @@
+import ast
+
+from template.metadata.columns import ContentMetadataColumns
+from types_source import FileFields
+
+
+def apply_content_metadata(
+    key: FileFields, key_name: str, _class: ast.ClassDef
+) -> None:
+    if not key.get("content_metadata"):
+        return
+
+    ContentMetadataColumns(key_name, key, _class).build()
@@ -0,0 +1,156 @@
+import ast
+from typing import Iterator
+
+"""Module imports the generated class members rely on.
+
+Generated code like sqlalchemy.Column(...), hashlib.sha256() or
+anyio.to_thread.run_sync(...) reaches the modules through their dotted path,
+so the model module must bind them even when it only imports names from them.
+The missing imports are added once, next to the imports the module already has.
+A module whose name is bound to something else, like the class of
+from datetime import datetime, is imported under an alias that the generated
+references are rewritten to.
+"""
+
+# The attributes the templates reach through each module, a submodule is only
+# an attribute of its package once imported
+GENERATED_REFERENCES: dict[str, list[str]] = {
+    "sqlalchemy.ext.asyncio": ["async_object_session"],
+    "sqlalchemy.orm": ["deferred", "object_session"],
+    "sqlalchemy": ["BigInteger", "Column", "DateTime", "String", "inspect"],
+    "anyio.to_thread": ["run_sync"],
+    "datetime": ["datetime", "timezone"],
+    "email.utils": ["parsedate_to_datetime"],
+    "hashlib": ["sha256"],
+    "werkzeug.http": ["is_resource_modified"],
+}
+
+
+def _prefixes(path: str) -> list[str]:
+    parts = path.split(".")
+    return [".".join(parts[: i + 1]) for i in range(len(parts))]
+
+
+def _dotted(node: ast.expr) -> str | None:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        base = _dotted(node.value)
+        return f"{base}.{node.attr}" if base else None
+    return None
+
+
+def module_alias(path: str) -> str:
+    return path.replace(".", "_") + "_module"
+
+
+def _references(module: ast.Module) -> dict[str, list[ast.Attribute]]:
+    """The generated attribute accesses, by the module they go through"""
+    references: dict[str, list[ast.Attribute]] = {}
+    for node in ast.walk(module):
+        if not isinstance(node, ast.Attribute):
+            continue
+        path = _dotted(node.value)
+        if path in GENERATED_REFERENCES and node.attr in GENERATED_REFERENCES[path]:
+            references.setdefault(path, []).append(node)
+    return references
+
+
+def _module_level(module: ast.Module) -> Iterator[ast.AST]:
+    """The nodes run at import time, class and function bodies left out"""
+    pending: list[ast.AST] = list(module.body)
+    while pending:
+        node = pending.pop()
+        yield node
+        if not isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            pending.extend(ast.iter_child_nodes(node))
+
+
+def _imported(module: ast.Module) -> tuple[dict[str, str], set[str], set[str]]:
+    """The names bound to modules, every name bound, and the modules loaded"""
+    modules: dict[str, str] = {}
+    bound: set[str] = set()
+    loaded: set[str] = set()
+    for node in _module_level(module):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                loaded |= set(_prefixes(alias.name))
+                if alias.asname:
+                    modules[alias.asname] = alias.name
+                else:
+                    # import sqlalchemy.orm binds sqlalchemy
+                    root = alias.name.split(".")[0]
+                    modules[root] = root
+                bound.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            loaded |= set(_prefixes(node.module))
+            for alias in node.names:
+                # from sqlalchemy import orm may load the submodule
+                loaded.add(f"{node.module}.{alias.name}")
+                modules[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+                bound.add(alias.asname or alias.name)
+        elif isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.Name) and isinstance(
+            getattr(node, "ctx", None), ast.Store
+        ):
+            bound.add(node.id)
+    return modules, bound, loaded
+
+
+def resolve_imports(module: ast.Module) -> list[ast.Import]:
+    """The imports the generated references miss
+
+    References to a module whose name is bound to something else are rewritten
+    to its alias in place.
+    """
+    references = _references(module)
+    if not references:
+        return []
+    modules, bound, loaded = _imported(module)
+    imports: list[ast.Import] = []
+    missing: list[str] = []
+    for path in [p for p in GENERATED_REFERENCES if p in references]:
+        nodes = references[path]
+        root = path.split(".")[0]
+        if root in bound and modules.get(root) != root:
+            alias = module_alias(path)
+            for node in nodes:
+                node.value = ast.Name(alias, ast.Load())
+            if modules.get(alias) != path:
+                imports.append(ast.Import([ast.alias(path, alias)]))
+        elif path not in loaded or root not in bound:
+            missing.append(path)
+    # import sqlalchemy.orm covers import sqlalchemy
+    missing = [
+        path
+        for path in missing
+        if not any(other.startswith(path + ".") for other in missing)
+    ]
+    return [ast.Import([ast.alias(path)]) for path in missing] + imports
+
+
+def import_position(module: ast.Module) -> int:
+    """The body index after the imports heading the module"""
+    position = 0
+    for index, node in enumerate(module.body):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            position = index + 1
+        elif (
+            index == 0
+            and isinstance(node, ast.Expr)
+            and isinstance(node.value, ast.Constant)
+            and isinstance(node.value.value, str)
+        ):
+            # The module docstring
+            position = 1
+        elif isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            break
+    return position
+
+
+def import_line(module: ast.Module, position: int) -> int:
+    """The source line the imports are written after, 0 for the top"""
+    if position == 0:
+        return 0
+    return module.body[position - 1].end_lineno or 0
@@ -1,5 +1,8 @@
 import ast
+from execute.session import EditSession
 from logger import LOGGER
+from template.deferred.column import DeferredColumn
+from template.metadata.columns import ContentMetadataColumns
 
 from template.file_name.dynamic import DynamicFileName
 from template.file_name.static import StaticFileName
@@ -8,7 +11,6 @@ from template.mime.static import StaticMimeType
 from template.starlette.starlette import Starlette
 from template.werkzeug.werkzeug import Werkzeug
 from types_source import FileFields
-from ast_comments import parse, unparse
 
 
 def purge_mime(old_key_name: str, old_key: FileFields, _class: ast.ClassDef) -> None:
@@ -41,6 +43,15 @@ def purge_file(old_key_name: str, old_key: FileFields, _class: ast.ClassDef) ->
         return
 
 
+def purge_content_metadata(
+    old_key_name: str, old_key: FileFields, _class: ast.ClassDef
+) -> None:
+    if not old_key.get("content_metadata"):
+        return
+
+    ContentMetadataColumns(old_key_name, old_key, _class).purge()
+
+
 def purge_werkzeug(old_key_name: str, _class: ast.ClassDef) -> None:
     Werkzeug(old_key_name, {}, _class).purge()
 
@@ -49,29 +60,31 @@ def purge_starlette(old_key_name: str, _class: ast.ClassDef) -> None:
     Starlette(old_key_name, {}, _class).purge()
 
 
+def purge_deferred(
+    old_key_name: str, old_key: FileFields, _class: ast.ClassDef
+) -> None:
+    DeferredColumn(old_key_name, old_key, _class).purge()
+
+
 def purge(
-    old_key_name: str, old_key: FileFields, file_name: str, class_name: str
+    old_key_name: str,
+    old_key: FileFields,
+    file_name: str,
+    class_name: str,
+    session: EditSession | None = None,
 ) -> None:
-    with open(file_name) as in_file:
-        module: ast.Module = parse(in_file.read())  # type: ignore
-        _class = next(
-            (
-                entry
-                for entry in module.body
-                if isinstance(entry, ast.ClassDef) and entry.name == class_name
-            ),
-            None,
-        )
-        if not _class:
-            raise Exception("Class object is not found, can't execute apply")
+    if session is None:
+        with EditSession(file_name) as own_session:
+            purge(old_key_name, old_key, file_name, class_name, own_session)
+        return
 
+    _class = session.get_class(class_name)
     try:
         purge_mime(old_key_name, old_key, _class)
         purge_file(old_key_name, old_key, _class)
+        purge_content_metadata(old_key_name, old_key, _class)
         purge_werkzeug(old_key_name, _class)
         purge_starlette(old_key_name, _class)
-        textified = unparse(module)
-        with open(file_name, "w") as out_file:
-            out_file.write(textified)
+        purge_deferred(old_key_name, old_key, _class)
     except Exception as e:
         LOGGER.warning("Purging failed, %s", e)
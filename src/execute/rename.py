@@ -3,9 +3,11 @@ from execute.apply.file_name import apply_file_name
 from execute.apply.mime import apply_mime
 from execute.apply.starlette import apply_starlette
 from execute.apply.werkzeug import apply_werkzeug
-from logger import LOGGER
+from execute.session import EditSession
 
 from settings import SETTINGS
+from template.deferred.column import DeferredColumn
+from template.metadata.columns import ContentMetadataColumns
 from template.file_name.dynamic import DynamicFileName
 from template.file_name.static import StaticFileName
 from template.mime.dynamic import DynamicMimeType
@@ -16,8 +18,6 @@ from template.starlette.starlette import Starlette
 from template.werkzeug.werkzeug import Werkzeug
 from types_source import FileFields
 
-from ast_comments import unparse, parse
-
 
 def rename_mime_fields(
     old_key: FileFields,
@@ -161,6 +161,39 @@ def rename_starlette_properties(
     return
 
 
+def rename_content_metadata_columns(
+    old_key: FileFields,
+    old_key_name: str,
+    new_key_name: str,
+    new_key: FileFields,
+    _class: ast.ClassDef,
+) -> None:
+    if not old_key.get("content_metadata") and not new_key.get("content_metadata"):
+        return
+    if new_key.get("unhandled") and SETTINGS.purge_on_unhandled is False:
+        return
+    ContentMetadataColumns(old_key_name, old_key, _class).change(new_key_name, new_key)
+
+
+def rename_deferred_column(
+    old_key: FileFields,
+    old_key_name: str,
+    new_key_name: str,
+    new_key: FileFields,
+    _class: ast.ClassDef,
+) -> None:
+    column = DeferredColumn(new_key_name, new_key, _class, SETTINGS.binary_raiseload)
+    if not SETTINGS.defer_binary:
+        column.purge()
+        return
+    if new_key.get("unhandled"):
+        # No getter loads it any more
+        if SETTINGS.purge_on_unhandled:
+            column.purge()
+        return
+    column.build()
+
+
 def rename(
     old_key: FileFields,
     old_key_name: str,
@@ -168,29 +201,27 @@ def rename(
     new_key_name: str,
     target_file: str,
     class_name: str,
+    session: EditSession | None = None,
 ) -> None:
-    with open(target_file) as in_file:
-        module: ast.Module = parse(in_file.read())  # type:ignore
-        _class = next(
-            (
-                entry
-                for entry in module.body
-                if isinstance(entry, ast.ClassDef) and entry.name == class_name
-            ),
-            None,
-        )
-        if not _class:
-            raise Exception("Class object is not found, can't execute apply")
-        rename_mime_fields(old_key, old_key_name, new_key_name, new_key, _class)
-        rename_file_name_fields(old_key, old_key_name, new_key_name, new_key, _class)
-        rename_werkzeug_properties(old_key, old_key_name, new_key_name, new_key, _class)
-        rename_starlette_properties(
-            old_key, old_key_name, new_key_name, new_key, _class
-        )
-
-    try:
-        textified = unparse(module)
-        with open(target_file, "w") as out_file:
-            out_file.write(textified)
-    except Exception as e:
-        LOGGER.warning("Renaming failed, %s", e)
+    if session is None:
+        with EditSession(target_file) as own_session:
+            rename(
+                old_key,
+                old_key_name,
+                new_key,
+                new_key_name,
+                target_file,
+                class_name,
+                own_session,
+            )
+        return
+
+    _class = session.get_class(class_name)
+    rename_mime_fields(old_key, old_key_name, new_key_name, new_key, _class)
+    rename_file_name_fields(old_key, old_key_name, new_key_name, new_key, _class)
+    rename_content_metadata_columns(
+        old_key, old_key_name, new_key_name, new_key, _class
+    )
+    rename_werkzeug_properties(old_key, old_key_name, new_key_name, new_key, _class)
+    rename_starlette_properties(old_key, old_key_name, new_key_name, new_key, _class)
+    rename_deferred_column(old_key, old_key_name, new_key_name, new_key, _class)
@@ -0,0 +1,139 @@
+import ast
+from types import TracebackType
+
+from ast_comments import parse, unparse
+
+from execute.imports import import_line, import_position, resolve_imports
+from execute.splice import (
+    ClassSnapshot,
+    SpliceFallback,
+    snapshot_class,
+    splice_module,
+    split_lines,
+)
+from logger import LOGGER
+from module_registry import MODULE_REGISTRY
+from profiling import PROFILER
+from settings import SETTINGS
+from utils.ast_tools import body_index
+
+"""Parse once, edit many, write once.
+
+Every pending change of a file is applied to the same tree, the file is
+unparsed and written back a single time when the session is committed. In the
+splice write mode only the edited class members are regenerated, the rest of
+the file keeps its original text.
+"""
+
+
+class EditSession:
+    def __init__(self, file_name: str) -> None:
+        self.file_name = file_name
+        self.dirty = False
+        self.parses = 0
+        self.writes = 0
+        self.splice = SETTINGS.write_mode == "splice"
+        self._module: ast.Module | None = None
+        self._lines: list[str] = []
+        self._top_level: list[int] = []
+        self._snapshots: dict[str, ClassSnapshot] = {}
+
+    @property
+    def module(self) -> ast.Module:
+        """Parsed on first use, actions without code changes never read the file"""
+        if self._module is None:
+            with PROFILER.phase("parse", self.file_name):
+                with open(self.file_name, newline="") as in_file:
+                    source = in_file.read()
+                self._module = parse(source)  # type: ignore
+            self.parses += 1
+            if self.splice:
+                self._prepare_splice(source, self._module)
+        return self._module
+
+    def _prepare_splice(self, source: str, module: ast.Module) -> None:
+        try:
+            self._lines = split_lines(source)
+        except SpliceFallback as e:
+            LOGGER.debug("Splicing disabled for %s: %s", self.file_name, e)
+            self.splice = False
+            return
+        self._top_level = [id(node) for node in module.body]
+
+    def get_class(self, class_name: str) -> ast.ClassDef:
+        """Hands out the class node and marks the tree as edited"""
+        _class = next(
+            (
+                entry
+                for entry in self.module.body
+                if isinstance(entry, ast.ClassDef) and entry.name == class_name
+            ),
+            None,
+        )
+        if not _class:
+            raise Exception("Class object is not found, can't execute apply")
+        # Indexed before any caller can hold on to the plain body list
+        body_index(_class)
+        if self.splice and class_name not in self._snapshots:
+            try:
+                self._snapshots[class_name] = snapshot_class(_class, self._lines)
+            except SpliceFallback as e:
+                LOGGER.debug("Splicing disabled for %s: %s", self.file_name, e)
+                self.splice = False
+        self.dirty = True
+        return _class
+
+    def render(self) -> str:
+        module = self._module
+        if module is None:
+            raise Exception("Nothing has been parsed, nothing to render")
+        imports = resolve_imports(module)
+        position = import_position(module)
+        if self.splice:
+            try:
+                return splice_module(
+                    self._lines,
+                    module,
+                    self._top_level,
+                    list(self._snapshots.values()),
+                    imports,
+                    import_line(module, position),
+                )
+            except SpliceFallback as e:
+                LOGGER.debug("Splicing failed for %s: %s", self.file_name, e)
+        module.body[position:position] = imports
+        return unparse(ast.fix_missing_locations(module))
+
+    def commit(self) -> None:
+        """Writes the edited tree, a failed write is raised to the caller
+
+        The history of the actions must not be recorded for a file that was
+        not written.
+        """
+        if not self.dirty or self._module is None:
+            return
+        try:
+            with PROFILER.phase("unparse", self.file_name):
+                textified = self.render()
+            with PROFILER.phase("write", self.file_name):
+                with open(self.file_name, "w", newline="") as out_file:
+                    out_file.write(textified)
+        except Exception as e:
+            LOGGER.warning("Writing %s failed, %s", self.file_name, e)
+            raise
+        MODULE_REGISTRY.invalidate(self.file_name)
+        self.writes += 1
+        self.dirty = False
+
+    def __enter__(self) -> "EditSession":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        # A failed batch leaves the file as it was
+        if exc_type is None:
+            self.commit()
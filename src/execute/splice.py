@@ -0,0 +1,239 @@
+import ast
+import re
+from dataclasses import dataclass, field
+
+from ast_comments import unparse
+
+"""Format preserving writer.
+
+The classes handed out by an edit session are snapshotted before any template
+touches them. On write, members that are still the same node with the same
+dump are kept as the original text, changed members are unparsed on their own
+and spliced in their place, new members are rendered next to the member that
+precedes them in the edited body. Everything outside the edited class bodies
+is written back byte for byte.
+"""
+
+
+class SpliceFallback(Exception):
+    """The edit can't be spliced, the module has to be unparsed"""
+
+
+@dataclass
+class MemberUnit:
+    """Class members sharing source lines, kept or regenerated together"""
+
+    nodes: list[ast.stmt]
+    dumps: list[str]
+    start: int
+    end: int
+
+
+@dataclass
+class ClassSnapshot:
+    _class: ast.ClassDef
+    header: str
+    indent: str
+    units: list[MemberUnit] = field(default_factory=list)
+
+
+def split_lines(source: str) -> list[str]:
+    """Lines with their endings, split the way the tokenizer counts them"""
+    if re.search(r"\r(?!\n)", source):
+        raise SpliceFallback("Lone carriage return in the source")
+    # str.splitlines would also split on form feeds and unicode separators
+    return re.findall(r"[^\n]*\n|[^\n]+$", source)
+
+
+def newline_of(lines: list[str]) -> str:
+    for line in lines:
+        if line.endswith("\r\n"):
+            return "\r\n"
+        if line.endswith("\n"):
+            return "\n"
+    return "\n"
+
+
+def class_header(_class: ast.ClassDef) -> str:
+    parts = [_class.name]
+    for node in [*_class.bases, *_class.keywords, *_class.decorator_list]:
+        parts.append(ast.dump(node))
+    for node in getattr(_class, "type_params", []):
+        parts.append(ast.dump(node))
+    return "|".join(parts)
+
+
+def _first_column(node: ast.stmt) -> tuple[int, int]:
+    decorators: list[ast.expr] = getattr(node, "decorator_list", [])
+    if decorators:
+        first = min(decorators, key=lambda d: (d.lineno, d.col_offset))
+        # The @ sits right before the decorator expression
+        return first.lineno, first.col_offset - 1
+    return node.lineno, node.col_offset
+
+
+def snapshot_class(_class: ast.ClassDef, lines: list[str]) -> ClassSnapshot:
+    if not _class.body:
+        raise SpliceFallback("Empty class body")
+    indent: str | None = None
+    snapshot = ClassSnapshot(_class, class_header(_class), "")
+
+    for node in _class.body:
+        start, column = _first_column(node)
+        end = node.end_lineno
+        if end is None or node.end_col_offset is None:
+            raise SpliceFallback("Member without location")
+        if start <= _class.lineno:
+            raise SpliceFallback("Member on the class header line")
+
+        unit = snapshot.units[-1] if snapshot.units else None
+        if unit and start <= unit.end:
+            unit.nodes.append(node)
+            unit.dumps.append(ast.dump(node))
+            unit.end = max(unit.end, end)
+        else:
+            prefix = lines[start - 1].encode()[:column]
+            if prefix.strip():
+                raise SpliceFallback("Member does not start its line")
+            if indent is None:
+                indent = prefix.decode()
+            snapshot.units.append(MemberUnit([node], [ast.dump(node)], start, end))
+
+    for unit in snapshot.units:
+        last = max(unit.nodes, key=lambda n: (n.end_lineno, n.end_col_offset))
+        rest = lines[unit.end - 1].encode()[last.end_col_offset :].strip()  # type: ignore
+        if rest and not rest.startswith(b"#"):
+            raise SpliceFallback("Member does not end its line")
+
+    snapshot.indent = indent or ""
+    return snapshot
+
+
+def render_members(nodes: list[ast.stmt], indent: str, newline: str) -> list[str]:
+    holder = ast.ClassDef(
+        name="_", bases=[], keywords=[], body=list(nodes), decorator_list=[]
+    )
+    holder.type_params = []  # type: ignore
+    text = unparse(ast.fix_missing_locations(holder))
+    rendered: list[str] = []
+    for line in text.split("\n")[1:]:
+        if line.startswith("    "):
+            line = indent + line[4:]
+        rendered.append(line + newline)
+    while rendered and not rendered[0].strip():
+        rendered.pop(0)
+    return rendered
+
+
+def _is_block(node: ast.stmt) -> bool:
+    return isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+
+
+def splice_class(
+    snapshot: ClassSnapshot, lines: list[str], newline: str
+) -> tuple[int, int, list[str]]:
+    """The replacement for the member lines of the class, as start, end, lines"""
+    _class = snapshot._class
+    if class_header(_class) != snapshot.header:
+        raise SpliceFallback("Class header changed")
+    body = list(_class.body)
+    if not body:
+        raise SpliceFallback("Class body emptied")
+
+    unit_of: dict[int, int] = {}
+    for index, unit in enumerate(snapshot.units):
+        for node in unit.nodes:
+            unit_of[id(node)] = index
+
+    segments: list[tuple[list[str], ast.stmt, ast.stmt]] = []
+    kept_units: list[int] = []
+    position = 0
+    while position < len(body):
+        index = unit_of.get(id(body[position]), -1)
+        run: list[ast.stmt] = []
+        while position < len(body) and unit_of.get(id(body[position]), -1) == index:
+            run.append(body[position])
+            position += 1
+
+        if index == -1:
+            rendered = render_members(run, snapshot.indent, newline)
+            segments.append((rendered, run[0], run[-1]))
+            continue
+
+        # Original members keep their order and their unit stays together
+        if kept_units and index <= kept_units[-1]:
+            raise SpliceFallback("Members reordered")
+        kept_units.append(index)
+        unit = snapshot.units[index]
+        unchanged = run == unit.nodes and all(
+            ast.dump(node) == dump for node, dump in zip(run, unit.dumps)
+        )
+        if unchanged:
+            text = lines[unit.start - 1 : unit.end]
+        else:
+            text = render_members(run, snapshot.indent, newline)
+        segments.append((text + _gap_after(snapshot, index, lines), run[0], run[-1]))
+
+    first = snapshot.units[0].start
+    end = snapshot.units[-1].end
+    result: list[str] = []
+    previous: ast.stmt | None = None
+    for text, head, tail in segments:
+        if (
+            previous is not None
+            and result
+            and result[-1].strip()
+            and (_is_block(previous) or _is_block(head))
+        ):
+            result.append(newline)
+        result += text
+        previous = tail
+    while result and not result[-1].strip():
+        result.pop()
+    return first, end, result
+
+
+def _gap_after(snapshot: ClassSnapshot, index: int, lines: list[str]) -> list[str]:
+    """Blank lines and stray text between the unit and the next one"""
+    if index + 1 >= len(snapshot.units):
+        return []
+    return lines[snapshot.units[index].end : snapshot.units[index + 1].start - 1]
+
+
+def splice_module(
+    source_lines: list[str],
+    module: ast.Module,
+    top_level: list[int],
+    snapshots: list[ClassSnapshot],
+    imports: list[ast.Import] | None = None,
+    after_line: int = 0,
+) -> str:
+    """The original source with the edited class bodies spliced in
+
+    Only the classes handed out through the session may have been edited, the
+    rest of the module is checked by node identity alone. Missing imports are
+    written after the given line, above every class.
+    """
+    if [id(node) for node in module.body] != top_level:
+        raise SpliceFallback("Module body changed")
+
+    lines = list(source_lines)
+    newline = newline_of(lines)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += newline
+        had_newline = False
+    else:
+        had_newline = True
+
+    replacements = [splice_class(snapshot, lines, newline) for snapshot in snapshots]
+    for start, end, replaced in sorted(replacements, reverse=True):
+        lines[start - 1 : end] = replaced
+    if imports:
+        lines[after_line:after_line] = [
+            ast.unparse(statement) + newline for statement in imports
+        ]
+
+    text = "".join(lines)
+    if not had_newline and text.endswith(newline):
+        text = text[: -len(newline)]
+    return text
@@ -1,13 +1,32 @@
 from typing import TypeAlias
-from yaml import Loader, dump, load
 from execute.apply_history import apply_history
 from execute.purge import purge
 from execute.rename import rename
+from execute.session import EditSession
+from history import HistoryStore, open_history
 from logger import LOGGER
+from profiling import PROFILER
 from types_source import FileFields
 
 
-class RenameAction(Exception):
+class Action(Exception):
+    """Actions are raised and caught like errors, and pickled by their attributes
+
+    The Exception default pickles the constructor arguments only, the actions
+    keep theirs as attributes so they can be handed to worker processes.
+    """
+
+    def __reduce__(self) -> tuple:
+        return _restore_action, (type(self), self.__dict__)
+
+
+def _restore_action(cls: type[Action], state: dict) -> Action:
+    action = cls.__new__(cls)
+    action.__dict__.update(state)
+    return action
+
+
+class RenameAction(Action):
     old_key_name: str
     old_key: FileFields
     new_key_name: str
@@ -37,7 +56,7 @@ class RenameAction(Exception):
         super().__init__(*args)
 
 
-class NewKeyAction(Exception):
+class NewKeyAction(Action):
     new_key_name: str
     new_key: FileFields
     file_name: str
@@ -61,7 +80,7 @@ class NewKeyAction(Exception):
         super().__init__(*args)
 
 
-class ApplyHistoryAction(Exception):
+class ApplyHistoryAction(Action):
     file_name: str
     class_name: str
     history: dict[str, FileFields]
@@ -80,7 +99,7 @@ class ApplyHistoryAction(Exception):
         super().__init__(*args)
 
 
-class RemoveHistoryKeyAsIsAction(Exception):
+class RemoveHistoryKeyAsIsAction(Action):
     file_name: str
     class_name: str
     history_path: str
@@ -101,7 +120,7 @@ class RemoveHistoryKeyAsIsAction(Exception):
         super().__init__(*args)
 
 
-class RemoveHistoryCleanAction(Exception):
+class RemoveHistoryCleanAction(Action):
     file_name: str
     class_name: str
     history_path: str
@@ -125,7 +144,7 @@ class RemoveHistoryCleanAction(Exception):
         super().__init__(*args)
 
 
-class ReAddHistoryAction(Exception):
+class ReAddHistoryAction(Action):
     file_name: str
     class_name: str
     old_key_name: str
@@ -167,25 +186,58 @@ ACTION_TYPE_ERRORS = (
 
 
 class Executor:
+    """Applies actions in two steps, code first and history second
+
+    The code of every action of a plan goes through one EditSession per file,
+    the history is only touched once all the files have been written.
+    """
+
+    @staticmethod
+    def handle_plan(actions: list[ActionType], history_path: str) -> None:
+        sessions: dict[str, EditSession] = {}
+        for action in actions:
+            if action.file_name not in sessions:
+                sessions[action.file_name] = EditSession(action.file_name)
+            Executor.apply_code(action, sessions[action.file_name])
+        for session in sessions.values():
+            session.commit()
+
+        with open_history(history_path).transaction() as history:
+            for action in actions:
+                Executor.record_history(action, history)
+
     @staticmethod
-    def handle_action(error: ActionType) -> None:
+    def handle_action(error: ActionType, session: EditSession | None = None) -> None:
+        if session is None:
+            with EditSession(error.file_name) as own_session:
+                Executor.apply_code(error, own_session)
+        else:
+            Executor.apply_code(error, session)
+        if not isinstance(error, ApplyHistoryAction):
+            Executor.record_history(error, open_history(error.history_path))
+
+    @staticmethod
+    def apply_code(error: ActionType, session: EditSession) -> None:
+        with PROFILER.phase("transform", error.file_name, error.class_name):
+            Executor.transform(error, session)
+
+    @staticmethod
+    def transform(error: ActionType, session: EditSession) -> None:
         if isinstance(error, ApplyHistoryAction):
             try:
                 for key in error.history:
                     apply_history(
-                        error.history[key], key, error.file_name, error.class_name
+                        error.history[key],
+                        key,
+                        error.file_name,
+                        error.class_name,
+                        session,
                     )
                 return
             except Exception as e:
                 LOGGER.exception("Applying history failed, stopping,%s" % e)
                 raise e
-
-        with open(error.history_path) as history_in:
-            history = load(history_in, Loader)
-            if error.class_name not in history:
-                print(history)
-                history[error.class_name] = {}
-        if isinstance(error, RenameAction):
+        elif isinstance(error, RenameAction):
             try:
                 rename(
                     error.old_key,
@@ -194,11 +246,8 @@ class Executor:
                     error.new_key_name,
                     error.file_name,
                     error.class_name,
+                    session,
                 )
-                with open(error.history_path, "w") as history_out:
-                    history[error.class_name].pop(error.old_key_name)
-                    history[error.class_name][error.new_key_name] = error.new_key
-                    dump(history, history_out)
                 return
             except Exception as e:
                 LOGGER.exception("Renaming Failed, stopping,%s" % e)
@@ -206,34 +255,27 @@ class Executor:
         elif isinstance(error, NewKeyAction):
             try:
                 apply_history(
-                    error.new_key, error.new_key_name, error.file_name, error.class_name
+                    error.new_key,
+                    error.new_key_name,
+                    error.file_name,
+                    error.class_name,
+                    session,
                 )
-                with open(error.history_path, "w") as history_out:
-                    history[error.class_name][error.new_key_name] = error.new_key
-                    dump(history, history_out)
                 return
             except Exception as e:
                 LOGGER.exception("Adding new key Failed, stopping,%s" % e)
                 raise e
         elif isinstance(error, RemoveHistoryKeyAsIsAction):
-            try:
-                with open(error.history_path, "w") as history_out:
-                    history[error.class_name].pop(error.old_key_name)
-                    dump(history, history_out)
-                return
-            except Exception as e:
-                LOGGER.exception(
-                    "Removing old key from history Failed, stopping,%s" % e
-                )
-                raise e
+            return
         elif isinstance(error, RemoveHistoryCleanAction):
             try:
                 purge(
-                    error.old_key_name, error.old_key, error.file_name, error.class_name
+                    error.old_key_name,
+                    error.old_key,
+                    error.file_name,
+                    error.class_name,
+                    session,
                 )
-                with open(error.history_path, "w") as history_out:
-                    history.pop(error.old_key)
-                    dump(history, history_out)
                 return
             except Exception as e:
                 LOGGER.exception("Purging old key from history Failed, stopping,%s" % e)
@@ -241,11 +283,12 @@ class Executor:
         elif isinstance(error, ReAddHistoryAction):
             try:
                 apply_history(
-                    error.old_key, error.old_key_name, error.file_name, error.class_name
+                    error.old_key,
+                    error.old_key_name,
+                    error.file_name,
+                    error.class_name,
+                    session,
                 )
-                with open(error.history_path, "w") as history_out:
-                    history[error.class_name][error.old_key_name] = error.old_key
-                    dump(history, history_out)
                 return
             except Exception as e:
                 LOGGER.exception(
@@ -254,3 +297,27 @@ class Executor:
                 raise e
 
         raise Exception("Unknown command,%s" % error)
+
+    @staticmethod
+    def record_history(error: ActionType, history: HistoryStore) -> None:
+        if isinstance(error, ApplyHistoryAction):
+            return
+        elif isinstance(error, RenameAction):
+            history.rename_key(
+                error.class_name,
+                error.old_key_name,
+                error.new_key_name,
+                error.new_key,
+            )
+            return
+        elif isinstance(error, NewKeyAction):
+            history.set_key(error.class_name, error.new_key_name, error.new_key)
+            return
+        elif isinstance(error, (RemoveHistoryKeyAsIsAction, RemoveHistoryCleanAction)):
+            history.pop_key(error.class_name, error.old_key_name)
+            return
+        elif isinstance(error, ReAddHistoryAction):
+            history.set_key(error.class_name, error.old_key_name, error.old_key)
+            return
+
+        raise Exception("Unknown command,%s" % error)
@@ -0,0 +1,91 @@
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+from yaml import Loader, dump, load
+
+from profiling import PROFILER
+from types_source import FileFields
+
+"""In memory view of csfe.yaml.
+
+The file is parsed once per store. Outside a transaction every mutation is
+written back immediately, inside one the writes are held back until the
+transaction ends or checkpoint is called.
+"""
+
+
+class HistoryStore:
+    data: dict[str, dict[str, FileFields]]
+
+    def __init__(self, history_path: str) -> None:
+        self.history_path = history_path
+        self.dirty = False
+        self.depth = 0
+        self.flushes = 0
+        self.load()
+
+    def load(self) -> None:
+        with PROFILER.phase("history"), open(self.history_path) as in_file:
+            self.data = load(in_file, Loader) or {}
+        self.dirty = False
+
+    def get_class(self, class_name: str) -> dict[str, FileFields]:
+        return dict(self.data.get(class_name, {}))
+
+    def set_key(self, class_name: str, key_name: str, key: FileFields) -> None:
+        self.data.setdefault(class_name, {})[key_name] = key
+        self._changed()
+
+    def pop_key(self, class_name: str, key_name: str) -> None:
+        self.data.setdefault(class_name, {}).pop(key_name)
+        self._changed()
+
+    def rename_key(
+        self, class_name: str, old_key_name: str, new_key_name: str, new_key: FileFields
+    ) -> None:
+        history = self.data.setdefault(class_name, {})
+        history.pop(old_key_name)
+        history[new_key_name] = new_key
+        self._changed()
+
+    def _changed(self) -> None:
+        self.dirty = True
+        if not self.depth:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.dirty:
+            return
+        with open(self.history_path, "w") as history_out:
+            dump(self.data, history_out)
+        self.dirty = False
+        self.flushes += 1
+
+    def checkpoint(self) -> None:
+        self.flush()
+
+    @contextmanager
+    def transaction(self) -> Iterator["HistoryStore"]:
+        key = os.path.realpath(self.history_path)
+        if self.depth == 0:
+            _ACTIVE_STORES[key] = self
+        self.depth += 1
+        try:
+            yield self
+        finally:
+            self.depth -= 1
+            if self.depth == 0:
+                _ACTIVE_STORES.pop(key, None)
+                self.flush()
+
+
+_ACTIVE_STORES: dict[str, HistoryStore] = {}
+
+
+def open_history(history_path: str) -> HistoryStore:
+    """The store of the running transaction, or a freshly loaded one"""
+    active = _ACTIVE_STORES.get(os.path.realpath(history_path))
+    if active:
+        return active
+    return HistoryStore(history_path)
@@ -0,0 +1,140 @@
+import atexit
+import multiprocessing
+import os
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+
+from discovery.registry import mapped_classes
+from discovery.static import DiscoveredClass
+from logger import LOGGER
+from module_registry import MODULE_REGISTRY
+from profiling import PROFILER
+from settings import SETTINGS
+from type_classifier import class_columns
+
+"""Imports the project modules away from the tool's process.
+
+With import isolation on, the modules are executed in a worker process forked
+from a forkserver that has SQLAlchemy imported already. Only the column
+descriptions of the mapped classes come back. A module that hangs is killed
+after the timeout, and the worker is replaced after a number of modules so the
+executed modules, their connections and threads don't pile up.
+"""
+
+PRELOAD = ["sqlalchemy", "sqlalchemy.orm", "import_pool"]
+
+
+def inspect_mapped(class_name: str, class_object: type) -> DiscoveredClass:
+    """The columns of an imported class, classified like Runtime.find_keys does"""
+    return DiscoveredClass(
+        class_name,
+        list(class_columns(class_object, SETTINGS.detect_renames).columns.values()),
+    )
+
+
+def inspect_in_process(
+    file_name: str, class_names: list[str] | None = None
+) -> list[DiscoveredClass] | None:
+    module = MODULE_REGISTRY.load(file_name)
+    if not module:
+        LOGGER.warning("Skipping file, module is not loadable %s", file_name)
+        return None
+
+    classes: list[DiscoveredClass] = []
+    for attribute_name, attribute in mapped_classes(module, class_names).items():
+        with PROFILER.phase("inspect", file_name, attribute_name):
+            classes.append(inspect_mapped(attribute_name, attribute))
+    return classes
+
+
+def _serve(connection: Connection) -> None:
+    """The worker loop, a None request ends it"""
+    while True:
+        request = connection.recv()
+        if request is None:
+            return
+        file_name, class_names = request
+        try:
+            connection.send(inspect_in_process(file_name, class_names))
+        except Exception as e:
+            LOGGER.warning("Importing %s failed: %s", file_name, e)
+            connection.send(None)
+
+
+class ImportWorker:
+    def __init__(self, timeout: float, recycle_after: int) -> None:
+        self.timeout = timeout
+        self.recycle_after = recycle_after
+        self.process: BaseProcess | None = None
+        self.connection: Connection | None = None
+        self.served = 0
+        self.started = 0
+
+    def start(self) -> None:
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(PRELOAD)
+        parent_end, child_end = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_end,), daemon=True)
+        self.process.start()
+        child_end.close()
+        self.connection = parent_end
+        self.served = 0
+        self.started += 1
+
+    def stop(self, kill: bool = False) -> None:
+        if self.process is None or self.connection is None:
+            return
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.connection.send(None)
+            except OSError:
+                pass
+        self.process.join(self.timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+        self.process = None
+        self.connection = None
+
+    def inspect(
+        self, file_name: str, class_names: list[str] | None = None
+    ) -> list[DiscoveredClass] | None:
+        """The mapped classes of the file, None if it couldn't be imported in time"""
+        if self.process is None or self.served >= self.recycle_after:
+            self.stop()
+            self.start()
+        assert self.connection is not None
+        self.served += 1
+        try:
+            # The forkserver keeps the working directory it was started in
+            self.connection.send((os.path.abspath(file_name), class_names))
+            if not self.connection.poll(self.timeout):
+                LOGGER.warning(
+                    "Importing %s timed out after %ss, skipping",
+                    file_name,
+                    self.timeout,
+                )
+                self.stop(kill=True)
+                return None
+            return self.connection.recv()
+        except (EOFError, OSError) as e:
+            LOGGER.warning("Import worker died on %s: %s", file_name, e)
+            self.stop(kill=True)
+            return None
+
+
+IMPORT_WORKER = ImportWorker(SETTINGS.import_timeout, SETTINGS.import_recycle)
+
+atexit.register(IMPORT_WORKER.stop)
+
+
+def inspect_imported(
+    file_name: str, class_names: list[str] | None = None
+) -> list[DiscoveredClass] | None:
+    if SETTINGS.import_isolation:
+        with PROFILER.phase("import", file_name):
+            return IMPORT_WORKER.inspect(file_name, class_names)
+    return inspect_in_process(file_name, class_names)
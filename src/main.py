@@ -1,20 +1,39 @@
-import importlib.util
+import argparse
 import os
+import sys
 from pathlib import Path
-from sqlalchemy import inspect
-from sqlalchemy.orm import class_mapper
-from executor import (
-    ACTION_TYPE_ERRORS,
-    ApplyHistoryAction,
-    Executor,
-)
+from types import ModuleType
+from cache import RunCache, clear_cache
+from decisions import DecisionError, open_decisions
+from discovery.registry import mapped_classes
+from discovery.static import discover_file
+from discovery.walk import WalkReport, walk_py_files
+from executor import Executor
+from history import open_history
+from import_pool import inspect_imported
 from logger import LOGGER
-from runtime import AbortException, NoActionRequired, Runtime
+from module_registry import MODULE_REGISTRY
+from parallel import run_parallel
+from planner import ActionPlan, plan_classes
+from profiling import PROFILER
 from settings import SETTINGS
 
 
 def find_py_files() -> list[str]:
-    return [str(p.relative_to(os.getcwd())) for p in Path(".").rglob("*.[pP][yY]")]
+    report = WalkReport()
+    with PROFILER.phase("walk"):
+        paths = walk_py_files(".", SETTINGS.exclude, SETTINGS.prefilter, report)
+    LOGGER.info(
+        "File walk: %s directories pruned, %s files ignored, %s non python files,"
+        " %s rejected by prefilter, %s unreadable, %s candidates",
+        report.pruned_directories,
+        report.ignored_files,
+        report.non_python_files,
+        report.prefilter_rejected,
+        report.unreadable_files,
+        report.candidates,
+    )
+    return paths
 
 
 def get_history_path() -> str:
@@ -35,45 +54,172 @@ def assert_file_exist(file_name: str):
         return
 
 
+def load_module(file: str) -> ModuleType | None:
+    module = MODULE_REGISTRY.load(file)
+    if not module:
+        LOGGER.warning("Skipping file, module is not loadable %s", file)
+    return module
+
+
+def execute_plans(plans: list[ActionPlan], history_path: str) -> bool:
+    """Every class of the file is written in a single edit session"""
+    try:
+        Executor.handle_plan([a for plan in plans for a in plan.actions], history_path)
+    except Exception as e:
+        LOGGER.warning("Executing the plans failed: %s", str(e))
+        return False
+    return True
+
+
+def process_file_isolated(
+    file: str, history_path: str, class_names: list[str] | None = None
+) -> list[str] | None:
+    """The module is imported by the import worker, planned from its columns"""
+    classes = inspect_imported(file, class_names)
+    if classes is None:
+        return None
+
+    plans, failed = plan_classes(
+        file, history_path, [(c.class_name, c) for c in classes]
+    )
+    if not execute_plans(plans, history_path):
+        return None
+    return None if failed else [plan.class_name for plan in plans]
+
+
+def process_file_imported(
+    file: str, history_path: str, class_names: list[str] | None = None
+) -> list[str] | None:
+    """Returns the handled class names, or None if any of them failed"""
+    if SETTINGS.import_isolation:
+        return process_file_isolated(file, history_path, class_names)
+    module = load_module(file)
+    if not module:
+        return None
+
+    plans, failed = plan_classes(
+        file,
+        history_path,
+        [(name, None) for name in mapped_classes(module, class_names)],
+    )
+    if not execute_plans(plans, history_path):
+        return None
+    return None if failed else [plan.class_name for plan in plans]
+
+
+def process_file_static(file: str, history_path: str) -> list[str] | None:
+    """Returns the handled class names, or None if any of them failed"""
+    try:
+        discovery = discover_file(file)
+    except (SyntaxError, ValueError) as e:
+        LOGGER.warning("Static discovery failed for %s, importing: %s", file, e)
+        return process_file_imported(file, history_path)
+
+    ambiguous = [c.class_name for c in discovery.classes if c.ambiguous]
+    plans, failed = plan_classes(
+        file,
+        history_path,
+        [(c.class_name, c) for c in discovery.classes if not c.ambiguous],
+    )
+    if not execute_plans(plans, history_path):
+        return None
+    processed = [plan.class_name for plan in plans]
+
+    if ambiguous:
+        LOGGER.info("Static discovery is ambiguous for %s, importing", file)
+        imported = process_file_imported(file, history_path, ambiguous)
+        if imported is None:
+            return None
+        processed += imported
+    return None if failed else processed
+
+
+def process_file(file: str, history_path: str) -> list[str] | None:
+    if SETTINGS.discovery == "static":
+        return process_file_static(file, history_path)
+    return process_file_imported(file, history_path)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generates file properties for the SQLAlchemy classes of the project."
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
+        help="Remove the incremental cache and exit.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Process every file, without reading or writing the incremental cache.",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Write a cProfile dump to PATH and the phase timings next to it as .json.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Inspect and rewrite files in N worker processes, prompts stay in this one.",
+    )
+    return parser.parse_args()
+
+
+def run(history_path: str, use_cache: bool, jobs: int = 1) -> None:
+    if SETTINGS.decisions_path:
+        # A broken decisions file fails before any file is touched
+        open_decisions(SETTINGS.decisions_path)
+    cache = RunCache(SETTINGS.cache_path) if use_cache else None
+    skipped = 0
+    try:
+        with open_history(history_path).transaction() as history:
+            if jobs > 1:
+                skipped = run_parallel(
+                    find_py_files(), history_path, history, cache, jobs
+                )
+                return
+            for file in find_py_files():
+                if cache and cache.is_fresh(file, history.data):
+                    LOGGER.debug("Unchanged since the last run, skipping %s", file)
+                    skipped += 1
+                    continue
+                LOGGER.info("Working on path %s", file)
+                processed = process_file(file, history_path)
+                if not cache:
+                    continue
+                if processed is None:
+                    cache.forget(file)
+                else:
+                    cache.record(file, processed, history.data)
+    finally:
+        if cache:
+            cache.save()
+            LOGGER.info("Skipped %s unchanged files", skipped)
+
+
 if __name__ == "__main__":
-    history_path = get_history_path()
-    assert_file_exist(history_path)
-    paths = find_py_files()
-    for file in paths:
-        spec = importlib.util.spec_from_file_location(file, file)
-        if not spec or not spec.loader:
-            LOGGER.warning("Skipping file, module is not loadable %s", file)
-            continue
+    args = parse_args()
+    if args.clear_cache:
+        if clear_cache(SETTINGS.cache_path):
+            LOGGER.info("Cache removed: %s", SETTINGS.cache_path)
         else:
-            LOGGER.info("Working on path %s", file)
-
-        module = importlib.util.module_from_spec(spec)
-        LOGGER.debug("Path loaded: %s", file)
-        spec.loader.exec_module(module)
-        LOGGER.debug("Path executed: %s", file)
-
-        attributes = dir(module)
-        for attribute_name in attributes:
-            attribute = getattr(module, attribute_name)
-            try:
-                inspect(attribute)
-                class_mapper(attribute)
-                while True:
-                    try:
-                        Runtime(file, history_path, attribute_name)
-                    except NoActionRequired:
-                        break
-                    except ACTION_TYPE_ERRORS as action:
-                        Executor.handle_action(action)
-                    except AbortException:
-                        continue
-                    except ApplyHistoryAction as aha:
-                        Executor.handle_action(aha)
-                        break
-                    except Exception as e:
-                        raise e
-            except Exception as e:
-                LOGGER.debug(
-                    "Attribute rejected:%s, of error: %s", attribute_name, str(e)
-                )
-                continue
+            LOGGER.info("No cache found at %s", SETTINGS.cache_path)
+    else:
+        history_path = get_history_path()
+        assert_file_exist(history_path)
+        if args.profile:
+            PROFILER.start()
+        try:
+            run(history_path, SETTINGS.cache and not args.no_cache, args.jobs)
+        except DecisionError as e:
+            LOGGER.error("Stopped, %s", e)
+            sys.exit(1)
+        finally:
+            if args.profile:
+                PROFILER.stop()
+                report_path = PROFILER.write(args.profile)
+                LOGGER.info("Profile written to %s and %s", args.profile, report_path)
@@ -0,0 +1,70 @@
+import importlib.util
+import os
+from dataclasses import dataclass
+from types import ModuleType
+
+from logger import LOGGER
+from profiling import PROFILER
+
+"""Per run registry of the executed project modules.
+
+Every file is executed once, and the same module object (with its declarative
+registry and mappers) is handed to every caller until the tool rewrites the file.
+"""
+
+
+@dataclass
+class LoadedModule:
+    module: ModuleType
+    mtime_ns: int
+    size: int
+
+
+class ModuleRegistry:
+    def __init__(self) -> None:
+        self.modules: dict[str, LoadedModule] = {}
+        self.executions = 0
+
+    @staticmethod
+    def _key(file_name: str) -> str:
+        return os.path.realpath(file_name)
+
+    def load(self, file_name: str) -> ModuleType | None:
+        key = self._key(file_name)
+        stat = os.stat(key)
+        loaded = self.modules.get(key)
+        if (
+            loaded
+            and loaded.mtime_ns == stat.st_mtime_ns
+            and loaded.size == stat.st_size
+        ):
+            return loaded.module
+
+        spec = importlib.util.spec_from_file_location(file_name, file_name)
+        if not spec or not spec.loader:
+            return None
+
+        module = importlib.util.module_from_spec(spec)
+        LOGGER.debug("Path loaded: %s", file_name)
+        with PROFILER.phase("import", file_name):
+            spec.loader.exec_module(module)
+        LOGGER.debug("Path executed: %s", file_name)
+        self.executions += 1
+        self.modules[key] = LoadedModule(module, stat.st_mtime_ns, stat.st_size)
+        return module
+
+    def get_class(self, file_name: str, class_name: str) -> type | None:
+        module = self.load(file_name)
+        if not module:
+            return None
+        return getattr(module, class_name)
+
+    def invalidate(self, file_name: str) -> None:
+        """Must be called after the file has been rewritten"""
+        self.modules.pop(self._key(file_name), None)
+
+    def clear(self) -> None:
+        self.modules.clear()
+
+
+MODULE_REGISTRY = ModuleRegistry()
@@ -35,9 +35,37 @@ def get_file_variable(key: FileFields, key_name: str) -> str | None:
         return get_static_file_name_key(key_name)
 
 
+def get_size_key(key_name: str) -> str:
+    return key_name + "_size"
+
+
+def get_sha256_key(key_name: str) -> str:
+    return key_name + "_sha256"
+
+
+def get_modified_at_key(key_name: str) -> str:
+    return key_name + "_modified_at"
+
+
 def werkzeug_get_name(key_name: str) -> str:
     return f"{key_name}_flask"
 
 
 def starlette_get_name(key_name: str) -> str:
     return f"{key_name}_asyncio"
+
+
+def starlette_response_name(key_name: str) -> str:
+    return f"{key_name}_asyncio_response"
+
+
+def not_modified_name() -> str:
+    return "is_not_modified"
+
+
+def upload_reader_name() -> str:
+    return "read_upload_stream"
+
+
+def async_upload_reader_name() -> str:
+    return "read_upload_stream_async"
@@ -0,0 +1,208 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from cache import RunCache
+from discovery.static import DiscoveredClass, discover_file
+from execute.session import EditSession
+from executor import Executor
+from history import HistoryStore
+from import_pool import inspect_imported
+from logger import LOGGER
+from planner import ActionPlan, plan_classes
+from profiling import PROFILER, Timings, start_worker
+from settings import SETTINGS
+
+"""Per file work spread over a process pool.
+
+Workers discover and inspect the classes of a file, the parent plans them one
+file at a time in the walk order, so every prompt is asked from the parent
+process. The planned actions go back to the pool to rewrite the file, and the
+history is updated by the parent once a file is written, in the walk order.
+
+A class name that shows up in more than one file shares its history, such a
+file is planned only after the earlier one is settled, like a sequential run.
+"""
+
+
+@dataclass
+class FileInspection:
+    file_name: str
+    # None when the file couldn't be discovered nor imported
+    classes: list[DiscoveredClass] | None
+    failed: bool = False
+    timings: Timings = field(default_factory=dict)
+
+
+@dataclass
+class RewriteResult:
+    ok: bool
+    timings: Timings = field(default_factory=dict)
+
+
+@dataclass
+class PendingFile:
+    file_name: str
+    plans: list[ActionPlan]
+    rewrite: Future
+    failed: bool = False
+    classes: set[str] = field(default_factory=set)
+
+
+def inspect_file(file_name: str) -> FileInspection:
+    """Runs in a worker, never prompts"""
+    inspection = _inspect_file(file_name)
+    inspection.timings = PROFILER.take()
+    return inspection
+
+
+def _inspect_file(file_name: str) -> FileInspection:
+    try:
+        if SETTINGS.discovery != "static":
+            return FileInspection(file_name, inspect_imported(file_name))
+        try:
+            discovery = discover_file(file_name)
+        except (SyntaxError, ValueError) as e:
+            LOGGER.warning(
+                "Static discovery failed for %s, importing: %s", file_name, e
+            )
+            return FileInspection(file_name, inspect_imported(file_name))
+
+        classes = [c for c in discovery.classes if not c.ambiguous]
+        ambiguous = [c.class_name for c in discovery.classes if c.ambiguous]
+        if ambiguous:
+            LOGGER.info("Static discovery is ambiguous for %s, importing", file_name)
+            imported = inspect_imported(file_name, ambiguous)
+            if imported is None:
+                return FileInspection(file_name, classes, failed=True)
+            classes += imported
+        return FileInspection(file_name, classes)
+    except Exception as e:
+        LOGGER.warning("Inspecting %s failed: %s", file_name, e)
+        return FileInspection(file_name, None)
+
+
+def rewrite_file(file_name: str, plans: list[ActionPlan]) -> RewriteResult:
+    """Runs in a worker, applies the code of every plan of the file at once"""
+    try:
+        with EditSession(file_name) as session:
+            for plan in plans:
+                for action in plan.actions:
+                    Executor.apply_code(action, session)
+    except Exception as e:
+        LOGGER.warning("Executing the plans failed: %s", str(e))
+        return RewriteResult(False, PROFILER.take())
+    return RewriteResult(True, PROFILER.take())
+
+
+class ParallelRun:
+    def __init__(
+        self,
+        pool: ProcessPoolExecutor,
+        history_path: str,
+        history: HistoryStore,
+        cache: RunCache | None,
+    ) -> None:
+        self.pool = pool
+        self.history_path = history_path
+        self.history = history
+        self.cache = cache
+        self.pending: list[PendingFile] = []
+        self.skipped = 0
+
+    def plan(self, inspection: FileInspection) -> PendingFile | None:
+        PROFILER.merge(inspection.timings)
+        if inspection.classes is None:
+            self.forget(inspection.file_name)
+            return None
+        self.settle_overlapping({c.class_name for c in inspection.classes})
+
+        plans, failed = plan_classes(
+            inspection.file_name,
+            self.history_path,
+            [(c.class_name, c) for c in inspection.classes],
+        )
+        pending = PendingFile(
+            inspection.file_name,
+            plans,
+            self.pool.submit(rewrite_file, inspection.file_name, plans),
+            failed or inspection.failed,
+            {plan.class_name for plan in plans},
+        )
+        self.pending.append(pending)
+        return pending
+
+    def settle_overlapping(self, classes: set[str]) -> None:
+        """Waits for the earlier files holding any of the classes"""
+        last = max(
+            (i for i, p in enumerate(self.pending) if p.classes & classes),
+            default=-1,
+        )
+        for _ in range(last + 1):
+            self.settle(self.pending.pop(0))
+
+    def settle_all(self) -> None:
+        while self.pending:
+            self.settle(self.pending.pop(0))
+
+    def settle(self, pending: PendingFile) -> None:
+        result = pending.rewrite.result()
+        PROFILER.merge(result.timings)
+        if not result.ok:
+            self.forget(pending.file_name)
+            return
+        for plan in pending.plans:
+            for action in plan.actions:
+                Executor.record_history(action, self.history)
+        if pending.failed:
+            self.forget(pending.file_name)
+        elif self.cache:
+            self.cache.record(
+                pending.file_name,
+                [plan.class_name for plan in pending.plans],
+                self.history.data,
+            )
+
+    def forget(self, file_name: str) -> None:
+        if self.cache:
+            self.cache.forget(file_name)
+
+    def is_fresh(self, file_name: str) -> bool:
+        if not self.cache:
+            return False
+        entry = self.cache.entries.get(file_name)
+        if entry:
+            self.settle_overlapping(set(entry.classes))
+        return self.cache.is_fresh(file_name, self.history.data)
+
+
+def run_parallel(
+    files: list[str],
+    history_path: str,
+    history: HistoryStore,
+    cache: RunCache | None,
+    jobs: int,
+) -> int:
+    """Processes the files over jobs workers, returns the number of skipped files"""
+    fresh = {f for f in files if cache and cache.is_fresh(f, history.data)}
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=start_worker, initargs=(PROFILER.enabled,)
+    ) as pool:
+        run = ParallelRun(pool, history_path, history, cache)
+        inspections = {f: pool.submit(inspect_file, f) for f in files if f not in fresh}
+        try:
+            for file in files:
+                # An earlier file of this run may still change the history of
+                # its classes, the upfront check is repeated once it is settled
+                if file in fresh:
+                    if run.is_fresh(file):
+                        LOGGER.debug("Unchanged since the last run, skipping %s", file)
+                        run.skipped += 1
+                        continue
+                    inspections[file] = pool.submit(inspect_file, file)
+                LOGGER.info("Working on path %s", file)
+                run.plan(inspections.pop(file).result())
+        finally:
+            for future in inspections.values():
+                future.cancel()
+            run.settle_all()
+    return run.skipped
@@ -0,0 +1,158 @@
+from dataclasses import dataclass, field
+from typing import Callable
+
+from decisions import DecisionError
+from discovery.static import DiscoveredClass
+from executor import (
+    ACTION_TYPE_ERRORS,
+    ActionType,
+    ApplyHistoryAction,
+    NewKeyAction,
+    ReAddHistoryAction,
+    RemoveHistoryCleanAction,
+    RemoveHistoryKeyAsIsAction,
+    RenameAction,
+)
+from logger import LOGGER
+from profiling import PROFILER
+from runtime import AbortException, Runtime, UnexpectedCodeSegment
+from settings import SETTINGS
+from types_source import FileFields
+
+
+@dataclass
+class KeyDiff:
+    new_keys: list[str]
+    missing_keys: list[str]
+
+
+def diff_keys(file_keys: list[str], history: dict[str, FileFields]) -> KeyDiff:
+    """Set difference both ways, keeping file and history order"""
+    known = set(history)
+    present = set(file_keys)
+    return KeyDiff(
+        [k for k in file_keys if k not in known],
+        [k for k in history if k not in present],
+    )
+
+
+@dataclass
+class ActionPlan:
+    file_name: str
+    class_name: str
+    history_path: str
+    actions: list[ActionType] = field(default_factory=list)
+    history: dict[str, FileFields] = field(default_factory=dict)
+
+
+class Planner:
+    """Resolves every new and missing key of a class in one pass
+
+    The Runtime resolvers are reused as they are, the action they raise is
+    collected into the plan instead of restarting the Runtime.
+    """
+
+    def __init__(self, runtime: Runtime) -> None:
+        self.runtime = runtime
+
+    @staticmethod
+    def resolve(resolver: Callable[[], None]) -> ActionType:
+        while True:
+            try:
+                resolver()
+            except AbortException:
+                continue
+            except ACTION_TYPE_ERRORS as action:
+                return action
+            raise UnexpectedCodeSegment("plan-no-reaction")
+
+    def detect_renames(self, new_keys: list[str]) -> dict[str, str]:
+        """Keys the decisions file names are left to it"""
+        if not SETTINGS.detect_renames:
+            return {}
+        decisions = self.runtime.decisions
+        if decisions is not None:
+            class_name = self.runtime.class_name
+            new_keys = [k for k in new_keys if not decisions.covers(class_name, k)]
+        return self.runtime.detect_renames(new_keys)
+
+    def plan(self) -> ActionPlan:
+        with PROFILER.phase("plan", self.runtime.file_name, self.runtime.class_name):
+            return self.plan_keys()
+
+    def plan_keys(self) -> ActionPlan:
+        runtime = self.runtime
+        history = dict(runtime.history)
+        plan = ActionPlan(runtime.file_name, runtime.class_name, runtime.history_path)
+        diff = diff_keys(runtime.file_keys, history)
+        detected = self.detect_renames(diff.new_keys)
+        # Keys whose code an action of the plan already applies
+        applied: set[str] = set()
+
+        for new_key_name in diff.new_keys:
+            runtime.history = history
+            if new_key_name in detected:
+                old_key_name = detected[new_key_name]
+                action = self.resolve(
+                    lambda: runtime.resolve_detected_rename(new_key_name, old_key_name)
+                )
+            else:
+                action = self.resolve(lambda: runtime.resolve_new_key(new_key_name))
+            if isinstance(action, RenameAction):
+                history.pop(action.old_key_name)
+                history[action.new_key_name] = action.new_key
+            elif isinstance(action, NewKeyAction):
+                history[action.new_key_name] = action.new_key
+                applied.add(action.new_key_name)
+            plan.actions.append(action)
+
+        for old_key_name in [k for k in diff.missing_keys if k in history]:
+            old_key = history[old_key_name]
+            action = self.resolve(
+                lambda: runtime.resolve_missing_key(old_key_name, old_key)
+            )
+            if isinstance(
+                action, (RemoveHistoryKeyAsIsAction, RemoveHistoryCleanAction)
+            ):
+                history.pop(old_key_name)
+            elif isinstance(action, ReAddHistoryAction):
+                applied.add(old_key_name)
+            else:
+                raise UnexpectedCodeSegment("plan-missing-key-no-solution")
+            plan.actions.append(action)
+
+        runtime.history = history
+        plan.history = history
+        unapplied = {k: v for k, v in history.items() if k not in applied}
+        if unapplied:
+            plan.actions.append(
+                ApplyHistoryAction(runtime.file_name, runtime.class_name, unapplied)
+            )
+        return plan
+
+
+def plan_classes(
+    file_name: str,
+    history_path: str,
+    classes: list[tuple[str, DiscoveredClass | None]],
+) -> tuple[list[ActionPlan], bool]:
+    """The plans of the classes of a file, and whether any class was rejected
+
+    A class without discovered columns is inspected from the imported module.
+    """
+    plans: list[ActionPlan] = []
+    failed = False
+    for class_name, discovered in classes:
+        try:
+            runtime = Runtime(
+                file_name, history_path, class_name, discovered, auto_execute=False
+            )
+            plans.append(Planner(runtime).plan())
+        except DecisionError:
+            raise
+        except Exception as e:
+            LOGGER.warning(
+                "Class rejected:%s in %s, of error: %s", class_name, file_name, str(e)
+            )
+            failed = True
+    return plans, failed
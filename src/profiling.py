@@ -0,0 +1,145 @@
+import cProfile
+import json
+import os
+import time
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass, field
+from types import TracebackType
+
+"""Phase timings of a run.
+
+Phases are timed per file and per class, nested phases are counted in their
+parent too. While disabled every hook hands out the same do nothing context,
+the only cost is the call and an attribute check.
+"""
+
+PHASES = [
+    "walk",
+    "prefilter",
+    "import",
+    "inspect",
+    "history",
+    "plan",
+    "parse",
+    "transform",
+    "unparse",
+    "write",
+]
+
+# Timings collected as (file, class, phase) -> [seconds, calls]
+Timings = dict[tuple[str, str, str], list[float]]
+
+_DISABLED = nullcontext()
+
+
+class _Phase:
+    __slots__ = ("timings", "key", "started")
+
+    def __init__(self, timings: Timings, key: tuple[str, str, str]) -> None:
+        self.timings = timings
+        self.key = key
+        self.started = 0.0
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        entry = self.timings.setdefault(self.key, [0.0, 0])
+        entry[0] += time.perf_counter() - self.started
+        entry[1] += 1
+
+
+@dataclass
+class Profiler:
+    enabled: bool = False
+    timings: Timings = field(default_factory=dict)
+    profile: cProfile.Profile | None = None
+
+    def phase(
+        self, name: str, file_name: str = "", class_name: str = ""
+    ) -> AbstractContextManager:
+        if not self.enabled:
+            return _DISABLED
+        return _Phase(self.timings, (file_name, class_name, name))
+
+    def start(self, with_cprofile: bool = True) -> None:
+        self.enabled = True
+        self.timings = {}
+        if with_cprofile:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def stop(self) -> None:
+        if self.profile:
+            self.profile.disable()
+        self.enabled = False
+
+    def take(self) -> Timings:
+        """Hands over the timings collected so far, for the parent to merge"""
+        timings, self.timings = self.timings, {}
+        return timings
+
+    def merge(self, timings: Timings) -> None:
+        for key, (seconds, calls) in timings.items():
+            entry = self.timings.setdefault(key, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += calls
+
+    def report(self) -> dict:
+        def add(into: dict, phase: str, seconds: float, calls: float) -> None:
+            entry = into.setdefault(phase, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += seconds
+            entry["calls"] += int(calls)
+
+        totals: dict = {}
+        files: dict = {}
+        for (file_name, class_name, phase), (seconds, calls) in sorted(
+            self.timings.items()
+        ):
+            add(totals, phase, seconds, calls)
+            if not file_name:
+                continue
+            timed_file = files.setdefault(file_name, {"phases": {}, "classes": {}})
+            add(timed_file["phases"], phase, seconds, calls)
+            if class_name:
+                add(
+                    timed_file["classes"].setdefault(class_name, {}),
+                    phase,
+                    seconds,
+                    calls,
+                )
+        order = {phase: index for index, phase in enumerate(PHASES)}
+        return {
+            "phases": dict(
+                sorted(totals.items(), key=lambda item: order.get(item[0], len(order)))
+            ),
+            "files": files,
+        }
+
+    def write(self, profile_path: str) -> str:
+        """The cProfile dump goes to the path, the report next to it as .json"""
+        if self.profile:
+            self.profile.dump_stats(profile_path)
+        report_path = os.path.splitext(profile_path)[0] + ".json"
+        if report_path == profile_path:
+            report_path = profile_path + ".timings.json"
+        with open(report_path, "w") as out_file:
+            json.dump(self.report(), out_file, indent=1)
+        return report_path
+
+
+PROFILER = Profiler()
+
+
+def start_worker(enabled: bool) -> None:
+    """Pool initializer, a worker times its own phases without cProfile"""
+    if PROFILER.profile:
+        PROFILER.profile.disable()
+        PROFILER.profile = None
+    PROFILER.enabled = enabled
+    PROFILER.timings = {}
@@ -0,0 +1,126 @@
+import os
+import subprocess
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+from discovery.static import DiscoveredColumn, discover_source
+from logger import LOGGER
+
+"""Pairs the new keys of a class with its missing keys.
+
+A missing key is a column the history knows but the class no longer has, a
+new key is the other way around. The columns of the last committed version of
+the file tell what the missing ones looked like, a pair scores on the
+similarity of the names, and on the type, nullability and position the old
+column had. Only pairs that are clearly the best for both keys are accepted.
+"""
+
+CONFIDENT_SCORE = 4.5
+CONFIDENT_MARGIN = 1.5
+GIT_TIMEOUT = 10
+
+
+@dataclass
+class RenamePair:
+    new_key_name: str
+    old_key_name: str
+    score: float
+
+
+@lru_cache(maxsize=None)
+def _committed_source(file_name: str) -> bytes | None:
+    directory, base_name = os.path.split(os.path.abspath(file_name))
+    try:
+        result = subprocess.run(
+            ["git", "-C", directory, "show", f"HEAD:./{base_name}"],
+            capture_output=True,
+            timeout=GIT_TIMEOUT,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        LOGGER.debug("No git history for %s, %s", file_name, e)
+        return None
+    if result.returncode:
+        LOGGER.debug("No git history for %s", file_name)
+        return None
+    return result.stdout
+
+
+def committed_columns(
+    file_name: str, class_name: str
+) -> dict[str, DiscoveredColumn] | None:
+    """The columns of the class as of HEAD, None if there is no such version"""
+    source = _committed_source(file_name)
+    if source is None:
+        return None
+    try:
+        discovery = discover_source(source, file_name)
+    except (SyntaxError, ValueError):
+        return None
+    _class = next((c for c in discovery.classes if c.class_name == class_name), None)
+    if _class is None:
+        return None
+    return {c.key: c for c in _class.columns}
+
+
+def score_pair(
+    new_column: DiscoveredColumn | None,
+    old_column: DiscoveredColumn | None,
+    new_key_name: str,
+    old_key_name: str,
+) -> float:
+    score = 4 * SequenceMatcher(None, new_key_name, old_key_name).ratio()
+    if new_column is None or old_column is None:
+        return score
+    if new_column.type_name and old_column.type_name:
+        score += 2 if new_column.type_name == old_column.type_name else -2
+    if new_column.nullable is not None and old_column.nullable is not None:
+        score += 1 if new_column.nullable == old_column.nullable else -1
+    distance = abs(new_column.position - old_column.position)
+    score += 2 if distance == 0 else 1 if distance == 1 else 0
+    return score
+
+
+def detect_renames(
+    new_keys: list[str],
+    missing_keys: list[str],
+    columns: dict[str, DiscoveredColumn],
+    previous: dict[str, DiscoveredColumn] | None,
+) -> list[RenamePair]:
+    """Confident pairs, in the order of the new keys"""
+    pairs = [
+        RenamePair(
+            new_key_name,
+            old_key_name,
+            score_pair(
+                columns.get(new_key_name),
+                previous.get(old_key_name) if previous else None,
+                new_key_name,
+                old_key_name,
+            ),
+        )
+        for new_key_name in new_keys
+        # A key that was already committed is new to the history only
+        if not (previous and new_key_name in previous)
+        for old_key_name in missing_keys
+    ]
+    if len(new_keys) == 1 and len(missing_keys) == 1:
+        for pair in pairs:
+            pair.score += 1
+
+    confident: list[RenamePair] = []
+    for pair in pairs:
+        if pair.score < CONFIDENT_SCORE:
+            continue
+        rivals = [
+            other.score
+            for other in pairs
+            if other is not pair
+            and (
+                other.new_key_name == pair.new_key_name
+                or other.old_key_name == pair.old_key_name
+            )
+        ]
+        if all(pair.score - rival >= CONFIDENT_MARGIN for rival in rivals):
+            confident.append(pair)
+    return confident
@@ -1,11 +1,10 @@
-import importlib.util
 from importlib.machinery import ModuleSpec
 from types import ModuleType
 from typing import Any, Literal
 
-from sqlalchemy import inspect
-from yaml import Loader, load
-
+from auto_resolve import ResolveKind, confident_pick, score_candidates
+from decisions import Decisions, open_decisions
+from discovery.static import DiscoveredClass, DiscoveredColumn
 from executor import (
     ApplyHistoryAction,
     NewKeyAction,
@@ -14,6 +13,13 @@ from executor import (
     RemoveHistoryKeyAsIsAction,
     RenameAction,
 )
+from history import open_history
+from logger import LOGGER
+from module_registry import MODULE_REGISTRY
+from profiling import PROFILER
+from rename_detect import committed_columns, detect_renames
+from settings import SETTINGS
+from type_classifier import class_columns
 from types_source import FileFields
 from utils.io import must_valid_from_list, must_valid_input
 
@@ -36,66 +42,70 @@ class AbortException(Exception):
     pass
 
 
-BINARY_FIELDS = [f.upper() for f in ["LargeBinary", "BINARY", "BLOB"]]
-
-STRING_FIELDS = [
-    f.upper()
-    for f in [
-        "String",
-        "Text",
-        "NCHAR",
-        "NVARCHAR",
-        "VARCHAR",
-        "Unicode",
-        "UnicodeText",
-    ]
-]
-
-
 class Runtime:
     history: dict[str, FileFields]
     spec: ModuleSpec | None
     module: ModuleType
     _class_object: Any
     all_keys: list[Any]
-
-    def __init__(self, file_name: str, history_path: str, class_name: str) -> None:
+    decisions: Decisions | None
+    columns: dict[str, DiscoveredColumn]
+    column_types: dict[str, str | None]
+
+    def __init__(
+        self,
+        file_name: str,
+        history_path: str,
+        class_name: str,
+        discovered: DiscoveredClass | None = None,
+        auto_execute: bool = True,
+    ) -> None:
         self.file_name = file_name
         self.history_path = history_path
         self.class_name = class_name
+        self.discovered = discovered
         self.setup()
-        self.execute()
+        if auto_execute:
+            self.execute()
 
     def setup(self):
         self.load_history()
-        self.load_module()
-        self.find_keys()
+        self.decisions = (
+            open_decisions(SETTINGS.decisions_path) if SETTINGS.decisions_path else None
+        )
+        if self.discovered:
+            self.use_discovered_keys(self.discovered)
+        else:
+            self.load_module()
+            self.find_keys()
         self.find_new_keys()
 
     def load_history(self) -> None:
-        with open(self.history_path) as in_file:
-            self.history = (load(in_file, Loader) or {}).get(self.class_name, {})
+        with PROFILER.phase("history", self.file_name, self.class_name):
+            history = open_history(self.history_path).get_class(self.class_name)
+        self.history = history
 
     def load_module(self) -> None:
-        self.spec = importlib.util.spec_from_file_location(
-            self.file_name, self.file_name
-        )
-        if self.spec and self.spec.loader:
-            self.module = importlib.util.module_from_spec(self.spec)
-            self.spec.loader.exec_module(self.module)
-            self._class_object = getattr(self.module, self.class_name)
-        else:
+        module = MODULE_REGISTRY.load(self.file_name)
+        if not module:
             raise StartupException("Couldn't load the target module.")
+        self.module = module
+        self.spec = module.__spec__
+        self._class_object = getattr(self.module, self.class_name)
 
     def find_keys(self) -> None:
-        self.keys = [
-            c for c in inspect(self._class_object).mapper.columns if hasattr(c, "key")
-        ]
-        self.file_keys = [
-            c.key
-            for c in self.keys
-            if str(c.type.__repr__()).split("(")[0].upper() in BINARY_FIELDS
-        ]
+        with PROFILER.phase("inspect", self.file_name, self.class_name):
+            classified = class_columns(self._class_object, SETTINGS.detect_renames)
+        self.columns = classified.columns
+        self.column_types = {k: c.type_name for k, c in self.columns.items()}
+        self.file_keys = classified.file_keys
+        self.string_keys = classified.string_keys
+
+    def use_discovered_keys(self, discovered: DiscoveredClass) -> None:
+        self.file_keys = discovered.file_keys
+        self.string_keys = discovered.string_keys
+        self.columns = {c.key: c for c in discovered.columns}
+        self.column_types = {k: c.type_name for k, c in self.columns.items()}
 
     def find_new_keys(self) -> None:
         self.new_keys = [k for k in self.file_keys if k in self.history]
@@ -123,11 +133,7 @@ class Runtime:
         return {"file_name_fix": static_file_name_value}
 
     def resolve_new_mime_dynamic_select(self, new_key_name: str) -> FileFields:
-        possible_keys = [
-            c.key
-            for c in self.keys
-            if str(c.type.__repr__()).split("(")[0].upper() in STRING_FIELDS
-        ]
+        possible_keys = self.string_keys
         if not possible_keys:
             raise AbortException("No keys available for selection.")
 
@@ -141,11 +147,7 @@ class Runtime:
         return {"mime_type_field_name": selected_key}
 
     def resolve_new_file_name_dynamic_select(self, new_key_name: str) -> FileFields:
-        possible_keys = [
-            c.key
-            for c in self.keys
-            if str(c.type.__repr__()).split("(")[0].upper() in STRING_FIELDS
-        ]
+        possible_keys = self.string_keys
 
         if not possible_keys:
             raise AbortException("No keys available for selection.")
@@ -213,7 +215,23 @@ class Runtime:
 
         return self.resolve_new_file_name_dynamic_add(new_key_name)
 
+    def auto_resolve(self, kind: ResolveKind, new_key_name: str) -> str | None:
+        """The conventional column for the key, if there is a clear one"""
+        if not SETTINGS.auto_resolve:
+            return None
+        scored = score_candidates(
+            kind, new_key_name, self.column_types, self.string_keys, self.file_keys
+        )
+        return confident_pick(scored)
+
     def resolve_new_mime(self, new_key_name: str) -> FileFields:
+        auto_selected = self.auto_resolve("mime", new_key_name)
+        if auto_selected:
+            LOGGER.info(
+                "Mime type of '%s' resolved to '%s'", new_key_name, auto_selected
+            )
+            return {"mime_type_field_name": auto_selected}
+
         new_mime_select = must_valid_input(
             f"Resolving mime type for key '{new_key_name}'. How should the mime type be resolved?\n <Static> has a fixed static mime type,\n <Dynamic> has a reference to another field in the database,\n <Unhandled> means no further action.\n Press X to abort.",
             ["static", "dynamic", "unhandled", "x"],
@@ -236,6 +254,13 @@ class Runtime:
         )
 
     def resolve_new_file_name(self, new_key_name: str) -> FileFields:
+        auto_selected = self.auto_resolve("file_name", new_key_name)
+        if auto_selected:
+            LOGGER.info(
+                "File name of '%s' resolved to '%s'", new_key_name, auto_selected
+            )
+            return {"file_name_field_name": auto_selected}
+
         new_file_name_select = must_valid_input(
             f"Resolving file name for key '{new_key_name}'. How should the file name be resolved?\n <Static> has a fixed static file name,\n <Dynamic> has a reference to another field in the database,\n <Unhandled> means no further action.\n Press X to abort.",
             ["static", "dynamic", "unhandled", "x"],
@@ -353,7 +378,40 @@ class Runtime:
             old_key_name,
             old_key,
             new_key_name,
-            new_key,
+            self.with_content_metadata(new_key, old_key),
+            self.file_name,
+            self.class_name,
+            self.history_path,
+        )
+
+    def detect_renames(self, new_keys: list[str]) -> dict[str, str]:
+        """New key -> the missing key it is confidently renamed from"""
+        missing_keys = [k for k in self.history if k not in self.file_keys]
+        if not new_keys or not missing_keys:
+            return {}
+        pairs = detect_renames(
+            new_keys,
+            missing_keys,
+            self.columns,
+            committed_columns(self.file_name, self.class_name),
+        )
+        for pair in pairs:
+            LOGGER.info(
+                "Detected rename of '%s' to '%s' in %s",
+                pair.old_key_name,
+                pair.new_key_name,
+                self.class_name,
+            )
+        return {pair.new_key_name: pair.old_key_name for pair in pairs}
+
+    def resolve_detected_rename(self, new_key_name: str, old_key_name: str) -> None:
+        """A detected rename keeps the settings of the old key"""
+        old_key = self.history[old_key_name]
+        raise RenameAction(
+            old_key_name,
+            old_key,
+            new_key_name,
+            dict(old_key),
             self.file_name,
             self.class_name,
             self.history_path,
@@ -379,6 +437,20 @@ class Runtime:
             key_name, rename_source_name, self.history[rename_source_name]
         )
 
+    def with_content_metadata(
+        self, new_key: FileFields, old_key: FileFields | None = None
+    ) -> FileFields:
+        """New keys follow the setting, renamed ones keep what they had"""
+        if new_key.get("unhandled") or "content_metadata" in new_key:
+            return new_key
+        if old_key and "content_metadata" in old_key:
+            enabled = old_key["content_metadata"]
+        else:
+            enabled = SETTINGS.content_metadata
+        if enabled:
+            new_key["content_metadata"] = True
+        return new_key
+
     def resolve_add_new_key(self, new_key_name: str) -> None:
         is_unhandled = (
             must_valid_input(f"Do you want to keep '{new_key_name}' unhandled?").lower()
@@ -400,13 +472,44 @@ class Runtime:
 
         raise NewKeyAction(
             new_key_name,
-            new_key,
+            self.with_content_metadata(new_key),
+            self.file_name,
+            self.class_name,
+            self.history_path,
+        )
+
+    def decide_new_key(self, new_key_name: str) -> None:
+        assert self.decisions is not None
+        missing_keys = [k for k in self.history if k not in self.file_keys]
+        rename_from, new_key = self.decisions.new_key(
+            self.class_name, new_key_name, missing_keys
+        )
+        if rename_from is not None:
+            old_key = self.history[rename_from]
+            raise RenameAction(
+                rename_from,
+                old_key,
+                new_key_name,
+                (
+                    self.with_content_metadata(new_key, old_key)
+                    if new_key is not None
+                    else dict(old_key)
+                ),
+                self.file_name,
+                self.class_name,
+                self.history_path,
+            )
+        raise NewKeyAction(
+            new_key_name,
+            self.with_content_metadata(new_key or {}),
             self.file_name,
             self.class_name,
             self.history_path,
         )
 
     def resolve_new_key(self, new_key_name: str) -> None:
+        if self.decisions is not None:
+            return self.decide_new_key(new_key_name)
         is_rename = (
             must_valid_input(
                 f"New key found '{new_key_name}'. Is this a rename"
@@ -426,10 +529,13 @@ class Runtime:
         return False
 
     def resolve_missing_key(self, old_key_name: str, old_key: FileFields) -> None:
-        un_handle = must_valid_input(
-            f"A previous key '{old_key_name}' is missing from the class.\nDo you want to reinstate it <readd>,\nPurge it <clean>, Remove it without any action <as_is>?",
-            ["re_add", "clean", "as_is"],
-        )
+        if self.decisions is not None:
+            un_handle: str = self.decisions.missing_key(self.class_name, old_key_name)
+        else:
+            un_handle = must_valid_input(
+                f"A previous key '{old_key_name}' is missing from the class.\nDo you want to reinstate it <readd>,\nPurge it <clean>, Remove it without any action <as_is>?",
+                ["re_add", "clean", "as_is"],
+            )
         if un_handle == "as_is":
             raise RemoveHistoryKeyAsIsAction(
                 self.file_name, old_key_name, self.class_name, self.history_path
@@ -1,6 +1,8 @@
 import os
 from typing import Literal
 
+VERSION = "0.1.0"
+
 
 class Settings:
     def __init__(self) -> None:
@@ -34,6 +36,49 @@ class Settings:
             else self.purge_on_unhandled
         )
         self.history_path = os.environ.get("history_path", None)
+        self.discovery: Literal["import"] | Literal["static"] = (
+            "static"
+            if os.environ.get("discovery", "import").lower() == "static"
+            else "import"
+        )
+        self.exclude: list[str] = [
+            e.strip() for e in os.environ.get("exclude", "").split(",") if e.strip()
+        ]
+        self.prefilter: bool = os.environ.get("prefilter", "true").lower() == "true"
+        self.cache: bool = os.environ.get("cache", "true").lower() == "true"
+        self.cache_path: str = os.environ.get("cache_path", "./.csfe_cache.json")
+        self.write_mode: Literal["unparse"] | Literal["splice"] = (
+            "splice"
+            if os.environ.get("write_mode", "unparse").lower() == "splice"
+            else "unparse"
+        )
+        self.decisions_path: str | None = os.environ.get("decisions_path", None)
+        self.import_isolation: bool = (
+            os.environ.get("import_isolation", "false").lower() == "true"
+        )
+        self.import_timeout: float = float(os.environ.get("import_timeout", "60"))
+        self.import_recycle: int = int(os.environ.get("import_recycle", "50"))
+        self.detect_renames: bool = (
+            os.environ.get("detect_renames", "false").lower() == "true"
+        )
+        self.auto_resolve: bool = (
+            os.environ.get("auto_resolve", "false").lower() == "true"
+        )
+        self.streaming_upload: bool = (
+            os.environ.get("streaming_upload", "false").lower() == "true"
+        )
+        # Bytes, 0 reads uploads of any size
+        self.max_upload_size: int = int(os.environ.get("max_upload_size", "0"))
+        self.defer_binary: bool = (
+            os.environ.get("defer_binary", "false").lower() == "true"
+        )
+        self.binary_raiseload: bool = (
+            os.environ.get("binary_raiseload", "false").lower() == "true"
+        )
+        # New keys get size, sha256 and modified_at columns, and conditional getters
+        self.content_metadata: bool = (
+            os.environ.get("content_metadata", "false").lower() == "true"
+        )
 
 
 SETTINGS = Settings()
@@ -0,0 +1,99 @@
+import ast
+from dataclasses import dataclass
+
+from types_source import FileFields
+from utils.ast_tools import get_ann_or_assign
+
+
+def call_name(expr: ast.expr | None) -> str | None:
+    """Column, sqlalchemy.Column and sa.orm.deferred all by their last name"""
+    if not isinstance(expr, ast.Call):
+        return None
+    if isinstance(expr.func, ast.Name):
+        return expr.func.id
+    if isinstance(expr.func, ast.Attribute):
+        return expr.func.attr
+    return None
+
+
+def set_keyword(call: ast.Call, name: str, value: bool) -> None:
+    """Sets a True keyword, a False one is left out like its default"""
+    call.keywords = [keyword for keyword in call.keywords if keyword.arg != name]
+    if value:
+        call.keywords.append(ast.keyword(name, ast.Constant(True)))
+
+
+@dataclass
+class DeferredColumn:
+    """Defers the binary column of a key, so listing rows leaves the blob out
+
+        Raises:
+            Nothing, a column it can't read is left as it is
+
+    The expected code format is:
+    ...
+    {key_name} = sqlalchemy.orm.deferred(Column(...), #raiseload=True#)
+    ...
+    or
+    ...
+    {key_name}: #Mapped[bytes]# = mapped_column(..., deferred=True, #deferred_raiseload=True#)
+    """
+
+    key_name: str
+    key: FileFields
+    _class: ast.ClassDef
+    raiseload: bool = False
+
+    def find_column(self, _key_name: str | None = None) -> ast.Call | None:
+        key_name = _key_name or self.key_name
+        column = get_ann_or_assign(key_name, self._class, True)
+        if not column or not isinstance(column.value, ast.Call):
+            return None
+        return column.value
+
+    def build_deferred(self, column: ast.Call) -> ast.Call:
+        "sqlalchemy.orm.deferred(Column(...), #raiseload=True#)"
+        deferred = ast.Call(
+            ast.Attribute(
+                ast.Attribute(ast.Name("sqlalchemy"), "orm"),
+                "deferred",
+            ),
+            [column],
+            [],
+        )
+        set_keyword(deferred, "raiseload", self.raiseload)
+        return deferred
+
+    def rename_deferred(self, new_key_name: str) -> None:
+        column = self.find_column(new_key_name)
+        if not column:
+            return
+        name = call_name(column)
+        if name == "deferred":
+            set_keyword(column, "raiseload", self.raiseload)
+        elif name == "mapped_column":
+            set_keyword(column, "deferred", True)
+            set_keyword(column, "deferred_raiseload", self.raiseload)
+        elif name == "Column":
+            assign = get_ann_or_assign(new_key_name, self._class, True)
+            if assign:
+                assign.value = self.build_deferred(column)
+
+    def build(self) -> None:
+        self.rename_deferred(self.key_name)
+
+    def change(self, new_key_name: str, new_key: FileFields) -> None:
+        self.rename_deferred(new_key_name)
+
+    def purge(self) -> None:
+        column = self.find_column()
+        if not column:
+            return
+        name = call_name(column)
+        if name == "deferred" and column.args and call_name(column.args[0]):
+            assign = get_ann_or_assign(self.key_name, self._class, True)
+            if assign:
+                assign.value = column.args[0]
+        elif name == "mapped_column":
+            set_keyword(column, "deferred", False)
+            set_keyword(column, "deferred_raiseload", False)
@@ -3,7 +3,7 @@ from dataclasses import dataclass
 
 from naming import get_static_file_name_key
 from types_source import FileFields
-from utils.ast_tools import as_text_replace_content, get_attribute, get_attribute_index
+from utils.ast_tools import get_attribute, get_attribute_index, rename_symbols
 
 
 @dataclass
@@ -62,11 +62,9 @@ class StaticFileName:
     def change(self, new_key_name: str, new_key: FileFields) -> None:
         self.rename_file_name_static(new_key_name, new_key)
 
-        as_text_replace_content(
-            get_static_file_name_key(self.key_name),
-            get_static_file_name_key(new_key_name),
-            self._class,
-        )
+        old_name = get_static_file_name_key(self.key_name)
+        new_name = get_static_file_name_key(new_key_name)
+        rename_symbols({old_name: new_name}, self._class)
 
     def purge(self) -> None:
         self.purge_file_name_static()
@@ -0,0 +1,123 @@
+import ast
+from dataclasses import dataclass
+
+from naming import get_modified_at_key, get_sha256_key, get_size_key
+from templates import (
+    modified_at_column_template,
+    sha256_column_template,
+    size_column_template,
+)
+from types_source import FileFields
+from utils.ast_tools import get_ann_or_assign, rename_member, rename_symbols
+
+
+def metadata_keys(key_name: str) -> list[str]:
+    return [
+        get_size_key(key_name),
+        get_sha256_key(key_name),
+        get_modified_at_key(key_name),
+    ]
+
+
+@dataclass
+class ContentMetadataColumns:
+    """Manages the size, hash and modification time columns of a key
+
+    The expected code format is:
+    ...
+    {key_name} = ...
+    ...
+    {key_name}_size = sqlalchemy.Column(sqlalchemy.BigInteger)
+    ...
+    {key_name}_sha256 = sqlalchemy.Column(sqlalchemy.String(64))
+    ...
+    {key_name}_modified_at = sqlalchemy.Column(sqlalchemy.DateTime(timezone=True))
+    """
+
+    key_name: str
+    key: FileFields
+    _class: ast.ClassDef
+
+    def insert_index(self, key_name: str) -> int:
+        """After the binary column and the metadata columns already there"""
+        index = 0
+        for name in [key_name, *metadata_keys(key_name)]:
+            column = get_ann_or_assign(name, self._class, True)
+            if column:
+                index = self._class.body.index(column) + 1
+        return index
+
+    def rename_column(
+        self, old_name: str, new_name: str, template: ast.Assign, key_name: str
+    ) -> None:
+        column = get_ann_or_assign(old_name, self._class, True) or get_ann_or_assign(
+            new_name, self._class, True
+        )
+        if not column:
+            self._class.body.insert(self.insert_index(key_name), template)
+            return
+        rename_member(column, new_name, self._class)
+
+    def build_size_column(self, _key_name: str | None = None) -> ast.Assign:
+        "{key_name}_size = sqlalchemy.Column(sqlalchemy.BigInteger)"
+        key_name = _key_name or self.key_name
+        return size_column_template(key_name)
+
+    def rename_size_column(self, new_key_name: str) -> None:
+        "{key_name}_size = sqlalchemy.Column(sqlalchemy.BigInteger)"
+        self.rename_column(
+            get_size_key(self.key_name),
+            get_size_key(new_key_name),
+            self.build_size_column(new_key_name),
+            new_key_name,
+        )
+
+    def build_sha256_column(self, _key_name: str | None = None) -> ast.Assign:
+        "{key_name}_sha256 = sqlalchemy.Column(sqlalchemy.String(64))"
+        key_name = _key_name or self.key_name
+        return sha256_column_template(key_name)
+
+    def rename_sha256_column(self, new_key_name: str) -> None:
+        "{key_name}_sha256 = sqlalchemy.Column(sqlalchemy.String(64))"
+        self.rename_column(
+            get_sha256_key(self.key_name),
+            get_sha256_key(new_key_name),
+            self.build_sha256_column(new_key_name),
+            new_key_name,
+        )
+
+    def build_modified_at_column(self, _key_name: str | None = None) -> ast.Assign:
+        "{key_name}_modified_at = sqlalchemy.Column(sqlalchemy.DateTime(timezone=True))"
+        key_name = _key_name or self.key_name
+        return modified_at_column_template(key_name)
+
+    def rename_modified_at_column(self, new_key_name: str) -> None:
+        "{key_name}_modified_at = sqlalchemy.Column(sqlalchemy.DateTime(timezone=True))"
+        self.rename_column(
+            get_modified_at_key(self.key_name),
+            get_modified_at_key(new_key_name),
+            self.build_modified_at_column(new_key_name),
+            new_key_name,
+        )
+
+    def build(self) -> None:
+        self.change(self.key_name, self.key)
+
+    def change(self, new_key_name: str, new_key: FileFields) -> None:
+        if not new_key.get("content_metadata"):
+            self.purge()
+            return
+        self.rename_size_column(new_key_name)
+        self.rename_sha256_column(new_key_name)
+        self.rename_modified_at_column(new_key_name)
+
+        rename_symbols(
+            dict(zip(metadata_keys(self.key_name), metadata_keys(new_key_name))),
+            self._class,
+        )
+
+    def purge(self) -> None:
+        for name in metadata_keys(self.key_name):
+            column = get_ann_or_assign(name, self._class, True)
+            if column:
+                self._class.body.remove(column)
@@ -0,0 +1,135 @@
+import ast
+from dataclasses import dataclass
+
+from naming import get_modified_at_key, get_sha256_key, get_size_key
+from templates import (
+    digest_start_template,
+    digest_update_template,
+    modified_at_assign_template,
+    sha256_assign_template,
+    size_assign_template,
+)
+from types_source import FileFields
+
+
+def _is_data_assign(statement: ast.stmt) -> bool:
+    return (
+        isinstance(statement, ast.Assign)
+        and isinstance(statement.targets[0], ast.Name)
+        and statement.targets[0].id == "data"
+    )
+
+
+def _is_digest_start(statement: ast.stmt) -> bool:
+    return (
+        isinstance(statement, ast.Assign)
+        and isinstance(statement.targets[0], ast.Name)
+        and statement.targets[0].id == "digest"
+    )
+
+
+def _is_digest_update(statement: ast.stmt) -> bool:
+    return isinstance(statement, ast.Expr) and any(
+        isinstance(node, ast.Attribute)
+        and isinstance(node.value, ast.Name)
+        and node.value.id == "digest"
+        and node.attr == "update"
+        for node in ast.walk(statement)
+    )
+
+
+def _is_self_assign(statement: ast.stmt, attributes: list[str]) -> bool:
+    return (
+        isinstance(statement, ast.Assign)
+        and isinstance(statement.targets[0], ast.Attribute)
+        and isinstance(statement.targets[0].value, ast.Name)
+        and statement.targets[0].value.id == "self"
+        and statement.targets[0].attr in attributes
+    )
+
+
+@dataclass
+class MetadataAssigns:
+    """Fills the metadata columns in the pass that reads the upload
+
+    A streaming read hashes each chunk as it comes in, a whole read is hashed
+    once after it, off the event loop in the async setter.
+
+    The expected code format is:
+    ...
+    digest = hashlib.sha256()
+    ...
+    data = ...
+    ...
+    {'' if streaming else 'digest.update(data)'}
+    ...
+    self.{key_name}_size = len(data)
+    ...
+    self.{key_name}_sha256 = digest.hexdigest()
+    ...
+    self.{key_name}_modified_at = datetime.datetime.now(datetime.timezone.utc)
+    """
+
+    key_name: str
+    _fn: ast.FunctionDef | ast.AsyncFunctionDef
+    streaming: bool = False
+    is_async: bool = False
+
+    def find(self, matches) -> ast.stmt | None:  # type: ignore
+        return next((s for s in self._fn.body if matches(s)), None)
+
+    def data_index(self) -> int:
+        data = self.find(_is_data_assign)
+        return self._fn.body.index(data) if data else 0
+
+    def rename_digest_start(self, enabled: bool) -> None:
+        "digest = hashlib.sha256()"
+        start = self.find(_is_digest_start)
+        if start and not enabled:
+            self._fn.body.remove(start)
+        elif not start and enabled:
+            self._fn.body.insert(self.data_index(), digest_start_template())
+
+    def rename_digest_update(self, enabled: bool) -> None:
+        "{'' if streaming else 'digest.update(data)'}"
+        update = self.find(_is_digest_update)
+        if update:
+            self._fn.body.remove(update)
+        if enabled and not self.streaming:
+            self._fn.body.insert(
+                self.data_index() + 1, digest_update_template(self.is_async)
+            )
+
+    def rename_assign(
+        self, attributes: list[str], should: ast.Assign, enabled: bool
+    ) -> None:
+        ass = self.find(lambda s: _is_self_assign(s, attributes))
+        if ass and enabled:
+            self._fn.body[self._fn.body.index(ass)] = should
+        elif ass:
+            self._fn.body.remove(ass)
+        elif enabled:
+            self._fn.body.append(should)
+
+    def change(self, new_key_name: str, new_key: FileFields) -> None:
+        enabled = bool(new_key.get("content_metadata"))
+        self.rename_digest_start(enabled)
+        self.rename_digest_update(enabled)
+        # self.{key_name}_size = len(data)
+        self.rename_assign(
+            [get_size_key(self.key_name), get_size_key(new_key_name)],
+            size_assign_template(new_key_name),
+            enabled,
+        )
+        # self.{key_name}_sha256 = digest.hexdigest()
+        self.rename_assign(
+            [get_sha256_key(self.key_name), get_sha256_key(new_key_name)],
+            sha256_assign_template(new_key_name),
+            enabled,
+        )
+        # self.{key_name}_modified_at = datetime.datetime.now(datetime.timezone.utc)
+        self.rename_assign(
+            [get_modified_at_key(self.key_name), get_modified_at_key(new_key_name)],
+            modified_at_assign_template(new_key_name),
+            enabled,
+        )
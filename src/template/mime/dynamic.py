@@ -5,10 +5,11 @@ from naming import get_column_mime_key
 from template.exceptions import TemplateException
 from types_source import FileFields
 from utils.ast_tools import (
-    as_text_replace_content,
     get_ann_or_assign,
     get_property_getter,
     get_property_setter,
+    rename_member,
+    rename_symbols,
 )
 
 
@@ -55,7 +56,7 @@ class MimeGetter:
         if not self._fn:
             self._fn = self.build_function_base(key_name)
         else:
-            self._fn.name = get_column_mime_key(key_name)
+            rename_member(self._fn, get_column_mime_key(key_name), self._class)
 
     def build_assign(self, _key: FileFields | None = None) -> ast.Assign:
         key = _key or self.key
@@ -199,7 +200,7 @@ class MimeSetter:
         if not self._fn:
             raise TemplateException("")
 
-        self._fn.name = get_column_mime_key(key_name)
+        rename_member(self._fn, get_column_mime_key(key_name), self._class)
 
     def build_decorator(self, _key_name: str | None = None) -> ast.Attribute:
         key_name = _key_name or self.key_name
@@ -351,9 +352,8 @@ class DynamicMimeType:
         self.getter.change(key_name, key)
         self.setter.change(key_name, key)
 
-        as_text_replace_content(
-            get_column_mime_key(self.key_name),
-            get_column_mime_key(key_name),
+        rename_symbols(
+            {get_column_mime_key(self.key_name): get_column_mime_key(key_name)},
             self._class,
         )
 
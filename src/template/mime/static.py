@@ -5,10 +5,10 @@ from naming import get_static_mime_key
 from templates import TemplateException
 from types_source import FileFields
 from utils.ast_tools import (
-    as_text_replace_content,
     get_attribute,
     get_attribute_index,
     pr,
+    rename_symbols,
 )
 
 
@@ -63,9 +63,8 @@ class StaticMimeType:
 
     def change(self, new_key_name: str, new_key: FileFields) -> None:
         self.rename_mime_static(new_key_name, new_key)
-        as_text_replace_content(
-            get_static_mime_key(self.key_name),
-            get_static_mime_key(new_key_name),
+        rename_symbols(
+            {get_static_mime_key(self.key_name): get_static_mime_key(new_key_name)},
             self._class,
         )
 
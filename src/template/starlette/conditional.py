@@ -0,0 +1,86 @@
+import ast
+from dataclasses import dataclass
+
+from naming import not_modified_name, starlette_response_name
+from templates import conditional_response_template, not_modified_check_template
+from types_source import FileFields
+from utils.ast_tools import get_async_function, get_function, rename_member
+
+
+@dataclass
+class StarletteConditionalTemplate:
+    """The async property has no request, so the conditional GET is a method
+
+    The expected code format is:
+    ...
+    async def {starlette_response_name(key_name)}(self, request: starlette.requests.Request) -> starlette.responses.Response:
+        if self.{not_modified_name()}(request.headers, self.{key_name}_sha256, self.{key_name}_modified_at):
+            return starlette.responses.Response(status_code=304, headers=#...#)
+        return await self.{starlette_get_name(key_name)}
+    ...
+    {not_modified_check_template()}
+    """
+
+    key_name: str
+    key: FileFields
+    _class: ast.ClassDef
+    _fn: ast.AsyncFunctionDef | None = None
+
+    def __post_init__(self) -> None:
+        self._fn = get_async_function(
+            starlette_response_name(self.key_name), self._class
+        )
+
+    def build_function_base(self, _key_name: str | None = None) -> ast.AsyncFunctionDef:
+        "async def {starlette_response_name(key_name)}(self, request: starlette.requests.Request) -> starlette.responses.Response:"
+        key_name = _key_name or self.key_name
+        return conditional_response_template(key_name)
+
+    def rename_function_base(self, new_key_name: str) -> None:
+        "async def {starlette_response_name(key_name)}(self, request: starlette.requests.Request) -> starlette.responses.Response:"
+        if not self._fn:
+            self._fn = self.build_function_base(new_key_name)
+            self._class.body.append(self._fn)
+            return
+        # The metadata columns and the getter are renamed class wide
+        rename_member(self._fn, starlette_response_name(new_key_name), self._class)
+
+    def checks_not_modified(self) -> bool:
+        """Whether anything in the class still calls the shared check"""
+        return any(
+            isinstance(node, ast.Attribute)
+            and isinstance(node.value, ast.Name)
+            and node.value.id == "self"
+            and node.attr == not_modified_name()
+            for node in ast.walk(self._class)
+        )
+
+    def build_not_modified_check(self) -> ast.FunctionDef:
+        "{not_modified_check_template()}"
+        return not_modified_check_template()
+
+    def rename_not_modified_check(self) -> None:
+        "{not_modified_check_template()}"
+        if not get_function(not_modified_name(), self._class):
+            self._class.body.append(self.build_not_modified_check())
+
+    def purge_not_modified_check(self) -> None:
+        check = get_function(not_modified_name(), self._class)
+        if check and not self.checks_not_modified():
+            self._class.body.remove(check)
+
+    def build(self) -> None:
+        self.change(self.key_name, self.key)
+
+    def change(self, new_key_name: str, new_key: FileFields) -> None:
+        if not new_key.get("content_metadata"):
+            self.purge()
+            return
+        self.rename_function_base(new_key_name)
+        self.rename_not_modified_check()
+
+    def purge(self) -> None:
+        if self._fn:
+            self._class.body.remove(self._fn)
+            self._fn = None
+        self.purge_not_modified_check()
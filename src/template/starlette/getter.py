@@ -3,12 +3,18 @@ from dataclasses import dataclass
 
 from naming import get_file_variable, get_mime_variable_name, starlette_get_name
 from template.exceptions import TemplateException
+from templates import (
+    content_headers_template,
+    is_load_deferred,
+    load_deferred_template,
+)
 from types_source import FileFields
 from utils.ast_tools import (
     get_attribute_index,
     get_property_getter,
     get_property_setter,
     pr,
+    rename_member,
 )
 
 
@@ -22,10 +28,12 @@ def {starlette_get_name(key_name)}(#self#)->#starlette.responses.FileResponse#:
     ...
     file_name = {file_name}
     ...
+    {load_deferred_template(key_name, True) if deferred else ''}
+    ...
     data = self.{key_name}
     ...
     #return flask.send_file(data,attachment_filename=file_name,mimetype=mime_key)#
-
+    #return starlette.responses.FileResponse(data,...,{'headers='+content_headers_template(key_name) if content_metadata else ''})#
 """
 
 
@@ -35,6 +43,7 @@ class StarletteGetterTemplate:
     key: FileFields
     _class: ast.ClassDef
     _fn: ast.FunctionDef | ast.AsyncFunctionDef | None
+    deferred: bool = False
 
     def __post_init__(self) -> None:
         self._fn = get_property_getter(starlette_get_name(self.key_name), self._class)
@@ -98,7 +107,7 @@ class StarletteGetterTemplate:
         if not _fn:
             raise TemplateException()
 
-        _fn.name = starlette_get_name(new_key_name)
+        rename_member(_fn, starlette_get_name(new_key_name), self._class)
 
     @staticmethod
     def _mime_value(key_name: str, key: FileFields) -> ast.Attribute | ast.Constant:
@@ -214,16 +223,79 @@ class StarletteGetterTemplate:
         else:
             _fn.body.insert(0, self.build_data(new_key_name))
 
+    def build_load(self, _key_name: str | None = None) -> ast.If:
+        key_name = _key_name or self.key_name
+        return load_deferred_template(key_name, True)
+
+    def rename_load(self, new_key_name: str) -> None:
+        _fn = self._fn
+        if not _fn:
+            raise TemplateException()
+
+        load = next((_load for _load in _fn.body if is_load_deferred(_load)), None)
+        if load:
+            _fn.body.remove(load)
+        if not self.deferred:
+            return
+        data = next(
+            (
+                _ass
+                for _ass in _fn.body
+                if isinstance(_ass, ast.Assign)
+                and isinstance(_ass.targets[0], ast.Name)
+                and _ass.targets[0].id == "data"
+            ),
+            None,
+        )
+        _fn.body.insert(
+            _fn.body.index(data) if data else 0, self.build_load(new_key_name)
+        )
+
+    def build_content_metadata(self, key_name: str) -> ast.keyword:
+        "headers={content_headers_template(key_name)}"
+        return ast.keyword("headers", content_headers_template(key_name))
+
+    def rename_content_metadata(self, new_key_name: str, new_key: FileFields) -> None:
+        "headers={content_headers_template(key_name)}"
+        _fn = self._fn
+        if not _fn:
+            raise TemplateException()
+
+        returned = next(
+            (
+                _ret
+                for _ret in _fn.body
+                if isinstance(_ret, ast.Return)
+                and isinstance(_ret.value, ast.Call)
+                and isinstance(_ret.value.func, ast.Attribute)
+                and _ret.value.func.attr == "FileResponse"
+            ),
+            None,
+        )
+        if not returned:
+            return
+        call: ast.Call = returned.value  # type: ignore
+        call.keywords = [
+            keyword for keyword in call.keywords if keyword.arg != "headers"
+        ]
+        if new_key.get("content_metadata"):
+            call.keywords.append(self.build_content_metadata(new_key_name))
+
     def build(self) -> None:
         _fn = self._fn
 
         if _fn:
+            # The column may have been deferred since
+            self.rename_load(self.key_name)
+            self.rename_content_metadata(self.key_name, self.key)
             return
 
         self._fn = self.build_function_base()
         self.rename_data(self.key_name)
+        self.rename_load(self.key_name)
         self.rename_mime(self.key_name, self.key)
         self.rename_file_name(self.key_name, self.key)
+        self.rename_content_metadata(self.key_name, self.key)
 
         self.add_if_not_present()
 
@@ -232,8 +304,10 @@ class StarletteGetterTemplate:
             self._fn = self.build_function_base(new_key_name)
         self.rename_function_base(new_key_name)
         self.rename_data(new_key_name)
+        self.rename_load(new_key_name)
         self.rename_mime(new_key_name, new_key)
         self.rename_file_name(new_key_name, new_key)
+        self.rename_content_metadata(new_key_name, new_key)
 
         self.add_if_not_present(new_key_name)
 
@@ -1,17 +1,25 @@
 import ast
 from dataclasses import dataclass
 from naming import (
+    async_upload_reader_name,
     get_file_variable,
     get_mime_variable_name,
     starlette_get_name,
 )
 from template.exceptions import TemplateException
-from templates import property_werkzeug_setter_template
+from template.metadata.setter import MetadataAssigns
+from templates import (
+    async_upload_read_template,
+    async_upload_reader_template,
+    property_werkzeug_setter_template,
+)
 from types_source import FileFields
 from utils.ast_tools import (
     get_assign,
+    get_async_function,
     get_property_getter,
     get_property_setter,
+    rename_member,
 )
 
 
@@ -26,21 +34,28 @@ class StarletteSetterTemplate:
         ...
         file_name = file.filename
         ...
-        data = await file.read()
+        {MetadataAssigns digest, if content_metadata}
+        ...
+        data = await {('self.'+async_upload_reader_name()+'(file, max_size)') if streaming else 'file.read()'}
         ...
         self.{key} = data
         ...
         {('self.'+mime_key+' = mime_type') if mime_key else ''}
         ...
         {('self.'+file_name+' = file_name') if file_name else ''}
+        ...
+        {MetadataAssigns size and sha256, if content_metadata}
 
-
+    ...
+    {async_upload_reader_template() if streaming else ''}
     """
 
     key_name: str
     key: FileFields
     _class: ast.ClassDef
     _fn: ast.FunctionDef | ast.AsyncFunctionDef | None
+    streaming: bool = False
+    max_size: int | None = None
 
     def __post_init__(self):
         self._fn = get_property_setter(starlette_get_name(self.key_name), self._class)
@@ -135,7 +150,7 @@ class StarletteSetterTemplate:
         if not self._fn:
             raise TemplateException("")
 
-        self._fn.name = starlette_get_name(new_key_name)
+        rename_member(self._fn, starlette_get_name(new_key_name), self._class)
 
     def build_static_mime_definition(self) -> ast.Assign:
         "mime_type = file.content_type"
@@ -171,23 +186,73 @@ class StarletteSetterTemplate:
         else:
             return
 
-    def build_data_assign(self) -> ast.Assign:
-        "data = await file.read()"
+    @staticmethod
+    def is_upload_read(expr: ast.expr) -> bool:
+        "await file.read() or await self.{async_upload_reader_name()}(...)"
+        if not isinstance(expr, ast.Await) or not isinstance(expr.value, ast.Call):
+            return False
+        func = expr.value.func
+        if not isinstance(func, ast.Attribute) or not isinstance(func.value, ast.Name):
+            return False
+        return (func.value.id, func.attr) in [
+            ("file", "read"),
+            ("self", async_upload_reader_name()),
+        ]
+
+    def build_data_assign(self, _key: FileFields | None = None) -> ast.Assign:
+        "data = await {('self.'+async_upload_reader_name()+'(file, max_size)') if streaming else 'file.read()'}"
+        key = _key or self.key
         return ast.Assign(
             [ast.Name("data")],
-            ast.Await(ast.Call(ast.Attribute(ast.Name("file"), "read"), [], [])),
+            async_upload_read_template(
+                self.streaming, self.max_size, bool(key.get("content_metadata"))
+            ),
         )
 
-    def rename_data_assign(self) -> None:
-        "data = await file.read()"
+    def rename_data_assign(self, new_key: FileFields) -> None:
+        "data = await {('self.'+async_upload_reader_name()+'(file, max_size)') if streaming else 'file.read()'}"
         if not self._fn:
             raise TemplateException("")
         ass = get_assign("data", self._fn, True)
 
         if not ass:
-            self._fn.body.insert(0, self.build_data_assign())
-        else:
-            return
+            self._fn.body.insert(0, self.build_data_assign(new_key))
+        elif StarletteSetterTemplate.is_upload_read(ass.value):
+            # A read written by hand is left alone
+            ass.value = self.build_data_assign(new_key).value
+
+    def rename_content_metadata(self, new_key_name: str, new_key: FileFields) -> None:
+        if not self._fn:
+            raise TemplateException("")
+        MetadataAssigns(self.key_name, self._fn, self.streaming, True).change(
+            new_key_name, new_key
+        )
+
+    def reads_upload(self) -> bool:
+        """Whether anything in the class still calls the upload reader"""
+        return any(
+            isinstance(node, ast.Attribute)
+            and isinstance(node.value, ast.Name)
+            and node.value.id == "self"
+            and node.attr == async_upload_reader_name()
+            for node in ast.walk(self._class)
+        )
+
+    def build_upload_reader(self) -> ast.AsyncFunctionDef:
+        "{async_upload_reader_template() if streaming else ''}"
+        return async_upload_reader_template()
+
+    def rename_upload_reader(self) -> None:
+        "{async_upload_reader_template() if streaming else ''}"
+        if not self.streaming:
+            self.purge_upload_reader()
+        elif not get_async_function(async_upload_reader_name(), self._class):
+            self._class.body.append(self.build_upload_reader())
+
+    def purge_upload_reader(self) -> None:
+        reader = get_async_function(async_upload_reader_name(), self._class)
+        if reader and not self.reads_upload():
+            self._class.body.remove(reader)
 
     def build_key_name_assign(self, _key_name: str) -> ast.Assign:
         "self.{key_name} = data"
@@ -312,6 +377,10 @@ class StarletteSetterTemplate:
     def build(self) -> None:
         exists = self.find_fn()
         if exists:
+            # Reading settings may have changed since
+            self.rename_data_assign(self.key)
+            self.rename_content_metadata(self.key_name, self.key)
+            self.rename_upload_reader()
             return
 
         fun = self.build_function_base()
@@ -326,13 +395,16 @@ class StarletteSetterTemplate:
         self.rename_function_base(new_key_name)
         self.rename_static_mime_definition()
         self.rename_static_file_name_definition()
-        self.rename_data_assign()
+        self.rename_data_assign(new_key)
         self.rename_key_name_assign(new_key_name)
         self.rename_optional_mime(new_key_name, new_key)
         self.rename_optional_file_name(new_key_name, new_key)
+        self.rename_content_metadata(new_key_name, new_key)
 
         self.add_if_not_present(new_key_name)
+        self.rename_upload_reader()
 
     def purge(self) -> None:
         if self._fn:
             self._class.body.remove(self._fn)
+            self.purge_upload_reader()
@@ -2,11 +2,13 @@ import ast
 from dataclasses import dataclass
 
 from naming import starlette_get_name
+from settings import SETTINGS
 
+from template.starlette.conditional import StarletteConditionalTemplate
 from template.starlette.getter import StarletteGetterTemplate
 from template.starlette.setter import StarletteSetterTemplate
 from types_source import FileFields
-from utils.ast_tools import as_text_replace_content
+from utils.ast_tools import rename_symbols
 
 
 @dataclass
@@ -17,26 +19,36 @@ class Starlette:
 
     def __post_init__(self) -> None:
         self.setter = StarletteSetterTemplate(
-            self.key_name, self.key, self._class, None
+            self.key_name,
+            self.key,
+            self._class,
+            None,
+            SETTINGS.streaming_upload,
+            SETTINGS.max_upload_size or None,
         )
         self.getter = StarletteGetterTemplate(
-            self.key_name, self.key, self._class, None
+            self.key_name, self.key, self._class, None, SETTINGS.defer_binary
+        )
+        self.conditional = StarletteConditionalTemplate(
+            self.key_name, self.key, self._class
         )
 
     def build(self) -> None:
         self.getter.build()
         self.setter.build()
+        self.conditional.build()
 
     def change(self, key_name: str, key: FileFields) -> None:
         self.getter.change(key_name, key)
         self.setter.change(key_name, key)
+        self.conditional.change(key_name, key)
 
-        as_text_replace_content(
-            starlette_get_name(self.key_name),
-            starlette_get_name(key_name),
+        rename_symbols(
+            {starlette_get_name(self.key_name): starlette_get_name(key_name)},
             self._class,
         )
 
     def purge(self) -> None:
         self.getter.purge()
         self.setter.purge()
+        self.conditional.purge()
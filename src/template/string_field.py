@@ -1,7 +1,7 @@
 import ast
 from dataclasses import dataclass
 
-from utils.ast_tools import get_ann_or_assign
+from utils.ast_tools import get_ann_or_assign, rename_member
 
 """Holds and manages the format
 {field_name}:Mapped[str] = String({field_name})
@@ -27,7 +27,4 @@ class GenericStringDatabaseEntry:
         if not attribute:
             self._class.body.insert(0, self.build_row(new_key_name))
         else:
-            if isinstance(attribute, ast.AnnAssign):
-                attribute.target = ast.Name(id=new_key_name)
-            else:
-                attribute.targets[0] = ast.Name(new_key_name)
+            rename_member(attribute, new_key_name, self._class)
@@ -1,13 +1,27 @@
 import ast
 from dataclasses import dataclass
 
-from naming import get_file_variable, get_mime_variable_name, werkzeug_get_name
+from naming import (
+    get_file_variable,
+    get_mime_variable_name,
+    get_modified_at_key,
+    get_sha256_key,
+    werkzeug_get_name,
+)
 from template.exceptions import TemplateException
+from templates import (
+    is_load_deferred,
+    is_not_modified,
+    load_deferred_template,
+    not_modified_template,
+    response_length_template,
+)
 from types_source import FileFields
 from utils.ast_tools import (
     get_attribute_index,
     get_property_getter,
     get_property_setter,
+    rename_member,
 )
 
 
@@ -17,21 +31,32 @@ class WerkzeugGetterTemplate:
     ...
     @property
     def {werkzeug_get_name(key_name)}(#self#)->#flask.Response#:
+        {not_modified_template(key_name) if content_metadata else ''}
         ...
         mime_type = {mime_key}
         ...
         file_name = {file_name}
         ...
+        {load_deferred_template(key_name) if deferred else ''}
+        ...
         data = self.{key_name}
         ...
         return flask.send_file(data,attachment_filename=file_name,mimetype=mime_key)
 
+    or with content metadata:
+    ...
+        response = flask.send_file(data,#...#,etag=self.{key_name}_sha256,last_modified=self.{key_name}_modified_at)
+        ...
+        response.content_length = self.{key_name}_size
+        ...
+        return response
     """
 
     key_name: str
     key: FileFields
     _class: ast.ClassDef
     _fn: ast.FunctionDef | ast.AsyncFunctionDef | None
+    deferred: bool = False
 
     def __post_init__(self) -> None:
         self._fn = get_property_getter(werkzeug_get_name(self.key_name), self._class)
@@ -98,7 +123,7 @@ class WerkzeugGetterTemplate:
         if not _fn:
             raise TemplateException()
 
-        _fn.name = werkzeug_get_name(new_key_name)
+        rename_member(_fn, werkzeug_get_name(new_key_name), self._class)
 
     @staticmethod
     def _mime_value(key_name: str, key: FileFields) -> ast.Attribute | ast.Constant:
@@ -220,16 +245,140 @@ class WerkzeugGetterTemplate:
         else:
             _fn.body.insert(0, self.build_data(new_key_name))
 
+    def build_load(self, _key_name: str | None = None) -> ast.If:
+        "{load_deferred_template(key_name) if deferred else ''}"
+        key_name = _key_name or self.key_name
+        return load_deferred_template(key_name)
+
+    def rename_load(self, new_key_name: str) -> None:
+        "{load_deferred_template(key_name) if deferred else ''}"
+        _fn = self._fn
+        if not _fn:
+            raise TemplateException()
+
+        load = next((_load for _load in _fn.body if is_load_deferred(_load)), None)
+        if load:
+            _fn.body.remove(load)
+        if not self.deferred:
+            return
+        data = next(
+            (
+                _ass
+                for _ass in _fn.body
+                if isinstance(_ass, ast.Assign)
+                and isinstance(_ass.targets[0], ast.Name)
+                and _ass.targets[0].id == "data"
+            ),
+            None,
+        )
+        _fn.body.insert(
+            _fn.body.index(data) if data else 0, self.build_load(new_key_name)
+        )
+
+    def find_send_file(self) -> tuple[ast.Return | ast.Assign, ast.Call] | None:
+        _fn = self._fn
+        if not _fn:
+            raise TemplateException()
+
+        for statement in _fn.body:
+            if (
+                isinstance(statement, (ast.Return, ast.Assign))
+                and isinstance(statement.value, ast.Call)
+                and isinstance(statement.value.func, ast.Attribute)
+                and statement.value.func.attr == "send_file"
+            ):
+                return statement, statement.value
+        return None
+
+    def build_content_metadata(self, call: ast.Call, key_name: str) -> list[ast.stmt]:
+        "response = flask.send_file(data,#...#,etag=self.{key_name}_sha256,last_modified=self.{key_name}_modified_at)"
+        call.keywords += [
+            ast.keyword(
+                "etag", ast.Attribute(ast.Name("self"), get_sha256_key(key_name))
+            ),
+            ast.keyword(
+                "last_modified",
+                ast.Attribute(ast.Name("self"), get_modified_at_key(key_name)),
+            ),
+        ]
+        return [
+            ast.Assign([ast.Name("response")], call),
+            response_length_template(key_name),
+            ast.Return(ast.Name("response")),
+        ]
+
+    def rename_content_metadata(self, new_key_name: str, new_key: FileFields) -> None:
+        "response = flask.send_file(data,#...#,etag=self.{key_name}_sha256,last_modified=self.{key_name}_modified_at)"
+        _fn = self._fn
+        if not _fn:
+            raise TemplateException()
+
+        found = self.find_send_file()
+        if not found:
+            return
+        statement, call = found
+        call.keywords = [
+            keyword
+            for keyword in call.keywords
+            if keyword.arg not in ["etag", "last_modified"]
+        ]
+        _fn.body = [
+            _statement
+            for _statement in _fn.body
+            if not (
+                isinstance(_statement, ast.Assign)
+                and isinstance(_statement.targets[0], ast.Attribute)
+                and _statement.targets[0].attr == "content_length"
+            )
+            and not (
+                isinstance(_statement, ast.Return)
+                and isinstance(_statement.value, ast.Name)
+                and _statement.value.id == "response"
+            )
+        ]
+        index = _fn.body.index(statement)
+        if new_key.get("content_metadata"):
+            _fn.body[index : index + 1] = self.build_content_metadata(
+                call, new_key_name
+            )
+        else:
+            _fn.body[index] = ast.Return(call)
+
+    def build_not_modified(self, _key_name: str | None = None) -> ast.If:
+        "{not_modified_template(key_name) if content_metadata else ''}"
+        key_name = _key_name or self.key_name
+        return not_modified_template(key_name)
+
+    def rename_not_modified(self, new_key_name: str, new_key: FileFields) -> None:
+        "{not_modified_template(key_name) if content_metadata else ''}"
+        _fn = self._fn
+        if not _fn:
+            raise TemplateException()
+
+        check = next((_check for _check in _fn.body if is_not_modified(_check)), None)
+        if check:
+            _fn.body.remove(check)
+        if new_key.get("content_metadata"):
+            # First, so a cached copy is answered before the blob is loaded
+            _fn.body.insert(0, self.build_not_modified(new_key_name))
+
     def build(self) -> None:
         _fn = self._fn
 
         if _fn:
+            # The column may have been deferred since
+            self.rename_load(self.key_name)
+            self.rename_content_metadata(self.key_name, self.key)
+            self.rename_not_modified(self.key_name, self.key)
             return
 
         self._fn = self.build_function_base()
         self.rename_data(self.key_name)
+        self.rename_load(self.key_name)
         self.rename_mime(self.key_name, self.key)
         self.rename_file_name(self.key_name, self.key)
+        self.rename_content_metadata(self.key_name, self.key)
+        self.rename_not_modified(self.key_name, self.key)
 
         self.add_if_not_present()
 
@@ -238,8 +387,11 @@ class WerkzeugGetterTemplate:
             self._fn = self.build_function_base(new_key_name)
         self.rename_function_base(new_key_name)
         self.rename_data(new_key_name)
+        self.rename_load(new_key_name)
         self.rename_mime(new_key_name, new_key)
         self.rename_file_name(new_key_name, new_key)
+        self.rename_content_metadata(new_key_name, new_key)
+        self.rename_not_modified(new_key_name, new_key)
 
         self.add_if_not_present(new_key_name)
 
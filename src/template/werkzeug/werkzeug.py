@@ -2,10 +2,11 @@ import ast
 from dataclasses import dataclass
 
 from naming import werkzeug_get_name
+from settings import SETTINGS
 from template.werkzeug.getter import WerkzeugGetterTemplate
 from template.werkzeug.setter import WerkzeugSetterTemplate
 from types_source import FileFields
-from utils.ast_tools import as_text_replace_content
+from utils.ast_tools import rename_symbols
 
 
 @dataclass
@@ -15,8 +16,17 @@ class Werkzeug:
     _class: ast.ClassDef
 
     def __post_init__(self) -> None:
-        self.setter = WerkzeugSetterTemplate(self.key_name, self.key, self._class, None)
-        self.getter = WerkzeugGetterTemplate(self.key_name, self.key, self._class, None)
+        self.setter = WerkzeugSetterTemplate(
+            self.key_name,
+            self.key,
+            self._class,
+            None,
+            SETTINGS.streaming_upload,
+            SETTINGS.max_upload_size or None,
+        )
+        self.getter = WerkzeugGetterTemplate(
+            self.key_name, self.key, self._class, None, SETTINGS.defer_binary
+        )
 
     def build(self) -> None:
         self.getter.build()
@@ -26,10 +36,8 @@ class Werkzeug:
         self.getter.change(key_name, key)
         self.setter.change(key_name, key)
 
-        as_text_replace_content(
-            werkzeug_get_name(self.key_name),
-            werkzeug_get_name(key_name),
-            self._class,
+        rename_symbols(
+            {werkzeug_get_name(self.key_name): werkzeug_get_name(key_name)}, self._class
         )
 
     def purge(self) -> None:
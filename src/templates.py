@@ -4,23 +4,31 @@ from datetime import datetime
 from os import name
 
 from naming import (
+    async_upload_reader_name,
     get_column_file_name_key,
     get_column_mime_key,
     get_file_variable,
     get_mime_variable_name,
+    get_modified_at_key,
+    get_sha256_key,
+    get_size_key,
     get_static_file_name_key,
     get_static_mime_key,
+    not_modified_name,
     starlette_get_name,
+    starlette_response_name,
+    upload_reader_name,
     werkzeug_get_name,
 )
 from types_source import FileFields
 from utils.ast_tools import (
-    as_text_replace_content,
     get_attribute,
     get_attribute_index,
     get_property_setter,
     rename_decorator_setter,
+    rename_member,
 )
+from utils.skeleton import Skeleton
 import ast_comments
 
 
@@ -28,20 +36,70 @@ class TemplateException(Exception):
     pass
 
 
+def self_reference(attribute: str | None) -> ast.expr:
+    if not attribute:
+        return ast.Constant(value=None)
+    return ast.Attribute(
+        value=ast.Name(id="self", ctx=ast.Load()), attr=attribute, ctx=ast.Load()
+    )
+
+
+def self_attribute(key: FileFields, field: str, attribute: str | None) -> str | None:
+    """The attribute name when the value lives in a database field"""
+    return attribute if key.get(field) else None
+
+
+WERKZEUG_GETTER = Skeleton("""
+    @property
+    def __hole_name__(self) -> flask.Response:
+        mime_type = __hole_mime__
+        file_name = __hole_file_name__
+        data = self.__hole_key__
+        return flask.send_file(data, attachment_filename=file_name, mimetype=mime_type)
+    """)
+
+
+LOAD_DEFERRED = Skeleton("""
+    if '__hole_key__' in sqlalchemy.inspect(self).unloaded:
+        sqlalchemy.orm.object_session(self).refresh(self, ['__hole_key__'])
+    """)
+
+ASYNC_LOAD_DEFERRED = Skeleton("""
+    if '__hole_key__' in sqlalchemy.inspect(self).unloaded:
+        await sqlalchemy.ext.asyncio.async_object_session(self).refresh(
+            self, ['__hole_key__']
+        )
+    """)
+
+
+def load_deferred_template(key_name: str, is_async: bool = False) -> ast.If:
+    """Loads a deferred column before it is read, raiseload or not"""
+    load = (ASYNC_LOAD_DEFERRED if is_async else LOAD_DEFERRED).fill(key=key_name)
+
+    if not isinstance(load, ast.If):
+        raise Exception(f"Somehow this is not an if {type(load)}")
+
+    return load
+
+
+def is_load_deferred(statement: ast.stmt) -> bool:
+    return (
+        isinstance(statement, ast.If)
+        and isinstance(statement.test, ast.Compare)
+        and isinstance(statement.test.comparators[0], ast.Attribute)
+        and statement.test.comparators[0].attr == "unloaded"
+    )
+
+
 def property_werkzeug_getter_template(
     key_name: str, key: FileFields
 ) -> ast.FunctionDef:
-    mime_key = f"self.{get_mime_variable_name(key,key_name)}" or "None"
-    file_name = f"self.{get_file_variable(key,key_name)}" or "None"
-    template = f"""
-@property
-def {werkzeug_get_name(key_name)}(self)->flask.Response:
-    mime_type = {mime_key}
-    file_name = {file_name}
-    data = self.{key_name}
-    return flask.send_file(data,attachment_filename=file_name,mimetype=mime_type)
-"""
-    fun = ast.parse(template).body[0]
+    fun = WERKZEUG_GETTER.fill(
+        name=werkzeug_get_name(key_name),
+        mime=self_reference(get_mime_variable_name(key, key_name)),
+        file_name=self_reference(get_file_variable(key, key_name)),
+        key=key_name,
+    )
 
     if not isinstance(fun, ast.FunctionDef):
         raise Exception(f"Somehow this is not a function {type(fun)}")
@@ -110,7 +168,7 @@ class WerkzeugSetterTemplate:
         if not _fn:
             raise TemplateException()
 
-        _fn.name = new_key_name
+        rename_member(_fn, new_key_name, self._class)
 
     @staticmethod
     def is_file_read_call(expr: ast.expr) -> bool:
@@ -304,29 +362,102 @@ class WerkzeugSetterTemplate:
         self.rename_mime_assign(new_key_name, new_key)
 
 
+WERKZEUG_SETTER = Skeleton("""
+    @__hole_name__.setter
+    def __hole_name__(self, file: werkzeug.FileStorage) -> None:
+        data = __hole_read__
+        self.__hole_key__ = data
+        self.__hole_mime__ = file.mimetype
+        self.__hole_file_name__ = file.filename
+    """)
+
+
+UPLOAD_READ = Skeleton("file.read()")
+
+STREAMING_UPLOAD_READ = Skeleton("self.__hole_reader__(file, __hole_max_size__)")
+
+UPLOAD_READER = Skeleton("""
+    @staticmethod
+    def __hole_name__(
+        file: werkzeug.FileStorage,
+        max_size: int | None = None,
+        chunk_size: int = 1048576,
+        digest: 'hashlib._Hash | None' = None,
+    ) -> bytearray:
+        length = file.content_length or 0
+        if max_size is not None and length > max_size:
+            raise ValueError(f'Upload is larger than {max_size} bytes')
+        data = bytearray(length or chunk_size)
+        size = 0
+        while True:
+            if size == len(data):
+                probe = file.stream.read(1)
+                if not probe:
+                    break
+                if max_size is not None and size >= max_size:
+                    raise ValueError(f'Upload is larger than {max_size} bytes')
+                data += bytes(len(data))
+                data[size] = probe[0]
+                size += 1
+                if digest is not None:
+                    digest.update(probe)
+            with memoryview(data) as view:
+                read = file.stream.readinto(view[size:size + chunk_size])
+                if read and digest is not None:
+                    digest.update(view[size:size + read])
+            if not read:
+                break
+            size += read
+            if max_size is not None and size > max_size:
+                raise ValueError(f'Upload is larger than {max_size} bytes')
+        del data[size:]
+        return data
+    """)
+
+
+def _with_digest(read: ast.expr, digest: bool) -> ast.expr:
+    """The reader hashes while it reads, given the digest to update"""
+    call = read.value if isinstance(read, ast.Await) else read
+    if digest and isinstance(call, ast.Call):
+        call.keywords.append(ast.keyword("digest", ast.Name("digest")))
+    return read
+
+
+def upload_read_template(
+    streaming: bool, max_size: int | None, digest: bool = False
+) -> ast.expr:
+    """file.read(), or the bounded read into a single buffer when streaming"""
+    if not streaming:
+        read = UPLOAD_READ.fill()
+    else:
+        read = STREAMING_UPLOAD_READ.fill(
+            reader=upload_reader_name(), max_size=ast.Constant(value=max_size)
+        )
+
+    if not isinstance(read, ast.Expr):
+        raise Exception(f"Somehow this is not an expression {type(read)}")
+
+    return _with_digest(read.value, digest and streaming)
+
+
+def upload_reader_template() -> ast.FunctionDef:
+    return _function(UPLOAD_READER, name=upload_reader_name())
+
+
 def property_werkzeug_setter_template(
-    key_name: str, key: FileFields
+    key_name: str, key: FileFields, streaming: bool = False, max_size: int | None = None
 ) -> ast.FunctionDef:
-    mime_key = (
-        f"self.{get_mime_variable_name(key,key_name)}"
-        if key.get("mime_type_field_name")
-        else None
-    )
-    file_name = (
-        f"self.{get_file_variable(key,key_name)}"
-        if key.get("file_name_field_name")
-        else None
+    fun = WERKZEUG_SETTER.fill(
+        name=werkzeug_get_name(key_name),
+        read=upload_read_template(streaming, max_size),
+        key=key_name,
+        mime=self_attribute(
+            key, "mime_type_field_name", get_mime_variable_name(key, key_name)
+        ),
+        file_name=self_attribute(
+            key, "file_name_field_name", get_file_variable(key, key_name)
+        ),
     )
-    template = f"""
-@{werkzeug_get_name(key_name)}.setter
-def {werkzeug_get_name(key_name)}(self,file:werkzeug.FileStorage)->None:
-    data = file.read()
-    self.{key_name} = data
-    {('self.'+mime_key+' = file.mimetype') if mime_key else ''}
-    {('self.'+file_name+' = file.filename') if file_name else ''}
-    
-"""
-    fun = ast.parse(template).body[0]
 
     if not isinstance(fun, ast.FunctionDef):
         raise Exception(f"Somehow this is not a function {type(fun)}")
@@ -334,66 +465,148 @@ def {werkzeug_get_name(key_name)}(self,file:werkzeug.FileStorage)->None:
     return fun
 
 
+STARLETTE_GETTER = Skeleton("""
+    @property
+    async def __hole_name__(self) -> starlette.responses.FileResponse:
+        mime_type = __hole_mime__
+        file_name = __hole_file_name__
+        return starlette.responses.FileResponse(
+            self.__hole_key__, filename=file_name, media_type=mime_type
+        )
+    """)
+
+
 def property_starlette_getter_template(
     key_name: str, key: FileFields
-) -> ast.FunctionDef:
-    mime_key = f"self.{get_mime_variable_name(key,key_name)}" or "None"
-    file_name = f"self.{get_file_variable(key,key_name)}" or "None"
-    template = f"""
-@property
-async def {starlette_get_name(key_name)}(self)->starlette.responses.FileResponse:
-    mime_type = {mime_key}
-    file_name = {file_name}
-    return starlette.responses.FileResponse(
-        self.{key_name},
-        filename=file_name,
-        media_type=mime_type
+) -> ast.AsyncFunctionDef:
+    fun = STARLETTE_GETTER.fill(
+        name=starlette_get_name(key_name),
+        mime=self_reference(get_mime_variable_name(key, key_name)),
+        file_name=self_reference(get_file_variable(key, key_name)),
+        key=key_name,
     )
-"""
-    fun = ast.parse(template).body[0]
 
-    if not isinstance(fun, ast.FunctionDef):
+    if not isinstance(fun, ast.AsyncFunctionDef):
+        raise Exception(f"Somehow this is not a function {type(fun)}")
+
+    return fun
+
+
+STARLETTE_SETTER = Skeleton("""
+    @__hole_name__.setter
+    async def __hole_name__(self, file: starlette.datastructures.UploadFile) -> None:
+        mime_type = file.content_type
+        file_name = file.filename
+        data = __hole_read__
+        self.__hole_key__ = data
+        self.__hole_mime__ = mime_type
+        self.__hole_file_name__ = file_name
+    """)
+
+
+ASYNC_UPLOAD_READ = Skeleton("await file.read()")
+
+STREAMING_ASYNC_UPLOAD_READ = Skeleton(
+    "await self.__hole_reader__(file, __hole_max_size__)"
+)
+
+ASYNC_UPLOAD_READER = Skeleton("""
+    @staticmethod
+    async def __hole_name__(
+        file: starlette.datastructures.UploadFile,
+        max_size: int | None = None,
+        chunk_size: int = 1048576,
+        digest: 'hashlib._Hash | None' = None,
+    ) -> bytearray:
+        length = file.size or 0
+        if max_size is not None and length > max_size:
+            raise ValueError(f'Upload is larger than {max_size} bytes')
+        data = bytearray(length)
+        size = 0
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            end = size + len(chunk)
+            if max_size is not None and end > max_size:
+                raise ValueError(f'Upload is larger than {max_size} bytes')
+            if digest is not None:
+                await anyio.to_thread.run_sync(digest.update, chunk)
+            if end > len(data):
+                data += bytes(max(len(data), end - len(data)))
+            data[size:end] = chunk
+            size = end
+        del data[size:]
+        return data
+    """)
+
+
+def async_upload_read_template(
+    streaming: bool, max_size: int | None, digest: bool = False
+) -> ast.expr:
+    """await file.read(), or the chunked read into a single buffer when streaming"""
+    if not streaming:
+        read = ASYNC_UPLOAD_READ.fill()
+    else:
+        read = STREAMING_ASYNC_UPLOAD_READ.fill(
+            reader=async_upload_reader_name(), max_size=ast.Constant(value=max_size)
+        )
+
+    if not isinstance(read, ast.Expr):
+        raise Exception(f"Somehow this is not an expression {type(read)}")
+
+    return _with_digest(read.value, digest and streaming)
+
+
+def async_upload_reader_template() -> ast.AsyncFunctionDef:
+    fun = ASYNC_UPLOAD_READER.fill(name=async_upload_reader_name())
+
+    if not isinstance(fun, ast.AsyncFunctionDef):
         raise Exception(f"Somehow this is not a function {type(fun)}")
 
     return fun
 
 
 def property_starlette_setter_template(
-    key_name: str, key: FileFields
-) -> ast.FunctionDef:
-    mime_key = (
-        f"self.{get_mime_variable_name(key,key_name)}"
-        if key.get("mime_type_field_name")
-        else None
-    )
-    file_name = (
-        f"self.{get_file_variable(key,key_name)}"
-        if key.get("file_name_field_name")
-        else None
+    key_name: str, key: FileFields, streaming: bool = False, max_size: int | None = None
+) -> ast.AsyncFunctionDef:
+    fun = STARLETTE_SETTER.fill(
+        name=starlette_get_name(key_name),
+        read=async_upload_read_template(streaming, max_size),
+        key=key_name,
+        mime=self_attribute(
+            key, "mime_type_field_name", get_mime_variable_name(key, key_name)
+        ),
+        file_name=self_attribute(
+            key, "file_name_field_name", get_file_variable(key, key_name)
+        ),
     )
-    template = f"""
-@{starlette_get_name(key_name)}.setter
-async def {starlette_get_name(key_name)}(self,file:starlette.datastructures.UploadFile)->None:
-    mime_type = file.content_type
-    file_name = file.filename
-    data = await file.read()
-    self.{key} = data
-    {('self.'+mime_key+' = mime_type') if mime_key else ''}
-    {('self.'+file_name+' = file_name') if file_name else ''}
-    
-"""
-    fun = ast.parse(template).body[0]
 
-    if not isinstance(fun, ast.FunctionDef):
+    if not isinstance(fun, ast.AsyncFunctionDef):
         raise Exception(f"Somehow this is not a function {type(fun)}")
 
     return fun
 
 
-def mime_type_column_template(column_name: str) -> ast.AnnAssign:
-    template = f"{get_column_mime_key(column_name)}:Mapped[str] = String('{get_column_mime_key(column_name)}')"
+STRING_COLUMN = Skeleton("__hole_name__: Mapped[str] = String('__hole_name__')")
+
+PROPERTY_GETTER = Skeleton("""
+    @property
+    def __hole_name__(self) -> str:
+        return self.__hole_column__
+    """)
 
-    fun = ast.parse(template).body[0]
+PROPERTY_SETTER = Skeleton("""
+    @__hole_name__.setter
+    def __hole_name__(self, value: str) -> None:
+        self.__hole_column__ = value
+    """)
+
+STATIC_LITERAL = Skeleton("__hole_name__: Literal['__hole_value__'] = '__hole_value__'")
+
+
+def _assignment(template: Skeleton, **values: str) -> ast.AnnAssign:
+    fun = template.fill(**values)
 
     if not isinstance(fun, ast.AnnAssign):
         raise Exception(f"Somehow this is not a Assign {type(fun)}")
@@ -401,12 +614,8 @@ def mime_type_column_template(column_name: str) -> ast.AnnAssign:
     return fun
 
 
-def mime_type_getter_template(key_name: str, column_name: str) -> ast.FunctionDef:
-    template = f"""@property
-def {get_column_mime_key(key_name)}(self)->str:
-    return self.{column_name}
-"""
-    fun = ast.parse(template).body[0]
+def _function(template: Skeleton, **values: str) -> ast.FunctionDef:
+    fun = template.fill(**values)
 
     if not isinstance(fun, ast.FunctionDef):
         raise Exception(f"Somehow this is not a function {type(fun)}")
@@ -414,75 +623,209 @@ def {get_column_mime_key(key_name)}(self)->str:
     return fun
 
 
-def mime_type_setter_template(key_name: str, column_name: str) -> ast.FunctionDef:
-    template = f"""@{get_column_mime_key(key_name)}.setter
-def {get_column_mime_key(key_name)}(self,value:str)->None:
-    self.{column_name} = value
-"""
-    fun = ast.parse(template).body[0]
+def mime_type_column_template(column_name: str) -> ast.AnnAssign:
+    return _assignment(STRING_COLUMN, name=get_column_mime_key(column_name))
 
-    if not isinstance(fun, ast.FunctionDef):
-        raise Exception(f"Somehow this is not a function {type(fun)}")
 
-    return fun
+def mime_type_getter_template(key_name: str, column_name: str) -> ast.FunctionDef:
+    return _function(
+        PROPERTY_GETTER, name=get_column_mime_key(key_name), column=column_name
+    )
+
+
+def mime_type_setter_template(key_name: str, column_name: str) -> ast.FunctionDef:
+    return _function(
+        PROPERTY_SETTER, name=get_column_mime_key(key_name), column=column_name
+    )
 
 
 def mime_type_static_template(key_name: str, static_mime: str) -> ast.AnnAssign:
-    template = (
-        f"{get_static_mime_key(key_name)}:Literal['{static_mime}'] = '{static_mime}'"
+    return _assignment(
+        STATIC_LITERAL, name=get_static_mime_key(key_name), value=static_mime
     )
 
-    fun = ast.parse(template).body[0]
 
-    if not isinstance(fun, ast.AnnAssign):
-        raise Exception(f"Somehow this is not a Assign {type(fun)}")
+def file_type_column_template(property_name: str) -> ast.AnnAssign:
+    return _assignment(STRING_COLUMN, name=get_column_file_name_key(property_name))
 
-    return fun
 
+def file_name_static_template(key_name: str, static_name: str) -> ast.AnnAssign:
+    return _assignment(
+        STATIC_LITERAL, name=get_static_file_name_key(key_name), value=static_name
+    )
 
-def file_type_column_template(property_name: str) -> ast.AnnAssign:
-    template = f"{get_column_file_name_key(property_name)}:Mapped[str] = String('{get_column_file_name_key(property_name)}')"
 
-    fun = ast.parse(template).body[0]
+def file_name_getter_template(key_name: str, column_name: str) -> ast.FunctionDef:
+    return _function(
+        PROPERTY_GETTER, name=get_column_file_name_key(key_name), column=column_name
+    )
 
-    if not isinstance(fun, ast.AnnAssign):
-        raise Exception(f"Somehow this is not a Assign {type(fun)}")
 
-    return fun
+def file_name_setter_template(key_name: str, column_name: str) -> ast.FunctionDef:
+    return _function(
+        PROPERTY_SETTER, name=get_column_file_name_key(key_name), column=column_name
+    )
 
 
-def file_name_static_template(key_name: str, static_name: str) -> ast.AnnAssign:
-    template = f"{get_static_file_name_key(key_name)}:Literal['{static_name}'] = '{static_name}'"
+SIZE_COLUMN = Skeleton("__hole_name__ = sqlalchemy.Column(sqlalchemy.BigInteger)")
 
-    fun = ast.parse(template).body[0]
+SHA256_COLUMN = Skeleton("__hole_name__ = sqlalchemy.Column(sqlalchemy.String(64))")
 
-    if not isinstance(fun, ast.AnnAssign):
+MODIFIED_AT_COLUMN = Skeleton(
+    "__hole_name__ = sqlalchemy.Column(sqlalchemy.DateTime(timezone=True))"
+)
+
+DIGEST_START = Skeleton("digest = hashlib.sha256()")
+
+DIGEST_UPDATE = Skeleton("digest.update(data)")
+
+ASYNC_DIGEST_UPDATE = Skeleton("await anyio.to_thread.run_sync(digest.update, data)")
+
+SIZE_ASSIGN = Skeleton("self.__hole_name__ = len(data)")
+
+SHA256_ASSIGN = Skeleton("self.__hole_name__ = digest.hexdigest()")
+
+MODIFIED_AT_ASSIGN = Skeleton(
+    "self.__hole_name__ = datetime.datetime.now(datetime.timezone.utc)"
+)
+
+
+def _plain_assignment(template: Skeleton, **values: str) -> ast.Assign:
+    fun = template.fill(**values)
+
+    if not isinstance(fun, ast.Assign):
         raise Exception(f"Somehow this is not a Assign {type(fun)}")
 
     return fun
 
 
-def file_name_getter_template(key_name: str, column_name: str) -> ast.FunctionDef:
-    template = f"""@property
-def {get_column_file_name_key(key_name)}(self)->str:
-    return self.{column_name}
-"""
-    fun = ast.parse(template).body[0]
+def size_column_template(key_name: str) -> ast.Assign:
+    return _plain_assignment(SIZE_COLUMN, name=get_size_key(key_name))
 
-    if not isinstance(fun, ast.FunctionDef):
-        raise Exception(f"Somehow this is not a function {type(fun)}")
 
-    return fun
+def sha256_column_template(key_name: str) -> ast.Assign:
+    return _plain_assignment(SHA256_COLUMN, name=get_sha256_key(key_name))
 
 
-def file_name_setter_template(key_name: str, column_name: str) -> ast.FunctionDef:
-    template = f"""@{get_column_file_name_key(key_name)}.setter
-def {get_column_file_name_key(key_name)}(self,value:str)->None:
-    self.{column_name} = value
-"""
-    fun = ast.parse(template).body[0]
+def modified_at_column_template(key_name: str) -> ast.Assign:
+    return _plain_assignment(MODIFIED_AT_COLUMN, name=get_modified_at_key(key_name))
 
-    if not isinstance(fun, ast.FunctionDef):
+
+def digest_start_template() -> ast.Assign:
+    return _plain_assignment(DIGEST_START)
+
+
+def digest_update_template(is_async: bool) -> ast.stmt:
+    """Hashes an upload read in one piece, off the event loop when async"""
+    return (ASYNC_DIGEST_UPDATE if is_async else DIGEST_UPDATE).fill()
+
+
+def size_assign_template(key_name: str) -> ast.Assign:
+    return _plain_assignment(SIZE_ASSIGN, name=get_size_key(key_name))
+
+
+def sha256_assign_template(key_name: str) -> ast.Assign:
+    return _plain_assignment(SHA256_ASSIGN, name=get_sha256_key(key_name))
+
+
+def modified_at_assign_template(key_name: str) -> ast.Assign:
+    return _plain_assignment(MODIFIED_AT_ASSIGN, name=get_modified_at_key(key_name))
+
+
+RESPONSE_LENGTH = Skeleton("response.content_length = self.__hole_size__")
+
+CONTENT_HEADERS = Skeleton(
+    """{'Content-Length': str(self.__hole_size__), 'ETag': f'"{self.__hole_sha256__}"'}"""
+)
+
+
+def response_length_template(key_name: str) -> ast.Assign:
+    return _plain_assignment(RESPONSE_LENGTH, size=get_size_key(key_name))
+
+
+def content_headers_template(key_name: str) -> ast.expr:
+    """Response headers read from the metadata columns, not from the blob"""
+    headers = CONTENT_HEADERS.fill(
+        size=get_size_key(key_name), sha256=get_sha256_key(key_name)
+    )
+
+    if not isinstance(headers, ast.Expr):
+        raise Exception(f"Somehow this is not an expression {type(headers)}")
+
+    return headers.value
+
+
+NOT_MODIFIED = Skeleton("""
+    if not werkzeug.http.is_resource_modified(flask.request.environ, etag=self.__hole_sha256__, last_modified=self.__hole_modified_at__):
+        return flask.Response(status=304, headers={'ETag': f'"{self.__hole_sha256__}"'})
+    """)
+
+CONDITIONAL_RESPONSE = Skeleton("""
+    async def __hole_name__(self, request: starlette.requests.Request) -> starlette.responses.Response:
+        if self.__hole_check__(request.headers, self.__hole_sha256__, self.__hole_modified_at__):
+            return starlette.responses.Response(status_code=304, headers={'ETag': f'"{self.__hole_sha256__}"'})
+        return await self.__hole_getter__
+    """)
+
+NOT_MODIFIED_CHECK = Skeleton("""
+    @staticmethod
+    def __hole_name__(
+        headers: 'typing.Mapping[str, str]',
+        etag: str | None,
+        modified_at: 'datetime.datetime | None',
+    ) -> bool:
+        if_none_match = headers.get('if-none-match')
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix('W/').strip('"') for tag in if_none_match.split(',')]
+            return etag is not None and (etag in tags or '*' in tags)
+        if_modified_since = headers.get('if-modified-since')
+        if if_modified_since is None or modified_at is None:
+            return False
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=datetime.timezone.utc)
+        if modified_at.tzinfo is None:
+            modified_at = modified_at.replace(tzinfo=datetime.timezone.utc)
+        return modified_at.replace(microsecond=0) <= since
+    """)
+
+
+def not_modified_template(key_name: str) -> ast.If:
+    """Answers 304 from the metadata columns, before the blob is loaded"""
+    check = NOT_MODIFIED.fill(
+        sha256=get_sha256_key(key_name), modified_at=get_modified_at_key(key_name)
+    )
+
+    if not isinstance(check, ast.If):
+        raise Exception(f"Somehow this is not an If {type(check)}")
+
+    return check
+
+
+def is_not_modified(stmt: ast.stmt) -> bool:
+    return isinstance(stmt, ast.If) and any(
+        isinstance(node, ast.Attribute) and node.attr == "is_resource_modified"
+        for node in ast.walk(stmt.test)
+    )
+
+
+def conditional_response_template(key_name: str) -> ast.AsyncFunctionDef:
+    fun = CONDITIONAL_RESPONSE.fill(
+        name=starlette_response_name(key_name),
+        check=not_modified_name(),
+        sha256=get_sha256_key(key_name),
+        modified_at=get_modified_at_key(key_name),
+        getter=starlette_get_name(key_name),
+    )
+
+    if not isinstance(fun, ast.AsyncFunctionDef):
         raise Exception(f"Somehow this is not a function {type(fun)}")
 
     return fun
+
+
+def not_modified_check_template() -> ast.FunctionDef:
+    return _function(NOT_MODIFIED_CHECK, name=not_modified_name())
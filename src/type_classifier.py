@@ -0,0 +1,102 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Literal
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import inspect
+from sqlalchemy.sql import sqltypes
+from sqlalchemy.types import TypeDecorator, TypeEngine
+
+from discovery.static import (
+    STATIC_BINARY_FIELDS,
+    STATIC_STRING_FIELDS,
+    DiscoveredColumn,
+)
+
+"""Binary and string column detection by type class.
+
+A column type is classified by the SQLAlchemy type it is, through its MRO, so
+dialect types like postgresql.BYTEA or mysql.LONGBLOB are found, and a
+TypeDecorator is classified by the type it wraps. Results are memoized per
+type class, and the columns of a mapped class are classified once.
+"""
+
+ColumnKind = Literal["binary"] | Literal["string"] | Literal["other"]
+
+# Stores python objects, not files
+NOT_BINARY: tuple[type, ...] = (sqltypes.PickleType,)
+
+# String subclasses holding something else than free text
+NOT_STRING: tuple[type, ...] = (sqltypes.Enum,)
+
+
+@lru_cache(maxsize=None)
+def classify_type_class(type_class: type) -> ColumnKind:
+    if issubclass(type_class, NOT_BINARY) or issubclass(type_class, NOT_STRING):
+        return "other"
+    if issubclass(type_class, TypeDecorator):
+        impl = type_class.impl
+        return classify_type_class(impl if isinstance(impl, type) else type(impl))
+    if issubclass(type_class, sqltypes._Binary):
+        return "binary"
+    if issubclass(type_class, sqltypes.String):
+        return "string"
+    return "other"
+
+
+def classify_type(sa_type: TypeEngine | type) -> ColumnKind:
+    if isinstance(sa_type, TypeDecorator) and not issubclass(
+        type(sa_type), NOT_BINARY + NOT_STRING
+    ):
+        # The instance may wrap another impl than its class declares
+        return classify_type(sa_type.impl_instance)
+    return classify_type_class(sa_type if isinstance(sa_type, type) else type(sa_type))
+
+
+def type_name(sa_type: TypeEngine, kind: ColumnKind) -> str:
+    """A name DiscoveredClass files under the same kind"""
+    name = type(sa_type).__name__.upper()
+    if kind == "binary":
+        return name if name in STATIC_BINARY_FIELDS else "LARGEBINARY"
+    if kind == "string":
+        return name if name in STATIC_STRING_FIELDS else "STRING"
+    if name in STATIC_BINARY_FIELDS or name in STATIC_STRING_FIELDS:
+        return "OTHER"
+    return name
+
+
+@dataclass
+class ClassColumns:
+    columns: dict[str, DiscoveredColumn] = field(default_factory=dict)
+    file_keys: list[str] = field(default_factory=list)
+    string_keys: list[str] = field(default_factory=list)
+    with_nullable: bool = False
+
+
+_CLASS_COLUMNS: "WeakKeyDictionary[type, ClassColumns]" = WeakKeyDictionary()
+
+
+def class_columns(class_object: Any, with_nullable: bool = False) -> ClassColumns:
+    """The classified columns of a mapped class, computed once per class
+
+    Nullability is only read for rename detection, it is None otherwise.
+    """
+    cached = _CLASS_COLUMNS.get(class_object)
+    if cached is not None and (cached.with_nullable or not with_nullable):
+        return cached
+    result = ClassColumns(with_nullable=with_nullable)
+    for position, column in enumerate(inspect(class_object).mapper.columns):
+        if not hasattr(column, "key"):
+            continue
+        kind = classify_type(column.type)
+        # A column_property expression is a Label, it has no nullability
+        nullable = getattr(column, "nullable", None) if with_nullable else None
+        result.columns[column.key] = DiscoveredColumn(
+            column.key, type_name(column.type, kind), nullable, position
+        )
+        if kind == "binary":
+            result.file_keys.append(column.key)
+        elif kind == "string":
+            result.string_keys.append(column.key)
+    _CLASS_COLUMNS[class_object] = result
+    return result
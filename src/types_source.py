@@ -9,3 +9,20 @@ class FileFields(TypedDict, total=False):
     file_name_fix: str
     name_unhandled: bool
     unhandled: bool
+    content_metadata: bool
+
+
+BINARY_FIELDS = [f.upper() for f in ["LargeBinary", "BINARY", "BLOB"]]
+
+STRING_FIELDS = [
+    f.upper()
+    for f in [
+        "String",
+        "Text",
+        "NCHAR",
+        "NVARCHAR",
+        "VARCHAR",
+        "Unicode",
+        "UnicodeText",
+    ]
+]
@@ -1,7 +1,6 @@
 import ast
 import types
 from typing import TypeAlias
-from ast_comments import parse, unparse
 
 WalkableClasses: TypeAlias = (
     ast.Module
@@ -21,6 +20,197 @@ WalkableClasses: TypeAlias = (
 )
 
 
+def member_names(node: ast.AST) -> list[str]:
+    """The names a body member is looked up by"""
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return [node.name]
+    if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+        return [node.target.id]
+    if isinstance(node, ast.Assign):
+        return [target.id for target in node.targets if isinstance(target, ast.Name)]
+    return []
+
+
+def set_member_name(node: ast.AST, name: str) -> None:
+    """Renames a function, a class or the target of an assignment in place"""
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        node.name = name
+    elif isinstance(node, ast.AnnAssign):
+        node.target = ast.Name(name)
+    elif isinstance(node, ast.Assign):
+        node.targets[0] = ast.Name(name)
+    else:
+        raise ValueError(f"{node} is not a named member")
+
+
+class IndexedBody(list):
+    """A statement list that maps member names to nodes and positions
+
+    Name maps are updated as nodes are inserted, removed and renamed through
+    rename, positions are recomputed lazily after the first structural change.
+    A lookup drops the nodes that don't carry the name any more.
+    """
+
+    _by_name: dict[str, list[ast.AST]] | None = None
+    _names_of: dict[int, list[str]] | None = None
+    _positions: dict[int, int] | None = None
+
+    def _names(self) -> dict[str, list[ast.AST]]:
+        if self._by_name is None:
+            self._by_name = {}
+            self._names_of = {}
+            for node in self:
+                self._add(node)
+        return self._by_name
+
+    def _add(self, node: ast.AST) -> None:
+        if self._by_name is None or self._names_of is None:
+            return
+        names = member_names(node)
+        self._names_of[id(node)] = names
+        for name in names:
+            self._by_name.setdefault(name, []).append(node)
+
+    def _discard(self, node: ast.AST) -> None:
+        if self._by_name is None or self._names_of is None:
+            return
+        for name in self._names_of.pop(id(node), []):
+            nodes = self._by_name.get(name, [])
+            if node in nodes:
+                nodes.remove(node)
+
+    def invalidate(self) -> None:
+        self._by_name = None
+        self._names_of = None
+        self._positions = None
+
+    def _reindex(self, node: ast.AST) -> None:
+        if self._by_name is None or node not in self:
+            return
+        self._discard(node)
+        self._add(node)
+
+    def rename(self, node: ast.AST, name: str) -> None:
+        # The names it was indexed under are kept by id, set_member_name is safe
+        set_member_name(node, name)
+        self._reindex(node)
+
+    def named(self, name: str) -> list[ast.AST]:
+        """Members carrying the name, in body order"""
+        nodes = self._names().get(name, [])
+        stale = [node for node in nodes if name not in member_names(node)]
+        for node in stale:
+            # Renamed behind the index, filed under its new name
+            self._reindex(node)
+        if len(nodes) > 1:
+            return sorted(nodes, key=self.position)
+        return list(nodes)
+
+    def position(self, node: ast.AST) -> int:
+        if self._positions is None:
+            self._positions = {id(entry): index for index, entry in enumerate(self)}
+        position = self._positions.get(id(node))
+        if position is None:
+            raise ValueError(f"{node} is not in the body")
+        return position
+
+    def __contains__(self, node: object) -> bool:
+        try:
+            self.position(node)  # type: ignore
+            return True
+        except ValueError:
+            return False
+
+    def index(self, node: ast.AST, *args) -> int:  # type: ignore
+        if args:
+            return super().index(node, *args)
+        return self.position(node)
+
+    def insert(self, index, node: ast.AST) -> None:  # type: ignore
+        super().insert(index, node)
+        self._positions = None
+        self._add(node)
+
+    def append(self, node: ast.AST) -> None:
+        if self._positions is not None:
+            self._positions[id(node)] = len(self)
+        super().append(node)
+        self._add(node)
+
+    def remove(self, node: ast.AST) -> None:
+        del self[self.position(node)]
+
+    def pop(self, index=-1) -> ast.AST:  # type: ignore
+        node = super().pop(index)
+        self._positions = None
+        self._discard(node)
+        return node
+
+    def __setitem__(self, index, value) -> None:  # type: ignore
+        if not isinstance(index, int):
+            super().__setitem__(index, value)
+            self.invalidate()
+            return
+        old = self[index]
+        super().__setitem__(index, value)
+        self._discard(old)
+        self._add(value)
+        if self._positions is not None:
+            self._positions.pop(id(old), None)
+            self._positions[id(value)] = index if index >= 0 else len(self) + index
+
+    def __delitem__(self, index) -> None:  # type: ignore
+        if not isinstance(index, int):
+            super().__delitem__(index)
+            self.invalidate()
+            return
+        node = self[index]
+        super().__delitem__(index)
+        self._positions = None
+        self._discard(node)
+
+    def extend(self, nodes) -> None:  # type: ignore
+        super().extend(nodes)
+        self.invalidate()
+
+    def __iadd__(self, nodes):  # type: ignore
+        self.extend(nodes)
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self.invalidate()
+
+    def sort(self, *args, **kwargs) -> None:
+        super().sort(*args, **kwargs)
+        self._positions = None
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._positions = None
+
+    def __reduce__(self):  # type: ignore
+        # The maps are keyed by node ids, copies start without them
+        return (IndexedBody, (list(self),))
+
+
+def body_index(_class: WalkableClasses) -> IndexedBody:
+    """Swaps the body of the node for an indexed one, once"""
+    body = _class.body
+    if not isinstance(body, IndexedBody):
+        body = IndexedBody(body)
+        _class.body = body  # type: ignore
+    return body
+
+
+def rename_member(node: ast.AST, name: str, _class: WalkableClasses) -> None:
+    """Renames a member of the body in place, keeping its index in step"""
+    if isinstance(_class.body, IndexedBody):
+        _class.body.rename(node, name)
+    else:
+        set_member_name(node, name)
+
+
 def is_property(fun: ast.FunctionDef | ast.AsyncFunctionDef) -> bool:
     has_property_decorator = next(
         (
@@ -33,24 +223,86 @@ def is_property(fun: ast.FunctionDef | ast.AsyncFunctionDef) -> bool:
     return has_property_decorator is not None
 
 
-def as_text_replace_content(
-    old_var: str,
-    new_var: str,
-    _obj: WalkableClasses,
-) -> None:
-    """Simple replace in a stringified code segment
-        This does not manage any similarly named variables, avoid using those in the class
+class SymbolRenamer(ast.NodeTransformer):
+    """Renames the references to class members in a single pass
+
+    Loaded names of the class scope (decorators like @old.setter included)
+    and attributes of self, cls or the class itself are renamed. Definitions
+    are left to the templates. Bare names inside function bodies are locals or
+    globals, those are kept.
+    """
+
+    def __init__(
+        self, renames: dict[str, str], owners: set[str], definitions: set[int]
+    ) -> None:
+        self.renames = renames
+        self.owners = owners
+        self.definitions = definitions
+        self.in_function = False
+
+    def visit_FunctionDef(
+        self, node: ast.FunctionDef | ast.AsyncFunctionDef
+    ) -> ast.AST:
+        for field in ["decorator_list", "args", "returns"]:
+            value = getattr(node, field)
+            for child in value if isinstance(value, list) else [value]:
+                if child is not None:
+                    self.visit(child)
+        in_function, self.in_function = self.in_function, True
+        for statement in node.body:
+            self.visit(statement)
+        self.in_function = in_function
+        return node
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node: ast.Lambda) -> ast.Lambda:
+        self.visit(node.args)
+        in_function, self.in_function = self.in_function, True
+        self.visit(node.body)
+        self.in_function = in_function
+        return node
+
+    def visit_Name(self, node: ast.Name) -> ast.Name:
+        # Template built names carry no ctx, those are references
+        stored = isinstance(getattr(node, "ctx", None), (ast.Store, ast.Del))
+        if stored or self.in_function or id(node) in self.definitions:
+            return node
+        if node.id in self.renames:
+            node.id = self.renames[node.id]
+        return node
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.Attribute:
+        if (
+            node.attr in self.renames
+            and isinstance(node.value, ast.Name)
+            and node.value.id in self.owners
+        ):
+            node.attr = self.renames[node.attr]
+        self.generic_visit(node)
+        return node
+
+
+def rename_symbols(renames: dict[str, str], _obj: WalkableClasses) -> None:
+    """Renames every reference of the old names inside the node
 
     Args:
-        old_var (str): The string of the old variable
-        new_var (str): The string of the new_variable
-        _class (ast.ClassDef): The class containing the file key
+        renames (dict[str, str]): Old name to new name, applied at once
+        _obj (WalkableClasses): The class, or a member of it, to rename in
     """
-    as_text = unparse(ast.fix_missing_locations(_obj))
-    as_text.replace(old_var, new_var)
-    as_ast: ast.Module = parse(as_text)  # type: ignore
-    _obj.body = as_ast.body[0].body  # type: ignore
-    return
+    renames = {old: new for old, new in renames.items() if old != new}
+    if not renames:
+        return
+    owners = {"self", "cls"}
+    definitions: set[int] = set()
+    if isinstance(_obj, ast.ClassDef):
+        owners.add(_obj.name)
+        for member in _obj.body:
+            if isinstance(member, ast.AnnAssign):
+                definitions.add(id(member.target))
+            elif isinstance(member, ast.Assign):
+                definitions.update(id(target) for target in member.targets)
+    SymbolRenamer(renames, owners, definitions).visit(_obj)
 
 
 def rename_property_key_reference(
@@ -58,10 +310,10 @@ def rename_property_key_reference(
 ) -> None:
     getter = get_property_getter(property_name, _class)
     if getter:
-        as_text_replace_content(old_reference, new_reference, getter)
+        rename_symbols({old_reference: new_reference}, getter)
     setter = get_property_setter(property_name, _class)
     if setter:
-        as_text_replace_content(old_reference, new_reference, setter)
+        rename_symbols({old_reference: new_reference}, setter)
     return
 
 
@@ -82,11 +334,11 @@ def rename_property_key_name(
     old_property_name: str, new_property_name: str, _class: ast.ClassDef
 ) -> None:
     getter = get_property_getter(old_property_name, _class)
-    if getter:
-        getter.name = new_property_name
     setter = get_property_setter(old_property_name, _class)
+    if getter:
+        rename_member(getter, new_property_name, _class)
     if setter:
-        setter.name = new_property_name
+        rename_member(setter, new_property_name, _class)
         rename_decorator_setter(
             old_property_name, new_property_name, setter.decorator_list
         )
@@ -116,9 +368,8 @@ def get_property_setter(
     return next(
         (
             fn
-            for fn in _class.body
+            for fn in body_index(_class).named(property_name)
             if isinstance(fn, (ast.FunctionDef, ast.AsyncFunctionDef))
-            and fn.name == property_name
             and is_property_setter(fn, property_name)
         ),
         None,
@@ -131,9 +382,8 @@ def get_property_getter(
     return next(
         (
             fn
-            for fn in _class.body
+            for fn in body_index(_class).named(property_name)
             if isinstance(fn, (ast.FunctionDef, ast.AsyncFunctionDef))
-            and fn.name == property_name
             and is_property(fn)
         ),
         None,
@@ -143,26 +393,8 @@ def get_property_getter(
 def turn_property_to_attribute(
     property_name: str, attribute_: ast.AnnAssign, _class: ast.ClassDef
 ) -> None:
-    property_getter = next(
-        (
-            fn
-            for fn in _class.body
-            if isinstance(fn, (ast.FunctionDef, ast.AsyncFunctionDef))
-            and fn.name == property_name
-            and is_property(fn)
-        ),
-        None,
-    )
-    property_setter = next(
-        (
-            fn
-            for fn in _class.body
-            if isinstance(fn, (ast.FunctionDef, ast.AsyncFunctionDef))
-            and fn.name == property_name
-            and is_property_setter(fn, property_name)
-        ),
-        None,
-    )
+    property_getter = get_property_getter(property_name, _class)
+    property_setter = get_property_setter(property_name, _class)
     index_element = property_getter or property_setter
     _class.body.insert(
         _class.body.index(index_element) if index_element else 0,
@@ -176,16 +408,7 @@ def turn_property_to_attribute(
 
 
 def purge_attribute(attribute_name: str, _class: WalkableClasses) -> None:
-    attribute = next(
-        (
-            atr
-            for atr in _class.body
-            if isinstance(atr, ast.AnnAssign)
-            and isinstance(atr.target, ast.Name)
-            and atr.target.id == attribute_name
-        ),
-        None,
-    )
+    attribute = get_attribute(attribute_name, _class)
     if attribute:
         _class.body.remove(attribute)
 
@@ -236,23 +459,14 @@ def add_attribute_if_not_exists(
 def get_attribute_index(attribute_name: str, _class: ast.ClassDef) -> int | None:
     atr = get_attribute(attribute_name, _class)
     if atr:
-        return _class.body.index(atr)
+        return body_index(_class).position(atr)
     return None
 
 
 def switch_attributes(
     attribute_name: str, attribute_: ast.AnnAssign, _class: WalkableClasses
 ) -> None:
-    attribute = next(
-        (
-            atr
-            for atr in _class.body
-            if isinstance(atr, ast.AnnAssign)
-            and isinstance(atr.target, ast.Name)
-            and atr.target.id == attribute_name
-        ),
-        None,
-    )
+    attribute = get_attribute(attribute_name, _class)
     index = _class.body.index(attribute) if attribute else 0
     _class.body.insert(index, attribute_)
     if attribute:
@@ -266,16 +480,7 @@ def turn_attribute_into_property(
     setter: ast.AsyncFunctionDef | ast.FunctionDef | None,
     _class: WalkableClasses,
 ) -> None:
-    attribute = next(
-        (
-            atr
-            for atr in _class.body
-            if isinstance(atr, ast.AnnAssign)
-            and isinstance(atr.target, ast.Name)
-            and atr.target.id == attribute_name
-        ),
-        None,
-    )
+    attribute = get_attribute(attribute_name, _class)
 
     index = _class.body.index(attribute) if attribute else 0
 
@@ -291,10 +496,8 @@ def get_attribute(attribute_name: str, _class: WalkableClasses) -> ast.AnnAssign
     return next(
         (
             atr
-            for atr in _class.body
+            for atr in body_index(_class).named(attribute_name)
             if isinstance(atr, ast.AnnAssign)
-            and isinstance(atr.target, ast.Name)
-            and atr.target.id == attribute_name
         ),
         None,
     )
@@ -306,14 +509,8 @@ def get_assign(
     return next(
         (
             atr
-            for atr in _class.body
+            for atr in body_index(_class).named(assign_name)
             if isinstance(atr, ast.Assign)
-            and any(
-                (
-                    isinstance(target, ast.Name) and target.id == assign_name
-                    for target in atr.targets
-                )
-            )
             and (single_target is False or len(atr.targets) == 1)
         ),
         None,
@@ -324,8 +521,8 @@ def get_class(class_name: str, module: WalkableClasses) -> ast.ClassDef | None:
     return next(
         (
             atr
-            for atr in module.body
-            if isinstance(atr, ast.ClassDef) and atr.name == class_name
+            for atr in body_index(module).named(class_name)
+            if isinstance(atr, ast.ClassDef)
         ),
         None,
     )
@@ -339,8 +536,22 @@ def get_function(
     return next(
         (
             atr
-            for atr in _module.body
-            if isinstance(atr, ast.FunctionDef) and atr.name == function_name
+            for atr in body_index(_module).named(function_name)
+            if isinstance(atr, ast.FunctionDef)
+        ),
+        None,
+    )
+
+
+def get_async_function(
+    function_name: str,
+    module: WalkableClasses,
+) -> ast.AsyncFunctionDef | None:
+    return next(
+        (
+            atr
+            for atr in body_index(module).named(function_name)
+            if isinstance(atr, ast.AsyncFunctionDef)
         ),
         None,
     )
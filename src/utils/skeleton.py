@@ -0,0 +1,141 @@
+import ast
+import re
+import textwrap
+from copy import deepcopy
+from typing import Any, Callable, TypeAlias
+
+"""Parse once templates.
+
+A template is parsed a single time into a skeleton with named holes, written
+as __hole_<name>__ in place of an identifier or a whole string literal. The
+skeleton is compiled into a constructor function, filling it builds fresh
+nodes directly without going through the parser again.
+
+Hole values:
+    str: the identifier or string it stands for
+    ast.expr: in place of a name, inserted as the expression itself
+    None: the statement holding the hole is left out
+"""
+
+HoleValue: TypeAlias = str | ast.expr | None
+
+HOLE = re.compile(r"^__hole_(\w+?)__$")
+
+
+def hole_name(value: object) -> str | None:
+    if not isinstance(value, str):
+        return None
+    match = HOLE.match(value)
+    return match.group(1) if match else None
+
+
+def _name(value: HoleValue, ctx: ast.expr_context) -> ast.expr:
+    if isinstance(value, str):
+        return ast.Name(id=value, ctx=ctx)
+    if isinstance(value, ast.expr):
+        return value
+    raise ValueError(f"Can't place {value!r} as a name")
+
+
+class _Compiler:
+    """Turns a node into the source of an expression constructing it"""
+
+    def __init__(self, uses: dict[str, int]) -> None:
+        self.types: dict[str, type] = {}
+        self.uses = uses
+
+    def hole(self, name: str) -> str:
+        # A hole filled with an expression more than once gets copies
+        return f"_copy(h_{name})" if self.uses[name] > 1 else f"h_{name}"
+
+    def node(self, node: ast.AST) -> str:
+        kind = type(node)
+        if isinstance(node, ast.expr_context):
+            # Shared like the parser shares them
+            self.types[f"_{kind.__name__}_ctx"] = kind()
+            return f"_{kind.__name__}_ctx"
+        self.types[f"_{kind.__name__}"] = kind
+        if isinstance(node, ast.Name) and hole_name(node.id):
+            hole = self.hole(hole_name(node.id))  # type: ignore
+            return f"_name({hole}, {self.node(node.ctx)})"
+        fields = ", ".join(
+            f"{field}={self.value(getattr(node, field, None))}"
+            for field in node._fields
+        )
+        return f"_{kind.__name__}({fields})"
+
+    def value(self, value: Any) -> str:
+        if isinstance(value, ast.AST):
+            return self.node(value)
+        if isinstance(value, list):
+            return self.statements(value)
+        name = hole_name(value)
+        if name:
+            return self.hole(name)
+        return repr(value)
+
+    def statements(self, items: list) -> str:
+        parts = []
+        for item in items:
+            code = self.value(item)
+            holes = _own_holes(item) if isinstance(item, ast.stmt) else []
+            if holes:
+                present = " and ".join(f"h_{hole} is not None" for hole in holes)
+                parts.append(f"*([{code}] if {present} else [])")
+            else:
+                parts.append(code)
+        return f"[{', '.join(parts)}]"
+
+
+def _hole_uses(node: ast.AST) -> dict[str, int]:
+    uses: dict[str, int] = {}
+    for child in ast.walk(node):
+        for field in child._fields:
+            name = hole_name(getattr(child, field, None))
+            if name:
+                uses[name] = uses.get(name, 0) + 1
+    return uses
+
+
+def _own_holes(node: ast.AST, found: list[str] | None = None) -> list[str]:
+    """Holes of the statement, nested statements hold their own"""
+    found = [] if found is None else found
+    for field in node._fields:
+        value = getattr(node, field, None)
+        for item in value if isinstance(value, list) else [value]:
+            name = hole_name(item)
+            if name and name not in found:
+                found.append(name)
+            elif isinstance(item, ast.AST) and not isinstance(item, ast.stmt):
+                _own_holes(item, found)
+    return found
+
+
+class Skeleton:
+    def __init__(self, template: str) -> None:
+        module = ast.parse(textwrap.dedent(template))
+        if len(module.body) != 1:
+            raise ValueError("A template holds exactly one statement")
+        self.template = module.body[0]
+
+        uses = _hole_uses(self.template)
+        self.holes = sorted(uses)
+        compiler = _Compiler(uses)
+        code = compiler.node(self.template)
+        arguments = ", ".join(f"h_{hole}" for hole in self.holes)
+        scope: dict[str, Any] = {"_name": _name, "_copy": _copy, **compiler.types}
+        source = f"lambda {arguments}: {code}" if arguments else f"lambda: {code}"
+        self._build: Callable[..., ast.stmt] = eval(
+            compile(source, f"<skeleton {type(self.template).__name__}>", "eval"),
+            scope,
+        )
+
+    def fill(self, **values: HoleValue) -> ast.stmt:
+        missing = set(self.holes) - set(values)
+        if missing:
+            raise ValueError(f"Missing template holes: {sorted(missing)}")
+        return self._build(**{f"h_{hole}": values[hole] for hole in self.holes})
+
+
+def _copy(value: HoleValue) -> HoleValue:
+    return deepcopy(value) if isinstance(value, ast.AST) else value
@@ -0,0 +1,124 @@
+import ast
+from copy import deepcopy
+import pickle
+import unittest
+
+from ast_comments import parse, unparse
+
+from utils.ast_tools import (
+    IndexedBody,
+    body_index,
+    get_assign,
+    get_attribute,
+    get_attribute_index,
+    get_property_getter,
+    get_property_setter,
+    purge_property,
+    get_function,
+    rename_member,
+    rename_property_key_name,
+    switch_attributes,
+)
+
+SOURCE = """class TestClass(Base):
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name = Column(String)
+    file: Mapped[bytes] = mapped_column(LargeBinary)
+
+    @property
+    def data(self) -> bytes:
+        return self.file
+
+    @data.setter
+    def data(self, value: bytes) -> None:
+        self.file = value
+"""
+
+
+class IndexedBodyTest(unittest.TestCase):
+    def plan(self) -> ast.ClassDef:
+        module: ast.Module = parse(SOURCE)  # type: ignore
+        return module.body[0]  # type: ignore
+
+    def assert_positions(self, _class: ast.ClassDef) -> None:
+        body = body_index(_class)
+        for position, node in enumerate(list(body)):
+            self.assertEqual(body.position(node), position)
+
+    def test_lookups(self) -> None:
+        _class = self.plan()
+        body = _class.body
+
+        self.assertIs(get_attribute("file", _class), body[2])
+        self.assertEqual(get_attribute_index("file", _class), 2)
+        self.assertIs(get_assign("name", _class), body[1])
+        self.assertIs(get_property_getter("data", _class), body[3])
+        self.assertIs(get_property_setter("data", _class), body[4])
+        self.assertIsInstance(_class.body, IndexedBody)
+
+    def test_follows_inserts_and_removes(self) -> None:
+        _class = self.plan()
+        added: ast.AnnAssign = parse("extra: Mapped[str]").body[0]  # type: ignore
+        self.assertIsNone(get_attribute("extra", _class))
+
+        _class.body.insert(0, added)
+        self.assertIs(get_attribute("extra", _class), added)
+        self.assertEqual(get_attribute_index("file", _class), 3)
+        self.assert_positions(_class)
+
+        switch_attributes("file", parse("file: bytes").body[0], _class)  # type: ignore
+        self.assertEqual(unparse(get_attribute("file", _class)), "file: bytes")
+        self.assert_positions(_class)
+
+        _class.body.pop(get_attribute_index("extra", _class))
+        self.assertIsNone(get_attribute("extra", _class))
+        self.assert_positions(_class)
+
+        purge_property("data", _class)
+        self.assertIsNone(get_property_getter("data", _class))
+        self.assertIsNone(get_property_setter("data", _class))
+        self.assertEqual(len(_class.body), 3)
+
+    def test_follows_item_assignment(self) -> None:
+        _class = self.plan()
+        index = get_attribute_index("file", _class)
+        assert index is not None
+        _class.body[index] = parse("blob: bytes").body[0]  # type: ignore
+
+        self.assertIsNone(get_attribute("file", _class))
+        self.assertEqual(get_attribute_index("blob", _class), index)
+
+    def test_rename_in_place(self) -> None:
+        _class = self.plan()
+        rename_property_key_name("data", "content", _class)
+        self.assertIsNone(get_property_getter("data", _class))
+        self.assertIsNotNone(get_property_getter("content", _class))
+        self.assertIsNotNone(get_property_setter("content", _class))
+
+        attribute = get_attribute("file", _class)
+        assert attribute
+        rename_member(attribute, "blob", _class)
+        self.assertIs(get_attribute("blob", _class), attribute)
+        self.assertIsNone(get_attribute("file", _class))
+
+    def test_lookup_drops_members_renamed_behind_the_index(self) -> None:
+        _class = ast.parse("class A:\n    def old(self): ...").body[0]
+        assert isinstance(_class, ast.ClassDef)
+        function = get_function("old", _class)
+        assert function
+
+        function.name = "new"
+
+        self.assertIsNone(get_function("old", _class))
+        self.assertIs(get_function("new", _class), function)
+
+    def test_copies_rebuild_the_index(self) -> None:
+        _class = self.plan()
+        get_attribute("file", _class)
+
+        for copied in [deepcopy(_class), pickle.loads(pickle.dumps(_class))]:
+            attribute = get_attribute("file", copied)
+            self.assertIsNotNone(attribute)
+            self.assertIsNot(attribute, get_attribute("file", _class))
+            self.assertEqual(get_attribute_index("file", copied), 2)
+            self.assertEqual(unparse(copied), unparse(_class))
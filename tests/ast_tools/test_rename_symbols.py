@@ -0,0 +1,64 @@
+import ast
+import unittest
+
+from ast_comments import parse, unparse
+
+from utils.ast_tools import get_property_getter, rename_symbols
+
+SOURCE = """class TestClass(Base):
+    file_static_mime_type: Literal['application/pdf'] = 'application/pdf'
+
+    @property
+    def file_flask(self) -> FileStorage:
+        file_flask = self.file_static_mime_type
+        return FileStorage(self.file, content_type=TestClass.file_static_mime_type)
+
+    @file_flask.setter
+    def file_flask(self, file: FileStorage) -> None:
+        other.file_static_mime_type = file_flask
+        self.file = file.read()
+"""
+
+
+class RenameSymbolsTest(unittest.TestCase):
+    def plan(self) -> ast.ClassDef:
+        module: ast.Module = parse(SOURCE)  # type: ignore
+        return module.body[0]  # type: ignore
+
+    def test_references_only(self) -> None:
+        _class = self.plan()
+        rename_symbols(
+            {
+                "file_static_mime_type": "doc_static_mime_type",
+                "file_flask": "doc_flask",
+            },
+            _class,
+        )
+        text = unparse(_class)
+
+        # Definitions are managed by the templates
+        self.assertIn("file_static_mime_type: Literal", text)
+        self.assertIn("def file_flask(self)", text)
+        self.assertIsNotNone(get_property_getter("file_flask", _class))
+        # References are renamed
+        self.assertIn("@doc_flask.setter", text)
+        self.assertIn("= self.doc_static_mime_type", text)
+        self.assertIn("content_type=TestClass.doc_static_mime_type", text)
+        # Locals, globals and foreign attributes are kept
+        self.assertIn("file_flask = self", text)
+        self.assertIn("= file_flask\n", text)
+        self.assertIn("other.file_static_mime_type", text)
+
+    def test_batch_is_single_pass(self) -> None:
+        _class = self.plan()
+        rename_symbols({"file": "blob", "blob": "file"}, _class)
+        text = unparse(_class)
+
+        self.assertIn("self.blob = file.read()", text)
+        self.assertIn("FileStorage(self.blob,", text)
+
+    def test_nothing_to_rename(self) -> None:
+        _class = self.plan()
+        rename_symbols({"file_flask": "file_flask"}, _class)
+
+        self.assertEqual(unparse(_class), unparse(self.plan()))
@@ -0,0 +1,99 @@
+import builtins
+import os
+import sys
+from tempfile import NamedTemporaryFile
+import unittest
+from unittest import mock
+
+from auto_resolve import confident_pick, score_candidates
+from discovery.static import DiscoveredClass, DiscoveredColumn
+from executor import NewKeyAction
+from runtime import Runtime
+from settings import SETTINGS
+
+sys.path.append(os.path.join(os.getcwd(), "tests"))
+
+from donor_files.file_maker import plan_file
+from inputs.new_file_name_inputs import get_file_name_input
+from inputs.new_key_inputs import new_key_start
+
+
+def discovered(*columns: tuple[str, str]) -> DiscoveredClass:
+    return DiscoveredClass(
+        "TestClass",
+        [
+            DiscoveredColumn(key, type_name, True, position)
+            for position, (key, type_name) in enumerate(columns)
+        ],
+    )
+
+
+class ScoreTest(unittest.TestCase):
+    def pick(self, kind, key_name, columns) -> str | None:
+        column_types = dict(columns)
+        candidates = [k for k, t in columns if t != "LARGEBINARY"]
+        binaries = [k for k, t in columns if t == "LARGEBINARY"]
+        return confident_pick(
+            score_candidates(kind, key_name, column_types, candidates, binaries)
+        )
+
+    def test_conventional_names(self) -> None:
+        columns = [
+            ("id", "INTEGER"),
+            ("title", "STRING"),
+            ("avatar", "LARGEBINARY"),
+            ("avatarContentType", "STRING"),
+            ("avatar_filename", "STRING"),
+        ]
+
+        self.assertEqual(self.pick("mime", "avatar", columns), "avatarContentType")
+        self.assertEqual(self.pick("file_name", "avatar", columns), "avatar_filename")
+
+    def test_generic_names_go_to_their_own_key(self) -> None:
+        columns = [
+            ("image", "LARGEBINARY"),
+            ("mime_type", "STRING"),
+            ("thumb", "LARGEBINARY"),
+            ("thumb_mime_type", "STRING"),
+        ]
+
+        self.assertEqual(self.pick("mime", "image", columns), "mime_type")
+        self.assertEqual(self.pick("mime", "thumb", columns), "thumb_mime_type")
+
+    def test_ambiguous_is_not_picked(self) -> None:
+        columns = [
+            ("image", "LARGEBINARY"),
+            ("first_name", "STRING"),
+            ("last_name", "STRING"),
+        ]
+
+        self.assertIsNone(self.pick("file_name", "image", columns))
+        self.assertIsNone(self.pick("mime", "image", columns))
+
+
+@mock.patch.object(SETTINGS, "auto_resolve", True)
+class AutoResolveRuntimeTest(unittest.TestCase):
+    def test_prompts_only_for_the_ambiguous_part(self) -> None:
+        with NamedTemporaryFile("w+") as history_temp_file:
+            plan_file(history_temp_file, {})
+            history_temp_file.flush()
+            user_inputs = new_key_start(False) + get_file_name_input("static")
+            with mock.patch.object(builtins, "input", lambda _: user_inputs.pop(0)):
+                with self.assertRaises(NewKeyAction) as NKA:
+                    Runtime(
+                        "./tests/donor_files/one_file.py",
+                        history_temp_file.name,
+                        "TestClass",
+                        discovered(
+                            ("id", "INTEGER"),
+                            ("file", "LARGEBINARY"),
+                            ("file_mime", "STRING"),
+                            ("first_name", "STRING"),
+                            ("last_name", "STRING"),
+                        ),
+                    )
+            self.assertEqual(user_inputs, [])
+            self.assertEqual(
+                NKA.exception.new_key,
+                {"mime_type_field_name": "file_mime", "file_name_fix": "binary.file"},
+            )
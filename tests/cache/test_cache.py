@@ -0,0 +1,85 @@
+import os
+from tempfile import TemporaryDirectory
+import unittest
+from unittest import mock
+
+from cache import RunCache, clear_cache
+from settings import SETTINGS
+
+
+class RunCacheTest(unittest.TestCase):
+    history = {"TestClass": {"file": {"unhandled": True}}, "Other": {}}
+
+    def plan(self, root: str, content: str = "class TestClass: ...\n") -> str:
+        file_name = os.path.join(root, "models.py")
+        with open(file_name, "w") as out_file:
+            out_file.write(content)
+        return file_name
+
+    def test_hit_after_record(self) -> None:
+        with TemporaryDirectory() as root:
+            cache_path = os.path.join(root, "cache.json")
+            file_name = self.plan(root)
+            cache = RunCache(cache_path)
+            self.assertFalse(cache.is_fresh(file_name, self.history))
+
+            cache.record(file_name, ["TestClass"], self.history)
+            cache.save()
+
+            reloaded = RunCache(cache_path)
+            self.assertTrue(reloaded.is_fresh(file_name, self.history))
+
+    def test_miss_on_content_change(self) -> None:
+        with TemporaryDirectory() as root:
+            cache = RunCache(os.path.join(root, "cache.json"))
+            file_name = self.plan(root)
+            cache.record(file_name, ["TestClass"], self.history)
+
+            self.plan(root, "class TestClass: pass\n")
+            self.assertFalse(cache.is_fresh(file_name, self.history))
+
+    def test_miss_on_history_change(self) -> None:
+        with TemporaryDirectory() as root:
+            cache = RunCache(os.path.join(root, "cache.json"))
+            file_name = self.plan(root)
+            cache.record(file_name, ["TestClass"], self.history)
+
+            unrelated = {**self.history, "Other": {"key": {"unhandled": True}}}
+            self.assertTrue(cache.is_fresh(file_name, unrelated))
+            changed = {"TestClass": {"file": {"mime_unhandled": True}}}
+            self.assertFalse(cache.is_fresh(file_name, changed))
+
+    def test_miss_on_other_tool_version(self) -> None:
+        with TemporaryDirectory() as root:
+            cache_path = os.path.join(root, "cache.json")
+            file_name = self.plan(root)
+            cache = RunCache(cache_path)
+            cache.record(file_name, ["TestClass"], self.history)
+            cache.tool_key = "0.0.0:other"
+            cache.save()
+
+            self.assertFalse(RunCache(cache_path).is_fresh(file_name, self.history))
+
+    def test_miss_on_other_write_mode(self) -> None:
+        with TemporaryDirectory() as root:
+            cache_path = os.path.join(root, "cache.json")
+            file_name = self.plan(root)
+            with mock.patch.object(SETTINGS, "write_mode", "unparse"):
+                cache = RunCache(cache_path)
+                cache.record(file_name, ["TestClass"], self.history)
+                cache.save()
+
+            with mock.patch.object(SETTINGS, "write_mode", "splice"):
+                reloaded = RunCache(cache_path)
+            self.assertFalse(reloaded.is_fresh(file_name, self.history))
+
+    def test_clear(self) -> None:
+        with TemporaryDirectory() as root:
+            cache_path = os.path.join(root, "cache.json")
+            cache = RunCache(cache_path)
+            cache.record(self.plan(root), [], self.history)
+            cache.save()
+
+            self.assertTrue(clear_cache(cache_path))
+            self.assertFalse(os.path.exists(cache_path))
+            self.assertFalse(clear_cache(cache_path))
@@ -0,0 +1,125 @@
+import builtins
+import os
+import sys
+from tempfile import NamedTemporaryFile
+import unittest
+from unittest import mock
+
+from yaml import dump
+
+from decisions import DecisionError, open_decisions
+from executor import (
+    ApplyHistoryAction,
+    NewKeyAction,
+    RemoveHistoryCleanAction,
+    RenameAction,
+)
+from planner import Planner
+from runtime import Runtime
+from settings import SETTINGS
+
+sys.path.append(os.path.join(os.getcwd(), "tests"))
+
+from donor_files.file_maker import plan_file
+
+
+def no_input(question: str) -> str:
+    raise AssertionError(f"Prompted with a decisions file: {question}")
+
+
+@mock.patch.object(builtins, "input", no_input)
+class DecisionsTest(unittest.TestCase):
+    file_path = "./tests/donor_files/one_file.py"
+
+    def plan(self, history: dict, decisions: dict):
+        with NamedTemporaryFile(
+            "w+", delete=False
+        ) as history_temp_file, NamedTemporaryFile(
+            "w+", suffix=".yaml", delete=False
+        ) as decisions_temp_file:
+            plan_file(history_temp_file, history)
+            history_temp_file.close()
+            decisions_temp_file.write(dump(decisions))
+            decisions_temp_file.close()
+            try:
+                with mock.patch.object(
+                    SETTINGS, "decisions_path", decisions_temp_file.name
+                ):
+                    runtime = Runtime(
+                        self.file_path,
+                        history_temp_file.name,
+                        "TestClass",
+                        auto_execute=False,
+                    )
+                    return Planner(runtime).plan()
+            finally:
+                os.remove(history_temp_file.name)
+                os.remove(decisions_temp_file.name)
+
+    def test_new_key(self) -> None:
+        plan = self.plan(
+            {},
+            {
+                "TestClass": {
+                    "file": {
+                        "mime": {"static": "image/png"},
+                        "file_name": {"dynamic": "name"},
+                    }
+                }
+            },
+        )
+
+        self.assertEqual([type(a) for a in plan.actions], [NewKeyAction])
+        self.assertEqual(
+            plan.history,
+            {"file": {"mime_type_fix": "image/png", "file_name_field_name": "name"}},
+        )
+
+    def test_content_metadata(self) -> None:
+        decisions = {
+            "TestClass": {
+                "file": {"mime": "static", "file_name": "static"},
+            }
+        }
+        with mock.patch.object(SETTINGS, "content_metadata", True):
+            default = self.plan({}, decisions)
+            decisions["TestClass"]["file"]["content_metadata"] = False
+            declined = self.plan({}, decisions)
+
+        self.assertTrue(default.history["file"]["content_metadata"])
+        self.assertFalse(declined.history["file"]["content_metadata"])
+
+    def test_rename_keeps_old_key(self) -> None:
+        plan = self.plan(
+            {"TestClass": {"old_key": {"mime_unhandled": True, "file_name_fix": "a"}}},
+            {"TestClass": {"file": {"rename_from": "old_key"}}},
+        )
+
+        self.assertEqual(
+            [type(a) for a in plan.actions], [RenameAction, ApplyHistoryAction]
+        )
+        self.assertEqual(
+            plan.history, {"file": {"mime_unhandled": True, "file_name_fix": "a"}}
+        )
+
+    def test_missing_key(self) -> None:
+        plan = self.plan(
+            {"TestClass": {"file": {"unhandled": True}, "gone": {"unhandled": True}}},
+            {"TestClass": {"gone": {"missing": "clean"}}},
+        )
+
+        self.assertEqual(
+            [type(a) for a in plan.actions],
+            [RemoveHistoryCleanAction, ApplyHistoryAction],
+        )
+
+    def test_uncovered_decision_fails(self) -> None:
+        with self.assertRaises(DecisionError):
+            self.plan({}, {"TestClass": {"other": {"unhandled": True}}})
+
+    def test_invalid_file_fails_on_load(self) -> None:
+        with NamedTemporaryFile("w+", suffix=".yaml") as decisions_temp_file:
+            decisions_temp_file.write(dump({"TestClass": {"file": {"mime": "static"}}}))
+            decisions_temp_file.flush()
+            with self.assertRaises(DecisionError):
+                open_decisions(decisions_temp_file.name)
@@ -0,0 +1,82 @@
+from types import ModuleType
+import unittest
+
+from discovery.registry import mapped_classes
+
+SOURCE = """
+from sqlalchemy import Column, Integer, LargeBinary, Table
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    declarative_base,
+    mapped_column,
+    registry,
+)
+
+Legacy = declarative_base()
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Declared(Legacy):
+    __tablename__ = "declared"
+    id = Column(Integer, primary_key=True)
+
+
+class Modern(Base):
+    __tablename__ = "modern"
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+
+class Abstract(Base):
+    __abstract__ = True
+
+
+imperative_registry = registry()
+
+
+class Imperative:
+    pass
+
+
+imperative_registry.map_imperatively(
+    Imperative,
+    Table(
+        "imperative",
+        imperative_registry.metadata,
+        Column("id", Integer, primary_key=True),
+        Column("data", LargeBinary),
+    ),
+)
+
+dataclass_registry = registry()
+
+
+@dataclass_registry.mapped_as_dataclass
+class AsDataclass:
+    __tablename__ = "as_dataclass"
+    id: Mapped[int] = mapped_column(primary_key=True, init=False)
+
+
+class Plain:
+    pass
+"""
+
+
+class MappedClassesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.module = ModuleType("registry_donor")
+        exec(SOURCE, vars(self.module))
+
+    def test_every_mapping_style(self) -> None:
+        self.assertEqual(
+            list(mapped_classes(self.module)),
+            ["AsDataclass", "Declared", "Imperative", "Modern"],
+        )
+
+    def test_class_names_filter(self) -> None:
+        self.assertEqual(
+            list(mapped_classes(self.module, ["Modern", "Plain"])), ["Modern"]
+        )
@@ -0,0 +1,123 @@
+import builtins
+import unittest
+from unittest import mock
+
+from discovery.static import discover_file, discover_source
+from executor import NewKeyAction
+from runtime import Runtime
+
+MODERN_SOURCE = """
+from typing import Optional
+from sqlalchemy import LargeBinary, String
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Document(Base):
+    __tablename__ = "document"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    title: Mapped[str]
+    content: Mapped[bytes]
+    preview: Mapped[Optional[bytes]]
+    raw = mapped_column("raw_data", LargeBinary, nullable=True)
+
+
+class Helper:
+    value = 1
+"""
+
+
+class StaticDiscoveryTest(unittest.TestCase):
+    def test_column_declaration(self) -> None:
+        discovery = discover_file("./tests/donor_files/one_file.py")
+
+        self.assertEqual([c.class_name for c in discovery.classes], ["TestClass"])
+        discovered = discovery.classes[0]
+        self.assertFalse(discovered.ambiguous)
+        self.assertEqual(discovered.file_keys, ["file"])
+        self.assertEqual(discovered.string_keys, ["name"])
+
+    def test_no_file_keys(self) -> None:
+        discovery = discover_file("./tests/donor_files/no_file.py")
+
+        self.assertEqual(discovery.classes[0].file_keys, [])
+        self.assertFalse(discovery.ambiguous)
+
+    def test_mapped_column_and_annotations(self) -> None:
+        discovery = discover_source(MODERN_SOURCE)
+
+        self.assertEqual([c.class_name for c in discovery.classes], ["Document"])
+        discovered = discovery.classes[0]
+        self.assertFalse(discovered.ambiguous)
+        self.assertEqual(discovered.file_keys, ["content", "preview", "raw_data"])
+        self.assertEqual(discovered.string_keys, ["title"])
+        self.assertEqual(
+            {c.key: c.nullable for c in discovered.columns if c.key != "title"},
+            {"id": False, "content": False, "preview": True, "raw_data": True},
+        )
+
+    def test_inherited_columns(self) -> None:
+        discovery = discover_source(
+            MODERN_SOURCE
+            + """
+
+class SignedDocument(Document):
+    signature: Mapped[bytes | None]
+"""
+        )
+
+        signed = discovery.classes[-1]
+        self.assertEqual(signed.class_name, "SignedDocument")
+        self.assertEqual(signed.file_keys[-1], "signature")
+        self.assertEqual(signed.columns[-1].position, len(signed.columns) - 1)
+
+    def test_unknown_type_is_ambiguous(self) -> None:
+        discovery = discover_source(
+            """
+from models.base import Base
+
+
+class Archive(Base):
+    __tablename__ = "archive"
+
+    id = Column(Integer, primary_key=True)
+    payload = Column(CompressedBlob)
+"""
+        )
+
+        self.assertTrue(discovery.ambiguous)
+
+    def test_imported_base_without_table_is_ambiguous(self) -> None:
+        discovery = discover_source(
+            """
+from models.base import Base
+
+
+class Child(Base):
+    payload = Column(LargeBinary)
+"""
+        )
+
+        self.assertEqual([c.class_name for c in discovery.classes], ["Child"])
+        self.assertTrue(discovery.classes[0].ambiguous)
+
+    def test_runtime_uses_discovered_keys(self) -> None:
+        file_path = "./tests/donor_files/one_file.py"
+        discovered = discover_file(file_path).classes[0]
+        user_inputs = ["n", "y"]
+        with mock.patch.object(builtins, "input", lambda _: user_inputs.pop(0)):
+            with mock.patch.object(Runtime, "load_module") as load_module:
+                with self.assertRaises(NewKeyAction) as NKA:
+                    Runtime(
+                        file_path,
+                        "./tests/history/empty.yaml",
+                        "TestClass",
+                        discovered,
+                    )
+                load_module.assert_not_called()
+
+        self.assertEqual(NKA.exception.new_key_name, "file")
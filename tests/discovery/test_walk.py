@@ -0,0 +1,68 @@
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from discovery.walk import IgnoreRules, WalkReport, walk_py_files
+
+MODEL = "from sqlalchemy.orm import DeclarativeBase\n"
+SCRIPT = "print('hello')\n"
+
+
+def plan_tree(root: str, files: dict[str, str]) -> None:
+    for path, content in files.items():
+        full_path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as out_file:
+            out_file.write(content)
+
+
+class IgnoreRulesTest(unittest.TestCase):
+    def test_patterns(self) -> None:
+        rules = IgnoreRules.from_lines(
+            ["# comment", "*.gen.py", "/scripts/", "docs/**/conf.py", "!keep.gen.py"]
+        )
+
+        self.assertTrue(rules.is_ignored("a/b/models.gen.py", False))
+        self.assertFalse(rules.is_ignored("a/b/keep.gen.py", False))
+        self.assertTrue(rules.is_ignored("scripts", True))
+        self.assertFalse(rules.is_ignored("app/scripts", True))
+        self.assertFalse(rules.is_ignored("scripts", False))
+        self.assertTrue(rules.is_ignored("docs/conf.py", False))
+        self.assertTrue(rules.is_ignored("docs/a/b/conf.py", False))
+        self.assertFalse(rules.is_ignored("models.py", False))
+
+
+class WalkTest(unittest.TestCase):
+    def test_prunes_and_prefilters(self) -> None:
+        with TemporaryDirectory() as root:
+            plan_tree(
+                root,
+                {
+                    "app/models.py": MODEL,
+                    "app/cli.py": SCRIPT,
+                    "app/README.md": "",
+                    "app/nested/.gitignore": "local_*.py\n",
+                    "app/nested/local_models.py": MODEL,
+                    "app/nested/models.PY": MODEL,
+                    "generated/models.py": MODEL,
+                    "legacy/models.py": MODEL,
+                    ".venv/lib/site-packages/sqlalchemy/orm.py": MODEL,
+                    "node_modules/pkg/models.py": MODEL,
+                    ".gitignore": "generated/\n",
+                },
+            )
+            report = WalkReport()
+            found = walk_py_files(root, ["legacy/"], True, report)
+
+        self.assertEqual(found, ["app/models.py", "app/nested/models.PY"])
+        self.assertEqual(report.pruned_directories, 4)
+        self.assertEqual(report.ignored_files, 1)
+        self.assertEqual(report.prefilter_rejected, 1)
+        self.assertEqual(report.candidates, 2)
+
+    def test_without_prefilter(self) -> None:
+        with TemporaryDirectory() as root:
+            plan_tree(root, {"models.py": MODEL, "cli.py": SCRIPT})
+            found = walk_py_files(root, prefilter=False)
+
+        self.assertEqual(found, ["cli.py", "models.py"])
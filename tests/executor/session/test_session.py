@@ -0,0 +1,133 @@
+import os
+from tempfile import TemporaryDirectory
+import unittest
+from unittest import mock
+
+from yaml import Loader, dump, load
+
+from executor import (
+    ApplyHistoryAction,
+    Executor,
+    NewKeyAction,
+    RemoveHistoryKeyAsIsAction,
+)
+from execute.session import EditSession
+from naming import get_static_file_name_key, get_static_mime_key
+from utils.ast_tools import get_attribute
+
+MODELS = """from sqlalchemy import Column, Integer, LargeBinary
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class First(Base):
+    __tablename__ = "first"
+
+    id = Column(Integer, primary_key=True)
+    blob = Column(LargeBinary)
+
+
+class Second(Base):
+    __tablename__ = "second"
+
+    id = Column(Integer, primary_key=True)
+    blob = Column(LargeBinary)
+"""
+
+KEY = {"mime_type_fix": "application/pdf", "file_name_fix": "document.pdf"}
+
+
+class EditSessionTest(unittest.TestCase):
+    def plan(self, root: str) -> tuple[str, str]:
+        file_name = os.path.join(root, "models.py")
+        history_path = os.path.join(root, "csfe.yaml")
+        with open(file_name, "w") as out_file:
+            out_file.write(MODELS)
+        with open(history_path, "w") as out_file:
+            out_file.write(dump({}))
+        return file_name, history_path
+
+    def test_single_parse_and_write(self) -> None:
+        with TemporaryDirectory() as root:
+            file_name, history_path = self.plan(root)
+            session = EditSession(file_name)
+            with mock.patch("executor.EditSession", return_value=session):
+                Executor.handle_plan(
+                    [
+                        NewKeyAction("blob", KEY, file_name, "First", history_path),
+                        NewKeyAction("blob", KEY, file_name, "Second", history_path),
+                        ApplyHistoryAction(file_name, "First", {"blob": KEY}),
+                        ApplyHistoryAction(file_name, "Second", {"blob": KEY}),
+                    ],
+                    history_path,
+                )
+
+            self.assertEqual(session.parses, 1)
+            self.assertEqual(session.writes, 1)
+            edited = EditSession(file_name)
+            for class_name in ["First", "Second"]:
+                _class = edited.get_class(class_name)
+                self.assertIsNotNone(get_attribute(get_static_mime_key("blob"), _class))
+                self.assertIsNotNone(
+                    get_attribute(get_static_file_name_key("blob"), _class)
+                )
+            with open(history_path) as in_file:
+                self.assertEqual(
+                    load(in_file, Loader),
+                    {"First": {"blob": KEY}, "Second": {"blob": KEY}},
+                )
+
+    def test_history_only_action_leaves_file(self) -> None:
+        with TemporaryDirectory() as root:
+            file_name, history_path = self.plan(root)
+            with open(history_path, "w") as out_file:
+                out_file.write(dump({"First": {"old": {"unhandled": True}}}))
+            session = EditSession(file_name)
+            Executor.handle_action(
+                RemoveHistoryKeyAsIsAction(file_name, "old", "First", history_path),
+                session,
+            )
+            session.commit()
+
+            self.assertEqual(session.parses, 0)
+            self.assertEqual(session.writes, 0)
+            with open(history_path) as in_file:
+                self.assertEqual(load(in_file, Loader), {"First": {}})
+
+    def test_failed_batch_writes_nothing(self) -> None:
+        with TemporaryDirectory() as root:
+            file_name, history_path = self.plan(root)
+            with self.assertRaises(Exception):
+                Executor.handle_plan(
+                    [
+                        NewKeyAction("blob", KEY, file_name, "First", history_path),
+                        NewKeyAction("blob", KEY, file_name, "Missing", history_path),
+                    ],
+                    history_path,
+                )
+
+            with open(file_name) as in_file:
+                self.assertEqual(in_file.read(), MODELS)
+            with open(history_path) as in_file:
+                self.assertEqual(load(in_file, Loader), {})
+
+    def test_failed_write_records_no_history(self) -> None:
+        with TemporaryDirectory() as root:
+            file_name, history_path = self.plan(root)
+            with mock.patch.object(
+                EditSession, "render", side_effect=ValueError("render")
+            ):
+                with self.assertRaises(ValueError):
+                    Executor.handle_plan(
+                        [
+                            NewKeyAction("blob", KEY, file_name, "First", history_path),
+                            ApplyHistoryAction(file_name, "First", {"blob": KEY}),
+                        ],
+                        history_path,
+                    )
+
+            with open(file_name) as in_file:
+                self.assertEqual(in_file.read(), MODELS)
+            with open(history_path) as in_file:
+                self.assertEqual(load(in_file, Loader), {})
@@ -0,0 +1,116 @@
+import ast
+import os
+from tempfile import TemporaryDirectory
+import unittest
+from unittest import mock
+
+from ast_comments import unparse
+
+from execute.apply_history import apply_history
+from execute.session import EditSession
+from settings import SETTINGS
+from utils.ast_tools import get_assign
+
+MODELS = """from sqlalchemy import Column, Integer, LargeBinary, String
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()   # odd   spacing
+
+
+class Document(Base):
+    \"\"\"Stored documents\"\"\"
+    __tablename__ = 'documents'
+
+    id = Column(Integer, primary_key=True)  # the key
+    blob = Column(LargeBinary)
+    name = Column(String, nullable = True)
+
+    def describe(self):
+        return  f"{self.name!r}"
+
+
+class Other(Base):
+    __tablename__ = "other"
+    id = Column(Integer,primary_key=True)
+"""
+
+
+@mock.patch.object(SETTINGS, "write_mode", "splice")
+class SpliceWriterTest(unittest.TestCase):
+    def plan(self, root: str, content: str = MODELS) -> str:
+        file_name = os.path.join(root, "models.py")
+        with open(file_name, "w", newline="") as out_file:
+            out_file.write(content)
+        return file_name
+
+    def read(self, file_name: str) -> str:
+        with open(file_name, newline="") as in_file:
+            return in_file.read()
+
+    def test_untouched_text_is_verbatim(self) -> None:
+        with TemporaryDirectory() as root:
+            file_name = self.plan(root)
+            with EditSession(file_name) as session:
+                apply_history(
+                    {"mime_type_fix": "application/pdf", "file_name_fix": "doc.pdf"},
+                    "blob",
+                    file_name,
+                    "Document",
+                    session,
+                )
+            edited = self.read(file_name)
+
+        ast.parse(edited)
+        head, tail = MODELS.split("class Document(Base):\n")
+        self.assertTrue(edited.startswith(head))
+        # Every original member line survives, including its formatting
+        self.assertIn(tail, edited)
+        self.assertIn("def blob_flask(self)", edited)
+
+    def test_changed_member_only(self) -> None:
+        with TemporaryDirectory() as root:
+            file_name = self.plan(root)
+            with EditSession(file_name) as session:
+                blob = get_assign("blob", session.get_class("Document"))
+                assert blob
+                blob.value = ast.Call(ast.Name("Column"), [ast.Name("Text")], [])
+            edited = self.read(file_name)
+
+        self.assertEqual(
+            edited,
+            MODELS.replace("blob = Column(LargeBinary)", "blob = Column(Text)"),
+        )
+
+    def test_removed_member(self) -> None:
+        with TemporaryDirectory() as root:
+            file_name = self.plan(root)
+            with EditSession(file_name) as session:
+                _class = session.get_class("Document")
+                _class.body.remove(get_assign("name", _class))
+            edited = self.read(file_name)
+
+        self.assertEqual(
+            edited, MODELS.replace("    name = Column(String, nullable = True)\n", "")
+        )
+
+    def test_keeps_line_endings(self) -> None:
+        content = MODELS.replace("\n", "\r\n")
+        with TemporaryDirectory() as root:
+            file_name = self.plan(root, content)
+            with EditSession(file_name) as session:
+                _class = session.get_class("Other")
+                _class.body.append(ast.parse("size = Column(Integer)").body[0])
+            edited = self.read(file_name)
+
+        self.assertEqual(edited, content + "    size = Column(Integer)\r\n")
+
+    def test_fallback_on_reorder(self) -> None:
+        with TemporaryDirectory() as root:
+            file_name = self.plan(root)
+            with EditSession(file_name) as session:
+                _class = session.get_class("Other")
+                _class.body = list(reversed(_class.body))
+                expected = unparse(session.module)
+            edited = self.read(file_name)
+
+        self.assertEqual(edited, expected)
@@ -0,0 +1,79 @@
+import os
+import sys
+from tempfile import NamedTemporaryFile
+import unittest
+
+from yaml import Loader, load
+
+from executor import Executor, RemoveHistoryKeyAsIsAction
+from history import HistoryStore, open_history
+
+sys.path.append(os.path.join(os.getcwd(), "tests"))
+
+from donor_files.file_maker import plan_file
+
+
+class HistoryStoreTest(unittest.TestCase):
+    def read(self, history_path: str) -> dict:
+        with open(history_path) as in_file:
+            return load(in_file, Loader)
+
+    def test_empty_file(self) -> None:
+        store = HistoryStore("./tests/history/empty.yaml")
+
+        self.assertEqual(store.data, {})
+        self.assertEqual(store.get_class("TestClass"), {})
+
+    def test_write_through_outside_transaction(self) -> None:
+        with NamedTemporaryFile("w+", delete=False) as history_source:
+            plan_file(history_source, {})
+            history_source.close()
+            store = open_history(history_source.name)
+            store.set_key("TestClass", "file", {"unhandled": True})
+
+            self.assertEqual(
+                self.read(history_source.name),
+                {"TestClass": {"file": {"unhandled": True}}},
+            )
+        os.remove(history_source.name)
+
+    def test_single_flush_in_transaction(self) -> None:
+        with NamedTemporaryFile("w+", delete=False) as history_source:
+            plan_file(history_source, {"TestClass": {"old": {"unhandled": True}}})
+            history_source.close()
+            with HistoryStore(history_source.name).transaction() as store:
+                store.set_key("TestClass", "file", {"unhandled": True})
+                store.rename_key("TestClass", "file", "renamed", {"unhandled": True})
+                Executor.handle_action(
+                    RemoveHistoryKeyAsIsAction(
+                        "unused.py", "old", "TestClass", history_source.name
+                    )
+                )
+                self.assertIs(open_history(history_source.name), store)
+                self.assertEqual(store.flushes, 0)
+                self.assertEqual(
+                    self.read(history_source.name),
+                    {"TestClass": {"old": {"unhandled": True}}},
+                )
+
+            self.assertEqual(store.flushes, 1)
+            self.assertEqual(
+                self.read(history_source.name),
+                {"TestClass": {"renamed": {"unhandled": True}}},
+            )
+            self.assertIsNot(open_history(history_source.name), store)
+        os.remove(history_source.name)
+
+    def test_checkpoint(self) -> None:
+        with NamedTemporaryFile("w+", delete=False) as history_source:
+            plan_file(history_source, {})
+            history_source.close()
+            with HistoryStore(history_source.name).transaction() as store:
+                store.set_key("TestClass", "file", {"unhandled": True})
+                store.checkpoint()
+                self.assertEqual(
+                    self.read(history_source.name),
+                    {"TestClass": {"file": {"unhandled": True}}},
+                )
+            self.assertEqual(store.flushes, 1)
+        os.remove(history_source.name)
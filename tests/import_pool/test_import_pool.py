@@ -0,0 +1,45 @@
+import os
+from tempfile import TemporaryDirectory
+import time
+import unittest
+
+from import_pool import ImportWorker
+from module_registry import MODULE_REGISTRY
+
+
+class ImportWorkerTest(unittest.TestCase):
+    file_path = "./tests/donor_files/one_file.py"
+
+    def setUp(self) -> None:
+        self.worker = ImportWorker(timeout=5, recycle_after=2)
+
+    def tearDown(self) -> None:
+        self.worker.stop()
+
+    def test_columns_come_back(self) -> None:
+        executions = MODULE_REGISTRY.executions
+        classes = self.worker.inspect(self.file_path)
+
+        self.assertEqual([c.class_name for c in classes], ["TestClass"])
+        self.assertEqual(classes[0].file_keys, ["file"])
+        self.assertEqual(MODULE_REGISTRY.executions, executions)
+
+    def test_recycled_after_limit(self) -> None:
+        for _ in range(3):
+            self.assertIsNotNone(self.worker.inspect(self.file_path))
+
+        self.assertEqual(self.worker.started, 2)
+
+    def test_hanging_module_times_out(self) -> None:
+        with TemporaryDirectory() as root:
+            file_name = os.path.join(root, "hangs.py")
+            with open(file_name, "w") as out_file:
+                out_file.write("import time\n\ntime.sleep(60)\n")
+            self.worker.timeout = 1
+
+            started = time.monotonic()
+            self.assertIsNone(self.worker.inspect(file_name))
+            self.assertLess(time.monotonic() - started, 30)
+
+            self.assertIsNotNone(self.worker.inspect(self.file_path))
+            self.assertEqual(self.worker.started, 2)
@@ -0,0 +1,62 @@
+import builtins
+import os
+import shutil
+from tempfile import TemporaryDirectory
+import unittest
+from unittest import mock
+
+from executor import NewKeyAction
+from module_registry import MODULE_REGISTRY, ModuleRegistry
+from runtime import Runtime
+
+
+class ModuleRegistryTest(unittest.TestCase):
+    def plan(self, root: str) -> str:
+        file_name = os.path.join(root, "models.py")
+        shutil.copy("./tests/donor_files/one_file.py", file_name)
+        return file_name
+
+    def test_single_execution(self) -> None:
+        registry = ModuleRegistry()
+        with TemporaryDirectory() as root:
+            file_name = self.plan(root)
+            first = registry.load(file_name)
+            second = registry.load(file_name)
+
+        self.assertIs(first, second)
+        self.assertEqual(registry.executions, 1)
+
+    def test_refresh_after_invalidate(self) -> None:
+        registry = ModuleRegistry()
+        with TemporaryDirectory() as root:
+            file_name = self.plan(root)
+            first = registry.load(file_name)
+            registry.invalidate(file_name)
+            second = registry.load(file_name)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(registry.executions, 2)
+
+    def test_refresh_after_outside_change(self) -> None:
+        registry = ModuleRegistry()
+        with TemporaryDirectory() as root:
+            file_name = self.plan(root)
+            first = registry.get_class(file_name, "TestClass")
+            with open(file_name, "a") as out_file:
+                out_file.write("\nEXTRA = 1\n")
+            second = registry.get_class(file_name, "TestClass")
+
+        self.assertIsNot(first, second)
+
+    def test_runtime_reuses_module(self) -> None:
+        with TemporaryDirectory() as root:
+            file_name = self.plan(root)
+            executions = MODULE_REGISTRY.executions
+            for _ in range(3):
+                user_inputs = ["n", "y"]
+                with mock.patch.object(builtins, "input", lambda _: user_inputs.pop(0)):
+                    with self.assertRaises(NewKeyAction):
+                        Runtime(file_name, "./tests/history/empty.yaml", "TestClass")
+            MODULE_REGISTRY.invalidate(file_name)
+
+        self.assertEqual(MODULE_REGISTRY.executions, executions + 1)
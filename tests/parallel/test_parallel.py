@@ -0,0 +1,111 @@
+import builtins
+import os
+import pickle
+import sys
+from tempfile import TemporaryDirectory
+import unittest
+from unittest import mock
+
+from executor import RenameAction
+from execute.session import EditSession
+from history import open_history
+from main import process_file
+from planner import plan_classes
+from parallel import inspect_file, rewrite_file, run_parallel
+
+sys.path.append(os.path.join(os.getcwd(), "tests"))
+
+from inputs.new_file_name_inputs import get_file_name_input
+from inputs.new_key_inputs import new_key_start
+from inputs.new_mime_inputs import get_mime_input
+
+
+class ActionPickleTest(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        action = RenameAction(
+            "old", {"unhandled": True}, "new", {}, "m.py", "TestClass", "h.yaml"
+        )
+        restored = pickle.loads(pickle.dumps(action))
+
+        self.assertIsInstance(restored, RenameAction)
+        self.assertEqual(restored.__dict__, action.__dict__)
+
+
+class ParallelRunTest(unittest.TestCase):
+    donor = "./tests/donor_files/one_file.py"
+
+    def make_project(self, root: str) -> tuple[list[str], str]:
+        with open(self.donor) as in_file:
+            source = in_file.read()
+        files = []
+        for index, class_name in enumerate(["TestClass", "OtherClass", "TestClass"]):
+            file_name = os.path.join(root, f"models_{index}.py")
+            with open(file_name, "w") as out_file:
+                out_file.write(source.replace("TestClass", class_name))
+            files.append(file_name)
+        history_path = os.path.join(root, "csfe.yaml")
+        with open(history_path, "w"):
+            pass
+        return files, history_path
+
+    def answers(self) -> list[str]:
+        # The second TestClass file finds the key in the history already
+        return (
+            new_key_start(False)
+            + get_mime_input("static")
+            + get_file_name_input("static")
+        ) * 2
+
+    def read(self, files: list[str], history_path: str) -> list[str]:
+        contents = []
+        for file_name in [*files, history_path]:
+            with open(file_name) as in_file:
+                contents.append(in_file.read())
+        return contents
+
+    def test_inspection_matches_runtime_keys(self) -> None:
+        inspection = inspect_file(self.donor)
+
+        self.assertEqual([c.class_name for c in inspection.classes], ["TestClass"])
+        self.assertEqual(inspection.classes[0].file_keys, ["file"])
+        self.assertEqual(inspection.classes[0].string_keys, ["name"])
+
+    def test_same_result_as_sequential(self) -> None:
+        with TemporaryDirectory() as sequential, TemporaryDirectory() as parallel:
+            files, history_path = self.make_project(sequential)
+            user_inputs = self.answers()
+            with mock.patch.object(builtins, "input", lambda _: user_inputs.pop(0)):
+                with open_history(history_path).transaction():
+                    for file_name in files:
+                        process_file(file_name, history_path)
+            expected = self.read(files, history_path)
+
+            files, history_path = self.make_project(parallel)
+            user_inputs = self.answers()
+            with mock.patch.object(builtins, "input", lambda _: user_inputs.pop(0)):
+                with open_history(history_path).transaction() as history:
+                    run_parallel(files, history_path, history, None, 2)
+            self.assertEqual(user_inputs, [], "Not every answer was used")
+
+            self.assertEqual(self.read(files, history_path), expected)
+            self.assertIn("OtherClass", expected[-1])
+            self.assertTrue(all("def file" in content for content in expected[:-1]))
+
+    def test_failed_write_is_not_settled(self) -> None:
+        with TemporaryDirectory() as root:
+            files, history_path = self.make_project(root)
+            expected = self.read(files, history_path)
+            user_inputs = self.answers()
+            with mock.patch.object(builtins, "input", lambda _: user_inputs.pop(0)):
+                plans, _ = plan_classes(files[0], history_path, [("TestClass", None)])
+            with mock.patch.object(
+                EditSession, "render", side_effect=ValueError("render")
+            ):
+                self.assertFalse(rewrite_file(files[0], plans).ok)
+
+                user_inputs = self.answers()
+                with mock.patch.object(builtins, "input", lambda _: user_inputs.pop(0)):
+                    with open_history(history_path).transaction():
+                        self.assertIsNone(process_file(files[0], history_path))
+
+            self.assertEqual(self.read(files, history_path), expected)
@@ -0,0 +1,116 @@
+import builtins
+import os
+import sys
+from tempfile import NamedTemporaryFile
+import unittest
+from unittest import mock
+
+from executor import (
+    ApplyHistoryAction,
+    NewKeyAction,
+    ReAddHistoryAction,
+    RemoveHistoryKeyAsIsAction,
+    RenameAction,
+)
+from planner import Planner, diff_keys, plan_classes
+from runtime import Runtime
+
+sys.path.append(os.path.join(os.getcwd(), "tests"))
+
+from donor_files.file_maker import plan_file
+from inputs.missing_key_inputs import get_missing_key_input
+from inputs.new_key_inputs import new_key_rename, new_key_start
+
+
+class DiffKeysTest(unittest.TestCase):
+    def test_keeps_order(self) -> None:
+        diff = diff_keys(["c", "a", "b"], {"b": {}, "z": {"unhandled": True}, "y": {}})
+
+        self.assertEqual(diff.new_keys, ["c", "a"])
+        self.assertEqual(diff.missing_keys, ["z", "y"])
+
+
+class PlannerTest(unittest.TestCase):
+    file_path = "./tests/donor_files/one_file.py"
+
+    def plan(self, history: dict, user_inputs: list[str]):
+        with NamedTemporaryFile("w+", delete=False) as history_temp_file:
+            plan_file(history_temp_file, history)
+            history_temp_file.close()
+            with mock.patch.object(builtins, "input", lambda _: user_inputs.pop(0)):
+                runtime = Runtime(
+                    self.file_path,
+                    history_temp_file.name,
+                    "TestClass",
+                    auto_execute=False,
+                )
+                plan = Planner(runtime).plan()
+        os.remove(history_temp_file.name)
+        self.assertEqual(user_inputs, [], "Not every answer was used")
+        return plan
+
+    def test_nothing_to_do(self) -> None:
+        self.file_path = "./tests/donor_files/no_file.py"
+        plan = self.plan({}, [])
+
+        self.assertEqual(plan.actions, [])
+
+    def test_new_key_is_not_applied_again(self) -> None:
+        plan = self.plan({}, new_key_start(True))
+
+        self.assertEqual([type(a) for a in plan.actions], [NewKeyAction])
+        self.assertEqual(plan.history, {"file": {"unhandled": True}})
+
+    def test_re_added_key_is_not_applied_again(self) -> None:
+        plan = self.plan(
+            {"TestClass": {"file": {"unhandled": True}, "gone": {"unhandled": True}}},
+            get_missing_key_input("re_add"),
+        )
+
+        self.assertEqual(
+            [type(a) for a in plan.actions], [ReAddHistoryAction, ApplyHistoryAction]
+        )
+        self.assertEqual(plan.actions[1].history, {"file": {"unhandled": True}})
+        self.assertEqual(
+            plan.history,
+            {"file": {"unhandled": True}, "gone": {"unhandled": True}},
+        )
+
+    def test_rename_consumes_missing_key(self) -> None:
+        plan = self.plan(
+            {"TestClass": {"old_key": {"unhandled": True}, "gone": {}}},
+            new_key_rename(1) + ["y"] + get_missing_key_input("as_is"),
+        )
+
+        self.assertEqual(
+            [type(a) for a in plan.actions],
+            [RenameAction, RemoveHistoryKeyAsIsAction, ApplyHistoryAction],
+        )
+        self.assertEqual(plan.actions[1].old_key_name, "gone")
+        self.assertEqual(plan.history, {"file": {"unhandled": True}})
+
+    def test_abort_asks_again(self) -> None:
+        plan = self.plan(
+            {"TestClass": {"old_key": {"unhandled": True}}},
+            new_key_rename(0)[:1] + ["x"] + new_key_rename(0) + ["y"],
+        )
+
+        self.assertIsInstance(plan.actions[0], RenameAction)
+
+
+class PlanClassesTest(unittest.TestCase):
+    def test_rejected_class_is_logged_and_flagged(self) -> None:
+        with NamedTemporaryFile("w+", delete=False) as history_temp_file:
+            plan_file(history_temp_file, {})
+            history_temp_file.close()
+            with self.assertLogs("CSFE", "WARNING") as logs:
+                plans, failed = plan_classes(
+                    "./tests/donor_files/no_file.py",
+                    history_temp_file.name,
+                    [("TestClass", None), ("MissingClass", None)],
+                )
+        os.remove(history_temp_file.name)
+
+        self.assertTrue(failed)
+        self.assertEqual([plan.class_name for plan in plans], ["TestClass"])
+        self.assertIn("Class rejected:MissingClass", logs.output[0])
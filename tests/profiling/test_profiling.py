@@ -0,0 +1,73 @@
+import builtins
+import json
+import os
+import shutil
+import sys
+from tempfile import TemporaryDirectory
+import unittest
+from unittest import mock
+
+from history import open_history
+from main import process_file
+from profiling import PROFILER, Profiler
+
+sys.path.append(os.path.join(os.getcwd(), "tests"))
+
+from inputs.new_file_name_inputs import get_file_name_input
+from inputs.new_key_inputs import new_key_start
+from inputs.new_mime_inputs import get_mime_input
+
+
+class ProfilerTest(unittest.TestCase):
+    def test_disabled_records_nothing(self) -> None:
+        profiler = Profiler()
+        with profiler.phase("plan", "a.py", "A"):
+            pass
+
+        self.assertIs(profiler.phase("walk"), profiler.phase("plan"))
+        self.assertEqual(profiler.timings, {})
+
+    def test_merge_and_report(self) -> None:
+        profiler = Profiler(enabled=True)
+        with profiler.phase("walk"):
+            pass
+        with profiler.phase("inspect", "a.py", "A"):
+            pass
+        profiler.merge({("a.py", "A", "inspect"): [1.0, 2]})
+
+        report = profiler.report()
+        self.assertEqual(list(report["phases"]), ["walk", "inspect"])
+        self.assertEqual(report["phases"]["inspect"]["calls"], 3)
+        self.assertEqual(report["files"]["a.py"]["classes"]["A"]["inspect"]["calls"], 3)
+
+
+class ProfiledRunTest(unittest.TestCase):
+    def test_phases_of_a_file(self) -> None:
+        with TemporaryDirectory() as root:
+            file_name = os.path.join(root, "models.py")
+            shutil.copy("./tests/donor_files/one_file.py", file_name)
+            history_path = os.path.join(root, "csfe.yaml")
+            open(history_path, "w").close()
+            user_inputs = (
+                new_key_start(False)
+                + get_mime_input("static")
+                + get_file_name_input("static")
+            )
+
+            PROFILER.start()
+            try:
+                with mock.patch.object(builtins, "input", lambda _: user_inputs.pop(0)):
+                    with open_history(history_path).transaction():
+                        process_file(file_name, history_path)
+            finally:
+                PROFILER.stop()
+            report_path = PROFILER.write(os.path.join(root, "run.prof"))
+
+            self.assertTrue(os.path.exists(os.path.join(root, "run.prof")))
+            with open(report_path) as in_file:
+                report = json.load(in_file)
+            timed = report["files"][file_name]
+            for phase in ["import", "parse", "unparse", "write"]:
+                self.assertIn(phase, timed["phases"])
+            for phase in ["history", "inspect", "plan", "transform"]:
+                self.assertIn(phase, timed["classes"]["TestClass"])
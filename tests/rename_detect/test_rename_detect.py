@@ -0,0 +1,122 @@
+import builtins
+import os
+import subprocess
+import sys
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+import unittest
+from unittest import mock
+
+from discovery.static import DiscoveredColumn
+from executor import ApplyHistoryAction, RenameAction
+from planner import Planner
+from rename_detect import committed_columns, detect_renames
+from runtime import Runtime
+from settings import SETTINGS
+
+sys.path.append(os.path.join(os.getcwd(), "tests"))
+
+from donor_files.file_maker import plan_file
+
+OLD_SOURCE = """from sqlalchemy import Column, Integer, LargeBinary, String
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class TestClass(Base):
+    __tablename__ = "example_table"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    avatar_blob = Column(LargeBinary, nullable=False)
+    notes = Column(LargeBinary)
+"""
+
+
+def columns(*specs: tuple[str, str, bool]) -> dict[str, DiscoveredColumn]:
+    return {
+        key: DiscoveredColumn(key, type_name, nullable, position)
+        for position, (key, type_name, nullable) in enumerate(specs)
+    }
+
+
+class DetectRenamesTest(unittest.TestCase):
+    previous = columns(
+        ("id", "INTEGER", True),
+        ("avatar_blob", "LARGEBINARY", False),
+        ("notes", "LARGEBINARY", True),
+    )
+
+    def test_pairs_by_name_and_shape(self) -> None:
+        current = columns(
+            ("id", "INTEGER", True),
+            ("avatar_data", "LARGEBINARY", False),
+            ("notes_file", "LARGEBINARY", True),
+        )
+
+        pairs = detect_renames(
+            ["avatar_data", "notes_file"],
+            ["avatar_blob", "notes"],
+            current,
+            self.previous,
+        )
+
+        self.assertEqual(
+            [(p.new_key_name, p.old_key_name) for p in pairs],
+            [("avatar_data", "avatar_blob"), ("notes_file", "notes")],
+        )
+
+    def test_unrelated_names_are_left_to_the_prompt(self) -> None:
+        current = columns(("id", "INTEGER", True), ("scan", "LARGEBINARY", True))
+
+        self.assertEqual(
+            detect_renames(["scan"], ["avatar_blob", "notes"], current, None), []
+        )
+
+    def test_committed_key_is_not_a_rename(self) -> None:
+        current = columns(("avatar_blob", "LARGEBINARY", False))
+
+        self.assertEqual(
+            detect_renames(["avatar_blob"], ["notes"], current, self.previous), []
+        )
+
+
+class CommittedRenameTest(unittest.TestCase):
+    def git(self, root: str, *args: str) -> None:
+        subprocess.run(
+            ["git", "-C", root, "-c", "user.name=t", "-c", "user.email=t@t", *args],
+            check=True,
+            capture_output=True,
+        )
+
+    @mock.patch.object(SETTINGS, "detect_renames", True)
+    def test_planner_emits_detected_rename(self) -> None:
+        with TemporaryDirectory() as root, NamedTemporaryFile("w+") as history_file:
+            file_name = os.path.join(root, "models.py")
+            with open(file_name, "w") as out_file:
+                out_file.write(OLD_SOURCE)
+            self.git(root, "init", "-q")
+            self.git(root, "add", "models.py")
+            self.git(root, "commit", "-q", "-m", "models")
+            with open(file_name, "w") as out_file:
+                out_file.write(OLD_SOURCE.replace("avatar_blob", "avatar_bytes"))
+
+            self.assertEqual(
+                list(committed_columns(file_name, "TestClass") or {}),
+                ["id", "name", "avatar_blob", "notes"],
+            )
+
+            history = {"avatar_blob": {"mime_unhandled": True, "name_unhandled": True}}
+            plan_file(history_file, {"TestClass": {**history, "notes": {}}})
+            history_file.flush()
+            with mock.patch.object(builtins, "input", lambda _: self.fail("Prompted")):
+                runtime = Runtime(
+                    file_name, history_file.name, "TestClass", auto_execute=False
+                )
+                plan = Planner(runtime).plan()
+
+            self.assertEqual(
+                [type(a) for a in plan.actions], [RenameAction, ApplyHistoryAction]
+            )
+            self.assertEqual(plan.actions[0].old_key_name, "avatar_blob")
+            self.assertEqual(plan.history["avatar_bytes"], history["avatar_blob"])
@@ -0,0 +1,81 @@
+import ast
+import unittest
+
+import templates
+from utils.skeleton import Skeleton
+
+SETTER = Skeleton(
+    """
+    @__hole_name__.setter
+    def __hole_name__(self, value: str) -> None:
+        self.__hole_column__ = value
+        self.__hole_mime__ = '__hole_mime__'
+    """
+)
+
+
+def text(node: ast.AST) -> str:
+    return ast.unparse(ast.fix_missing_locations(node))
+
+
+class SkeletonTest(unittest.TestCase):
+    def test_holes(self) -> None:
+        self.assertEqual(SETTER.holes, ["column", "mime", "name"])
+        with self.assertRaises(ValueError):
+            SETTER.fill(name="file")
+
+    def test_fill(self) -> None:
+        fun = SETTER.fill(name="file", column="file_column", mime="file_mime")
+
+        self.assertEqual(
+            text(fun),
+            "@file.setter\n"
+            "def file(self, value: str) -> None:\n"
+            "    self.file_column = value\n"
+            "    self.file_mime = 'file_mime'",
+        )
+
+    def test_none_drops_the_statement(self) -> None:
+        fun = SETTER.fill(name="file", column="file_column", mime=None)
+
+        self.assertIsInstance(fun, ast.FunctionDef)
+        self.assertEqual(len(fun.body), 1)  # type: ignore
+
+    def test_expression_hole(self) -> None:
+        skeleton = Skeleton("mime_type = __hole_mime__ or __hole_mime__")
+        value = ast.Attribute(ast.Name("self", ast.Load()), "mime", ast.Load())
+        assign = skeleton.fill(mime=value)
+
+        self.assertEqual(text(assign), "mime_type = self.mime or self.mime")
+        # Every use gets its own node
+        left, right = assign.value.values  # type: ignore
+        self.assertIsNot(left, right)
+
+    def test_instances_are_independent(self) -> None:
+        first = SETTER.fill(name="file", column="file_column", mime="file_mime")
+        second = SETTER.fill(name="file", column="file_column", mime="file_mime")
+        first.body.pop()  # type: ignore
+
+        self.assertEqual(len(second.body), 2)  # type: ignore
+
+    def test_matches_parsed_template(self) -> None:
+        built = templates.mime_type_static_template("file", "application/pdf")
+        parsed = ast.parse(
+            "file_static_mime_type: Literal['application/pdf'] = 'application/pdf'"
+        ).body[0]
+
+        self.assertEqual(ast.dump(built), ast.dump(parsed))
+
+    def test_setter_only_stores_database_fields(self) -> None:
+        fun = templates.property_werkzeug_setter_template(
+            "file", {"mime_type_field_name": "mime", "file_name_fix": "a.pdf"}
+        )
+
+        self.assertEqual(
+            text(fun),
+            "@file_flask.setter\n"
+            "def file_flask(self, file: werkzeug.FileStorage) -> None:\n"
+            "    data = file.read()\n"
+            "    self.file = data\n"
+            "    self.file_mime_type = file.mimetype",
+        )
@@ -0,0 +1,223 @@
+import ast
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest import mock
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session
+
+from execute.apply_history import apply_history
+from execute.purge import purge
+from execute.session import EditSession
+from naming import starlette_get_name, werkzeug_get_name
+from settings import SETTINGS
+from template.deferred.column import DeferredColumn
+from template.starlette.starlette import Starlette
+from utils.ast_tools import get_ann_or_assign, get_property_getter
+
+MODELS = """import sqlalchemy
+import sqlalchemy.orm
+from sqlalchemy import Column, Integer, LargeBinary
+from sqlalchemy.orm import Mapped, declarative_base, mapped_column
+
+Base = declarative_base()
+
+
+class Document(Base):
+    __tablename__ = "documents"
+
+    id = Column(Integer, primary_key=True)
+    blob = Column(LargeBinary)
+    scan: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
+"""
+
+FROM_IMPORTS = """from sqlalchemy import Column, Integer, LargeBinary
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class Document(Base):
+    __tablename__ = "documents"
+
+    id = Column(Integer, primary_key=True)
+    blob = Column(LargeBinary)
+"""
+
+KEY = {"mime_unhandled": True, "name_unhandled": True}
+
+
+def column_source(_class: ast.ClassDef, key_name: str) -> str:
+    column = get_ann_or_assign(key_name, _class, True)
+    return ast.unparse(column.value)  # type: ignore
+
+
+class DeferredColumnTest(unittest.TestCase):
+    def test_column_is_wrapped_and_unwrapped(self):
+        _class: ast.ClassDef = ast.parse(MODELS).body[5]  # type: ignore
+
+        DeferredColumn("blob", KEY, _class).build()
+        self.assertEqual(
+            column_source(_class, "blob"),
+            "sqlalchemy.orm.deferred(Column(LargeBinary))",
+        )
+
+        DeferredColumn("blob", KEY, _class, raiseload=True).build()
+        self.assertEqual(
+            column_source(_class, "blob"),
+            "sqlalchemy.orm.deferred(Column(LargeBinary), raiseload=True)",
+        )
+
+        DeferredColumn("blob", KEY, _class).purge()
+        self.assertEqual(column_source(_class, "blob"), "Column(LargeBinary)")
+
+    def test_mapped_column_gets_keywords(self):
+        _class: ast.ClassDef = ast.parse(MODELS).body[5]  # type: ignore
+
+        DeferredColumn("scan", KEY, _class, raiseload=True).build()
+        DeferredColumn("scan", KEY, _class, raiseload=True).build()
+        self.assertEqual(
+            column_source(_class, "scan"),
+            "mapped_column(LargeBinary, nullable=True, deferred=True, "
+            "deferred_raiseload=True)",
+        )
+
+        DeferredColumn("scan", KEY, _class).purge()
+        self.assertEqual(
+            column_source(_class, "scan"), "mapped_column(LargeBinary, nullable=True)"
+        )
+
+    def test_missing_column_is_left_alone(self):
+        _class: ast.ClassDef = ast.parse(MODELS).body[5]  # type: ignore
+        before = ast.dump(_class)
+
+        DeferredColumn("nothing", KEY, _class).build()
+        DeferredColumn("nothing", KEY, _class).purge()
+
+        self.assertEqual(ast.dump(_class), before)
+
+
+@mock.patch.object(SETTINGS, "mode", "flask")
+@mock.patch.object(SETTINGS, "binary_raiseload", True)
+@mock.patch.object(SETTINGS, "defer_binary", True)
+class DeferredApplyTest(unittest.TestCase):
+    def apply(self, root: str) -> str:
+        file_name = os.path.join(root, "models.py")
+        with open(file_name, "w") as out_file:
+            out_file.write(MODELS)
+        with EditSession(file_name) as session:
+            apply_history(KEY, "blob", file_name, "Document", session)
+        return file_name
+
+    def test_getter_loads_the_raiseload_column(self):
+        with TemporaryDirectory() as root:
+            with open(self.apply(root)) as in_file:
+                source = in_file.read()
+
+        namespace: dict = {
+            "flask": SimpleNamespace(send_file=lambda data, **_: data, Response=None),
+            "werkzeug": SimpleNamespace(FileStorage=None),
+        }
+        exec(compile(source, "models.py", "exec"), namespace)
+        document = namespace["Document"]
+        engine = create_engine("sqlite://")
+        namespace["Base"].metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(document(id=1, blob=b"content"))
+            session.commit()
+
+        with Session(engine) as session:
+            loaded = session.scalars(select(document)).one()
+            with self.assertRaises(InvalidRequestError):
+                loaded.blob
+            self.assertEqual(getattr(loaded, werkzeug_get_name("blob")), b"content")
+
+    def test_missing_sqlalchemy_import_is_added(self):
+        for write_mode in ["unparse", "splice"]:
+            with self.subTest(write_mode), TemporaryDirectory() as root:
+                file_name = os.path.join(root, "models.py")
+                with open(file_name, "w") as out_file:
+                    out_file.write(FROM_IMPORTS)
+                with mock.patch.object(SETTINGS, "write_mode", write_mode):
+                    with EditSession(file_name) as session:
+                        apply_history(KEY, "blob", file_name, "Document", session)
+                with open(file_name) as in_file:
+                    source = in_file.read()
+
+                self.assertEqual(
+                    source.splitlines()[:3],
+                    [
+                        "from sqlalchemy import Column, Integer, LargeBinary",
+                        "from sqlalchemy.orm import declarative_base",
+                        "import sqlalchemy.orm",
+                    ],
+                )
+                namespace: dict = {
+                    "flask": SimpleNamespace(Response=None),
+                    "werkzeug": SimpleNamespace(FileStorage=None),
+                }
+                exec(compile(source, "models.py", "exec"), namespace)
+
+    def test_turning_defer_off_undefers_the_column(self):
+        with TemporaryDirectory() as root:
+            file_name = self.apply(root)
+            with mock.patch.object(SETTINGS, "defer_binary", False):
+                with EditSession(file_name) as session:
+                    apply_history(KEY, "blob", file_name, "Document", session)
+            with open(file_name) as in_file:
+                source = in_file.read()
+
+        self.assertNotIn("deferred(", source)
+        namespace: dict = {
+            "flask": SimpleNamespace(send_file=lambda data, **_: data, Response=None),
+            "werkzeug": SimpleNamespace(FileStorage=None),
+        }
+        exec(compile(source, "models.py", "exec"), namespace)
+        document = namespace["Document"]
+        engine = create_engine("sqlite://")
+        namespace["Base"].metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(document(id=1, blob=b"content"))
+            session.commit()
+
+        with Session(engine) as session:
+            loaded = session.scalars(select(document)).one()
+            self.assertEqual(getattr(loaded, werkzeug_get_name("blob")), b"content")
+
+    def test_purge_undefers_the_column(self):
+        with TemporaryDirectory() as root:
+            file_name = self.apply(root)
+            with EditSession(file_name) as session:
+                purge("blob", KEY, file_name, "Document", session)
+            with EditSession(file_name) as session:
+                _class = session.get_class("Document")
+                self.assertEqual(column_source(_class, "blob"), "Column(LargeBinary)")
+                self.assertIsNone(
+                    get_property_getter(werkzeug_get_name("blob"), _class)
+                )
+
+    def test_async_getter_awaits_the_load(self):
+        _class = ast.ClassDef("TestClass", [], [], [], [])
+
+        Starlette("blob", KEY, _class).build()
+
+        getter = get_property_getter(starlette_get_name("blob"), _class)
+        self.assertEqual(
+            [
+                ast.unparse(ast.fix_missing_locations(statement))
+                for statement in getter.body[2:4]  # type: ignore
+            ],
+            [
+                "if 'blob' in sqlalchemy.inspect(self).unloaded:\n"
+                "    await sqlalchemy.ext.asyncio.async_object_session(self)"
+                ".refresh(self, ['blob'])",
+                "data = self.blob",
+            ],
+        )
+
+        with mock.patch.object(SETTINGS, "defer_binary", False):
+            Starlette("blob", KEY, _class).build()
+        self.assertEqual(len(getter.body), 4)  # type: ignore
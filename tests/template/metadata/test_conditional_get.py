@@ -0,0 +1,227 @@
+import ast
+import asyncio
+import datetime
+import email.utils
+import os
+import sys
+import unittest
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest import mock
+
+from execute.apply_history import apply_history
+from execute.session import EditSession
+from naming import not_modified_name, starlette_response_name, werkzeug_get_name
+from settings import SETTINGS
+from template.starlette.starlette import Starlette
+from template.werkzeug.werkzeug import Werkzeug
+from types_source import FileFields
+from utils.ast_tools import get_async_function, get_function
+
+KEY: FileFields = {
+    "mime_unhandled": True,
+    "name_unhandled": True,
+    "content_metadata": True,
+}
+
+SHA256 = "ab" * 32
+
+MODELS = """from sqlalchemy import Column, Integer, LargeBinary
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class Document(Base):
+    __tablename__ = "documents"
+
+    id = Column(Integer, primary_key=True)
+    blob = Column(LargeBinary)
+"""
+
+MODIFIED_AT = datetime.datetime(2026, 3, 1, 12, 0, 30, 500, datetime.timezone.utc)
+
+
+def response(**values):
+    return SimpleNamespace(**values)
+
+
+def load_class(_class: ast.ClassDef, namespace: dict):
+    """The generated class, with a blob that must not be read"""
+    source = ast.unparse(ast.fix_missing_locations(ast.Module([_class], [])))
+    namespace = {"datetime": datetime, "email": email, **namespace}
+    exec(compile(source, "<models>", "exec"), namespace)
+
+    class Document(namespace[_class.name]):  # type: ignore
+        blob_size = 4
+        blob_sha256 = SHA256
+        blob_modified_at = MODIFIED_AT
+        loads = 0
+
+        @property
+        def blob(self):
+            self.loads += 1
+            return b"data"
+
+    return Document
+
+
+class WerkzeugConditionalTest(unittest.TestCase):
+    def load(self, modified: bool):
+        _class = ast.ClassDef("Model", [], [], [], [])
+        Werkzeug("blob", KEY, _class).build()
+        self.is_resource_modified = mock.Mock(return_value=modified)
+        return load_class(
+            _class,
+            {
+                "flask": SimpleNamespace(
+                    Response=response,
+                    send_file=lambda data, **keywords: response(
+                        status=200, data=data, **keywords
+                    ),
+                    request=SimpleNamespace(environ={"REQUEST_METHOD": "GET"}),
+                ),
+                "werkzeug": SimpleNamespace(
+                    FileStorage=None,
+                    http=SimpleNamespace(
+                        is_resource_modified=self.is_resource_modified
+                    ),
+                ),
+            },
+        )()
+
+    def test_not_modified_skips_the_blob(self):
+        document = self.load(modified=False)
+
+        answer = getattr(document, werkzeug_get_name("blob"))
+
+        self.assertEqual(answer.status, 304)
+        self.assertEqual(answer.headers, {"ETag": f'"{SHA256}"'})
+        self.assertEqual(document.loads, 0)
+        self.is_resource_modified.assert_called_once_with(
+            {"REQUEST_METHOD": "GET"}, etag=SHA256, last_modified=MODIFIED_AT
+        )
+
+    def test_modified_sends_the_blob(self):
+        document = self.load(modified=True)
+
+        answer = getattr(document, werkzeug_get_name("blob"))
+
+        self.assertEqual(answer.status, 200)
+        self.assertEqual(answer.etag, SHA256)
+        self.assertEqual(answer.last_modified, MODIFIED_AT)
+        self.assertEqual(document.loads, 1)
+
+
+@mock.patch.object(SETTINGS, "streaming_upload", False)
+class StarletteConditionalTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._class = ast.ClassDef("Model", [], [], [], [])
+        Starlette("blob", KEY, self._class).build()
+        starlette = mock.Mock()
+        starlette.responses.Response = response
+        starlette.responses.FileResponse = lambda data, **keywords: response(
+            status_code=200, data=data, **keywords
+        )
+        self.document = load_class(self._class, {"starlette": starlette})()
+
+    def get(self, **headers: str):
+        request = SimpleNamespace(headers=headers)
+        method = getattr(self.document, starlette_response_name("blob"))
+        return asyncio.run(method(request))
+
+    def test_matching_etag_skips_the_blob(self):
+        for if_none_match in [f'"{SHA256}"', f'"other", W/"{SHA256}"', "*"]:
+            with self.subTest(if_none_match):
+                answer = self.get(**{"if-none-match": if_none_match})
+                self.assertEqual(answer.status_code, 304)
+        self.assertEqual(self.document.loads, 0)
+
+    def test_etag_wins_over_the_date(self):
+        answer = self.get(
+            **{
+                "if-none-match": '"other"',
+                "if-modified-since": email.utils.format_datetime(
+                    MODIFIED_AT, usegmt=True
+                ),
+            }
+        )
+
+        self.assertEqual(answer.status_code, 200)
+        self.assertEqual(self.document.loads, 1)
+
+    def test_if_modified_since(self):
+        seconds = MODIFIED_AT.replace(microsecond=0)
+        for since, status in [
+            (seconds, 304),
+            (seconds + datetime.timedelta(days=1), 304),
+            (seconds - datetime.timedelta(seconds=1), 200),
+        ]:
+            with self.subTest(since):
+                since_header = email.utils.format_datetime(since, usegmt=True)
+                answer = self.get(**{"if-modified-since": since_header})
+                self.assertEqual(answer.status_code, status)
+
+        self.assertEqual(self.get(**{"if-modified-since": "garbage"}).status_code, 200)
+        self.assertEqual(self.get().status_code, 200)
+
+    def test_check_is_shared_and_purged_with_the_last_key(self):
+        Starlette("scan", {**KEY}, self._class).build()
+        self.assertEqual(
+            [node.name for node in self._class.body].count(not_modified_name()), 1
+        )
+
+        Starlette("blob", KEY, self._class).purge()
+        self.assertIsNotNone(get_function(not_modified_name(), self._class))
+
+        plain: FileFields = {"mime_unhandled": True, "name_unhandled": True}
+        Starlette("scan", KEY, self._class).change("scan", plain)
+        self.assertIsNone(
+            get_async_function(starlette_response_name("scan"), self._class)
+        )
+        self.assertIsNone(get_function(not_modified_name(), self._class))
+
+    def test_rename_follows_the_key(self):
+        Starlette("blob", KEY, self._class).change("scan", KEY)
+
+        method = get_async_function(starlette_response_name("scan"), self._class)
+        self.assertIsNotNone(method)
+        self.assertIn(
+            "return await self.scan_asyncio",
+            ast.unparse(ast.fix_missing_locations(method)),  # type: ignore
+        )
+
+
+@mock.patch.object(SETTINGS, "streaming_upload", False)
+class ConditionalImportsTest(unittest.TestCase):
+    def apply(self, mode: str) -> str:
+        with TemporaryDirectory() as root, mock.patch.object(SETTINGS, "mode", mode):
+            file_name = os.path.join(root, "models.py")
+            with open(file_name, "w") as out_file:
+                out_file.write(MODELS)
+            with EditSession(file_name) as session:
+                apply_history(KEY, "blob", file_name, "Document", session)
+            with open(file_name) as in_file:
+                return in_file.read()
+
+    def test_flask_check_imports_werkzeug_http(self):
+        source = self.apply("flask")
+
+        self.assertIn("import werkzeug.http\n", source)
+
+    def test_starlette_check_imports_its_modules(self):
+        source = self.apply("asyncio")
+        for line in ["import datetime\n", "import email.utils\n"]:
+            self.assertIn(line, source)
+
+        namespace: dict = {"starlette": mock.Mock()}
+        # The async setter hashes off the event loop with anyio
+        anyio = mock.Mock()
+        with mock.patch.dict(
+            sys.modules, {"anyio": anyio, "anyio.to_thread": anyio.to_thread}
+        ):
+            exec(compile(source, "<models>", "exec"), namespace)
+        check = getattr(namespace["Document"], not_modified_name())
+        since = email.utils.format_datetime(MODIFIED_AT, usegmt=True)
+
+        self.assertTrue(check({"if-modified-since": since}, SHA256, MODIFIED_AT))
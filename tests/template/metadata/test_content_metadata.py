@@ -0,0 +1,261 @@
+import ast
+import asyncio
+import hashlib
+import io
+import os
+import sys
+import unittest
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest import mock
+
+from execute.apply_history import apply_history
+from execute.rename import rename
+from execute.session import EditSession
+from naming import (
+    async_upload_reader_name,
+    get_sha256_key,
+    get_size_key,
+    starlette_get_name,
+)
+from settings import SETTINGS
+from template.starlette.starlette import Starlette
+from utils.ast_tools import (
+    get_ann_or_assign,
+    get_async_function,
+    get_property_getter,
+    get_property_setter,
+)
+
+MODELS = """import sqlalchemy
+from sqlalchemy import Column, Integer, LargeBinary
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+
+class Document(Base):
+    __tablename__ = "documents"
+
+    id = Column(Integer, primary_key=True)
+    blob = Column(LargeBinary)
+"""
+
+KEY = {"mime_unhandled": True, "name_unhandled": True, "content_metadata": True}
+
+PAYLOAD = bytes(range(256)) * 30
+
+
+class FakeUpload:
+    def __init__(self, data: bytes) -> None:
+        self.stream = io.BytesIO(data)
+        self.content_length = len(data)
+        self.mimetype = "application/pdf"
+        self.filename = "a.pdf"
+
+    def read(self) -> bytes:
+        return self.stream.read()
+
+
+def body_source(_fn: ast.AST) -> list[str]:
+    return [
+        ast.unparse(ast.fix_missing_locations(statement))
+        for statement in _fn.body  # type: ignore
+    ]
+
+
+@mock.patch.object(SETTINGS, "mode", "flask")
+class ContentMetadataTest(unittest.TestCase):
+    def apply(self, root: str) -> str:
+        file_name = os.path.join(root, "models.py")
+        with open(file_name, "w") as out_file:
+            out_file.write(MODELS)
+        with EditSession(file_name) as session:
+            apply_history(KEY, "blob", file_name, "Document", session)
+        return file_name
+
+    def load(self, file_name: str) -> type:
+        with open(file_name) as in_file:
+            source = in_file.read()
+        namespace: dict = {
+            "flask": SimpleNamespace(
+                send_file=lambda data, **keywords: SimpleNamespace(
+                    data=data, **keywords
+                ),
+                Response=None,
+                request=SimpleNamespace(environ={}),
+            ),
+            "starlette": mock.Mock(),
+        }
+        http = SimpleNamespace(is_resource_modified=lambda *_, **__: True)
+        werkzeug = SimpleNamespace(FileStorage=None, http=http)
+        # The generated module imports werkzeug.http itself
+        with mock.patch.dict(
+            sys.modules, {"werkzeug": werkzeug, "werkzeug.http": http}
+        ):
+            exec(compile(source, file_name, "exec"), namespace)
+        return namespace["Document"]
+
+    def check_upload(self, streaming: bool) -> None:
+        with mock.patch.object(SETTINGS, "streaming_upload", streaming):
+            with TemporaryDirectory() as root:
+                document = self.load(self.apply(root))()
+
+        document.blob_flask = FakeUpload(PAYLOAD)
+        response = document.blob_flask
+
+        self.assertEqual(document.blob_size, len(PAYLOAD))
+        self.assertEqual(document.blob_sha256, hashlib.sha256(PAYLOAD).hexdigest())
+        self.assertEqual(response.etag, document.blob_sha256)
+        self.assertEqual(response.content_length, len(PAYLOAD))
+
+    def test_whole_read_fills_metadata(self):
+        self.check_upload(streaming=False)
+
+    def test_streaming_read_hashes_while_reading(self):
+        self.check_upload(streaming=True)
+
+    def test_sqlalchemy_import_is_added_for_the_columns(self):
+        with TemporaryDirectory() as root:
+            file_name = os.path.join(root, "models.py")
+            with open(file_name, "w") as out_file:
+                out_file.write(MODELS.replace("import sqlalchemy\n", ""))
+            with EditSession(file_name) as session:
+                apply_history(KEY, "blob", file_name, "Document", session)
+            with open(file_name) as in_file:
+                self.assertIn("import sqlalchemy\n", in_file.read())
+            document = self.load(file_name)
+
+        self.assertIn("blob_sha256", document.__table__.columns)
+
+    def test_shadowed_datetime_is_imported_under_an_alias(self):
+        with TemporaryDirectory() as root:
+            file_name = os.path.join(root, "models.py")
+            with open(file_name, "w") as out_file:
+                out_file.write(
+                    MODELS.replace(
+                        "import sqlalchemy\n",
+                        "from datetime import datetime\n\nimport sqlalchemy\n",
+                    )
+                )
+            with EditSession(file_name) as session:
+                apply_history(KEY, "blob", file_name, "Document", session)
+            with open(file_name) as in_file:
+                source = in_file.read()
+            document = self.load(file_name)()
+
+        self.assertIn("import datetime as datetime_module\n", source)
+        self.assertIn("from datetime import datetime\n", source)
+        document.blob_flask = FakeUpload(PAYLOAD)
+        self.assertIsNotNone(document.blob_modified_at.tzinfo)
+
+    def test_rename_moves_the_columns(self):
+        with TemporaryDirectory() as root:
+            file_name = self.apply(root)
+            with EditSession(file_name) as session:
+                _class = session.get_class("Document")
+                blob = get_ann_or_assign("blob", _class)
+                blob.targets[0] = ast.Name("scan")  # type: ignore
+            with EditSession(file_name) as session:
+                rename(KEY, "blob", KEY, "scan", file_name, "Document", session)
+            with EditSession(file_name) as session:
+                _class = session.get_class("Document")
+                setter = get_property_setter("scan_flask", _class)
+                getter = get_property_getter("scan_flask", _class)
+
+                self.assertIsNotNone(get_ann_or_assign("scan_size", _class))
+                self.assertIsNotNone(get_ann_or_assign("scan_sha256", _class))
+                self.assertIsNone(get_ann_or_assign("blob_size", _class))
+                self.assertEqual(
+                    body_source(setter)[-3:-1],
+                    [
+                        "self.scan_size = len(data)",
+                        "self.scan_sha256 = digest.hexdigest()",
+                    ],
+                )
+                self.assertEqual(
+                    body_source(getter)[-2],
+                    "response.content_length = self.scan_size",
+                )
+
+    def test_dropping_metadata_restores_the_plain_property(self):
+        plain = {"mime_unhandled": True, "name_unhandled": True}
+        with TemporaryDirectory() as root:
+            file_name = self.apply(root)
+            with EditSession(file_name) as session:
+                rename(KEY, "blob", plain, "blob", file_name, "Document", session)
+            with EditSession(file_name) as session:
+                _class = session.get_class("Document")
+                setter = get_property_setter("blob_flask", _class)
+                getter = get_property_getter("blob_flask", _class)
+
+                self.assertIsNone(get_ann_or_assign(get_size_key("blob"), _class))
+                self.assertIsNone(get_ann_or_assign(get_sha256_key("blob"), _class))
+                self.assertEqual(
+                    body_source(setter),
+                    [
+                        "data = file.read()",
+                        "file_name = file.filename",
+                        "mime_type = file.mimetype",
+                        "self.blob = data",
+                    ],
+                )
+                self.assertEqual(
+                    body_source(getter)[-1],
+                    "return flask.send_file(data, filename=file_name, "
+                    "media_type=mime_type)",
+                )
+
+
+@mock.patch.object(SETTINGS, "streaming_upload", True)
+class AsyncContentMetadataTest(unittest.TestCase):
+    def test_async_setter_hashes_chunks_off_the_loop(self):
+        _class = ast.ClassDef("Document", [], [], [], [])
+
+        Starlette("blob", KEY, _class).build()
+
+        setter = get_property_setter(starlette_get_name("blob"), _class)
+        getter = get_property_getter(starlette_get_name("blob"), _class)
+        self.assertEqual(
+            body_source(setter),
+            [
+                "digest = hashlib.sha256()",
+                "data = await self.read_upload_stream_async(file, None, "
+                "digest=digest)",
+                "file_name = file.filename",
+                "mime_type = file.content_type",
+                "self.blob = data",
+                "self.blob_size = len(data)",
+                "self.blob_sha256 = digest.hexdigest()",
+                "self.blob_modified_at = datetime.datetime.now(datetime.timezone.utc)",
+            ],
+        )
+        self.assertIn(
+            "headers={'Content-Length': str(self.blob_size), "
+            "'ETag': f'\"{self.blob_sha256}\"'}",
+            body_source(getter)[-1],
+        )
+
+        reader = get_async_function(async_upload_reader_name(), _class)
+        module = ast.fix_missing_locations(ast.Module([reader], []))  # type: ignore
+        namespace: dict = {"starlette": mock.Mock(), "anyio": mock.Mock()}
+        exec(compile(module, "<reader>", "exec"), namespace)
+
+        async def run_sync(function, *args):
+            return function(*args)
+
+        namespace["anyio"].to_thread.run_sync = run_sync
+        upload = mock.Mock(size=len(PAYLOAD))
+        stream = io.BytesIO(PAYLOAD)
+
+        async def read(size: int) -> bytes:
+            return stream.read(size)
+
+        upload.read = read
+        digest = hashlib.sha256()
+        data = asyncio.run(
+            namespace[reader.name](upload, None, 1000, digest)  # type: ignore
+        )
+
+        self.assertEqual(data, PAYLOAD)
+        self.assertEqual(digest.hexdigest(), hashlib.sha256(PAYLOAD).hexdigest())
@@ -0,0 +1,156 @@
+import ast
+import asyncio
+import hashlib
+import io
+import os
+import sys
+import unittest
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest import mock
+
+from execute.apply_history import apply_history
+from execute.session import EditSession
+from naming import async_upload_reader_name, starlette_get_name
+from settings import SETTINGS
+from template.starlette.starlette import Starlette
+from types_source import FileFields
+from utils.ast_tools import get_assign, get_async_function, get_property_setter
+
+
+class FakeUpload:
+    def __init__(self, data: bytes, size: int | None) -> None:
+        self.file = io.BytesIO(data)
+        self.size = size
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+
+def load_reader(_class: ast.ClassDef):
+    reader = get_async_function(async_upload_reader_name(), _class)
+    if not reader:
+        raise Exception("Upload reader is not added")
+    module = ast.fix_missing_locations(ast.Module([reader], []))
+    namespace: dict = {"starlette": mock.Mock()}
+    exec(compile(module, "<reader>", "exec"), namespace)
+    reader = namespace[async_upload_reader_name()]
+    return lambda *args: asyncio.run(reader(*args))
+
+
+KEY: FileFields = {"mime_type_fix": "application/pdf", "file_name_fix": "a.pdf"}
+
+
+@mock.patch.object(SETTINGS, "max_upload_size", 100)
+@mock.patch.object(SETTINGS, "streaming_upload", True)
+class StreamingSetterTest(unittest.TestCase):
+    def test_setter_awaits_the_reader(self):
+        _class = ast.ClassDef("TestClass", [], [], [], [])
+
+        Starlette("file", KEY, _class).build()
+
+        setter = get_property_setter(starlette_get_name("file"), _class)
+        if not setter:
+            raise Exception("Setter is not added")
+        data = get_assign("data", setter, True)
+        self.assertEqual(
+            ast.unparse(data.value),  # type: ignore
+            f"await self.{async_upload_reader_name()}(file, 100)",
+        )
+        self.assertEqual(len(_class.body), 3)
+
+    def test_reader_reads_in_chunks(self):
+        _class = ast.ClassDef("TestClass", [], [], [], [])
+        Starlette("file", KEY, _class).build()
+        reader = load_reader(_class)
+        payload = bytes(range(256)) * 40
+
+        exact = reader(FakeUpload(payload, len(payload)), None, 1000)
+        unknown = reader(FakeUpload(payload, None), None, 1000)
+        lying = reader(FakeUpload(payload, 10), None, 1000)
+
+        self.assertEqual(exact, payload)
+        self.assertEqual(unknown, payload)
+        self.assertEqual(lying, payload)
+
+    def test_reader_aborts_over_max_size(self):
+        _class = ast.ClassDef("TestClass", [], [], [], [])
+        Starlette("file", KEY, _class).build()
+        reader = load_reader(_class)
+
+        declared = FakeUpload(b"x" * 200, 200)
+        with self.assertRaises(ValueError):
+            reader(declared, 100)
+        self.assertEqual(declared.file.tell(), 0, "Read before the size check")
+
+        unknown = FakeUpload(b"x" * 200, None)
+        with self.assertRaises(ValueError):
+            reader(unknown, 100, 30)
+        self.assertEqual(unknown.file.tell(), 120, "Read on past the limit")
+        self.assertEqual(reader(FakeUpload(b"x" * 100, None), 100, 30), b"x" * 100)
+
+    def test_reader_is_purged_with_the_last_setter(self):
+        _class = ast.ClassDef("TestClass", [], [], [], [])
+        Starlette("first", KEY, _class).build()
+        Starlette("second", KEY, _class).build()
+
+        Starlette("first", KEY, _class).purge()
+        self.assertIsNotNone(get_async_function(async_upload_reader_name(), _class))
+
+        Starlette("second", KEY, _class).purge()
+        self.assertEqual(_class.body, [])
+
+    def test_turning_streaming_off_restores_file_read(self):
+        _class = ast.ClassDef("TestClass", [], [], [], [])
+        Starlette("file", KEY, _class).build()
+
+        with mock.patch.object(SETTINGS, "streaming_upload", False):
+            Starlette("file", KEY, _class).change("file", KEY)
+
+        setter = get_property_setter(starlette_get_name("file"), _class)
+        data = get_assign("data", setter, True)  # type: ignore
+        self.assertEqual(ast.unparse(data.value), "await file.read()")  # type: ignore
+        self.assertIsNone(get_async_function(async_upload_reader_name(), _class))
+
+    @mock.patch.object(SETTINGS, "mode", "asyncio")
+    def test_anyio_is_imported_for_the_digest(self):
+        metadata: FileFields = {
+            "mime_unhandled": True,
+            "name_unhandled": True,
+            "content_metadata": True,
+        }
+        with TemporaryDirectory() as root:
+            file_name = os.path.join(root, "models.py")
+            with open(file_name, "w") as out_file:
+                out_file.write(
+                    "from sqlalchemy import Column, Integer, LargeBinary\n"
+                    "from sqlalchemy.orm import declarative_base\n\n"
+                    "Base = declarative_base()\n\n\n"
+                    "class Document(Base):\n"
+                    "    __tablename__ = 'documents'\n\n"
+                    "    id = Column(Integer, primary_key=True)\n"
+                    "    blob = Column(LargeBinary)\n"
+                )
+            with EditSession(file_name) as session:
+                apply_history(metadata, "blob", file_name, "Document", session)
+            with open(file_name) as in_file:
+                source = in_file.read()
+
+        self.assertIn("import anyio.to_thread\n", source)
+
+        async def run_sync(function, *args):
+            return function(*args)
+
+        to_thread = SimpleNamespace(run_sync=run_sync)
+        anyio = SimpleNamespace(to_thread=to_thread)
+        namespace: dict = {"starlette": mock.Mock()}
+        with mock.patch.dict(
+            sys.modules, {"anyio": anyio, "anyio.to_thread": to_thread}
+        ):
+            exec(compile(source, file_name, "exec"), namespace)
+        reader = getattr(namespace["Document"], async_upload_reader_name())
+        digest = hashlib.sha256()
+
+        data = asyncio.run(reader(FakeUpload(b"x" * 50, 50), None, 20, digest))
+
+        self.assertEqual(digest.hexdigest(), hashlib.sha256(data).hexdigest())
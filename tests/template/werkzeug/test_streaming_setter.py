@@ -0,0 +1,102 @@
+import ast
+import io
+import unittest
+from unittest import mock
+
+from naming import upload_reader_name, werkzeug_get_name
+from settings import SETTINGS
+from template.werkzeug.werkzeug import Werkzeug
+from types_source import FileFields
+from utils.ast_tools import get_assign, get_function, get_property_setter
+
+
+class FakeUpload:
+    def __init__(self, data: bytes, content_length: int | None) -> None:
+        self.stream = io.BytesIO(data)
+        self.content_length = content_length
+
+
+def load_reader(_class: ast.ClassDef):
+    reader = get_function(upload_reader_name(), _class)
+    if not reader:
+        raise Exception("Upload reader is not added")
+    module = ast.fix_missing_locations(ast.Module([reader], []))
+    namespace: dict = {"werkzeug": mock.Mock()}
+    exec(compile(module, "<reader>", "exec"), namespace)
+    return namespace[upload_reader_name()]
+
+
+KEY: FileFields = {"mime_type_fix": "application/pdf", "file_name_fix": "a.pdf"}
+
+
+@mock.patch.object(SETTINGS, "max_upload_size", 100)
+@mock.patch.object(SETTINGS, "streaming_upload", True)
+class StreamingSetterTest(unittest.TestCase):
+    def test_setter_reads_through_the_reader(self):
+        _class = ast.ClassDef("TestClass", [], [], [], [])
+
+        Werkzeug("file", KEY, _class).build()
+
+        setter = get_property_setter(werkzeug_get_name("file"), _class)
+        if not setter:
+            raise Exception("Setter is not added")
+        data = get_assign("data", setter, True)
+        self.assertEqual(
+            ast.unparse(data.value),  # type: ignore
+            f"self.{upload_reader_name()}(file, 100)",
+        )
+        self.assertEqual(len(_class.body), 3)
+
+    def test_reader_fills_a_single_buffer(self):
+        _class = ast.ClassDef("TestClass", [], [], [], [])
+        Werkzeug("file", KEY, _class).build()
+        reader = load_reader(_class)
+        payload = bytes(range(256)) * 40
+
+        exact = reader(FakeUpload(payload, len(payload)), None, 1000)
+        unknown = reader(FakeUpload(payload, None), None, 1000)
+        lying = reader(FakeUpload(payload, 10), None, 1000)
+
+        self.assertEqual(exact, payload)
+        self.assertEqual(unknown, payload)
+        self.assertEqual(lying, payload)
+        self.assertIsInstance(exact, bytearray)
+
+    def test_reader_aborts_over_max_size(self):
+        _class = ast.ClassDef("TestClass", [], [], [], [])
+        Werkzeug("file", KEY, _class).build()
+        reader = load_reader(_class)
+
+        declared = FakeUpload(b"x" * 200, 200)
+        with self.assertRaises(ValueError):
+            reader(declared, 100)
+        self.assertEqual(declared.stream.tell(), 0, "Read before the size check")
+
+        with self.assertRaises(ValueError):
+            reader(FakeUpload(b"x" * 200, None), 100, 30)
+        self.assertEqual(reader(FakeUpload(b"x" * 100, None), 100, 30), b"x" * 100)
+
+    def test_reader_is_shared_and_purged_with_the_last_setter(self):
+        _class = ast.ClassDef("TestClass", [], [], [], [])
+        Werkzeug("first", KEY, _class).build()
+        Werkzeug("second", KEY, _class).build()
+
+        self.assertEqual(len(_class.body), 5)
+
+        Werkzeug("first", KEY, _class).purge()
+        self.assertIsNotNone(get_function(upload_reader_name(), _class))
+
+        Werkzeug("second", KEY, _class).purge()
+        self.assertEqual(_class.body, [])
+
+    def test_turning_streaming_off_restores_file_read(self):
+        _class = ast.ClassDef("TestClass", [], [], [], [])
+        Werkzeug("file", KEY, _class).build()
+
+        with mock.patch.object(SETTINGS, "streaming_upload", False):
+            Werkzeug("file", KEY, _class).change("file", KEY)
+
+        setter = get_property_setter(werkzeug_get_name("file"), _class)
+        data = get_assign("data", setter, True)  # type: ignore
+        self.assertEqual(ast.unparse(data.value), "file.read()")  # type: ignore
+        self.assertIsNone(get_function(upload_reader_name(), _class))
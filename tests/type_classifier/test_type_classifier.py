@@ -0,0 +1,94 @@
+import unittest
+
+from sqlalchemy import Column, Enum, Integer, LargeBinary, PickleType, String, Text
+from sqlalchemy.dialects import mysql, postgresql
+from sqlalchemy.orm import column_property, declarative_base
+from sqlalchemy.types import TypeDecorator
+
+from type_classifier import class_columns, classify_type, classify_type_class
+
+Base = declarative_base()
+
+
+class CompressedBlob(TypeDecorator):
+    impl = LargeBinary
+    cache_ok = True
+
+
+class Slug(TypeDecorator):
+    impl = String(40)
+    cache_ok = True
+
+
+class Sample(Base):
+    __tablename__ = "sample"
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String(100))
+    body = Column(Text)
+    state = Column(Enum("a", "b", name="state"))
+    scan = Column(postgresql.BYTEA)
+    raw = Column(mysql.LONGBLOB)
+    packed = Column(CompressedBlob)
+    slug = Column(Slug)
+    pickled = Column(PickleType)
+
+
+class Person(Base):
+    __tablename__ = "person"
+
+    id = Column(Integer, primary_key=True)
+    first = Column(String(50))
+    last = Column(String(50))
+    full = column_property(first + " " + last)
+    photo = Column(LargeBinary, nullable=False)
+
+
+class ClassifierTest(unittest.TestCase):
+    def test_dialect_and_decorated_types(self) -> None:
+        self.assertEqual(classify_type(postgresql.BYTEA()), "binary")
+        self.assertEqual(classify_type(mysql.LONGBLOB()), "binary")
+        self.assertEqual(classify_type(CompressedBlob()), "binary")
+        self.assertEqual(classify_type(Slug()), "string")
+        self.assertEqual(classify_type(mysql.VARCHAR(10)), "string")
+
+    def test_lookalikes_are_other(self) -> None:
+        self.assertEqual(classify_type(PickleType()), "other")
+        self.assertEqual(classify_type(Enum("a", name="e")), "other")
+        self.assertEqual(classify_type(Integer()), "other")
+
+    def test_memoized_per_type_class(self) -> None:
+        classify_type_class.cache_clear()
+        classify_type(postgresql.BYTEA())
+        classify_type(postgresql.BYTEA(10))
+
+        self.assertEqual(classify_type_class.cache_info().hits, 1)
+
+    def test_class_columns(self) -> None:
+        classified = class_columns(Sample)
+
+        self.assertEqual(classified.file_keys, ["scan", "raw", "packed"])
+        self.assertEqual(classified.string_keys, ["title", "body", "slug"])
+        self.assertIs(class_columns(Sample), classified)
+
+    def test_column_property_next_to_a_binary(self) -> None:
+        classified = class_columns(Person, with_nullable=True)
+
+        self.assertEqual(classified.file_keys, ["photo"])
+        self.assertIsNone(classified.columns["full"].nullable)
+        self.assertFalse(classified.columns["photo"].nullable)
+
+    def test_nullable_only_read_when_asked(self) -> None:
+        class Scan(Base):
+            __tablename__ = "scan"
+
+            id = Column(Integer, primary_key=True)
+            data = Column(LargeBinary, nullable=False)
+
+        plain = class_columns(Scan)
+        self.assertIsNone(plain.columns["data"].nullable)
+        self.assertIs(class_columns(Scan), plain)
+
+        detailed = class_columns(Scan, with_nullable=True)
+        self.assertFalse(detailed.columns["data"].nullable)
+        self.assertIs(class_columns(Scan), detailed)